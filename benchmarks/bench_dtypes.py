@@ -0,0 +1,75 @@
+import time
+import numpy as np
+import pandas as pd
+
+import data_pipeline.dtypes as dtypes
+from data_pipeline.dtypes import memory_report, metric_drift, apply_dtype_policy, METRIC_TOLERANCE
+from data_pipeline.data_preprocess import preprocess_panel
+from feature_engineering.feature_engineering_pipeline import engineer_features
+
+N_SERIES = 1000
+DAYS = 400
+
+
+def make_panel(n_series=N_SERIES, days=DAYS, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2024-08-01", periods=days)
+    n = n_series * days
+    t = np.tile(np.arange(days), n_series)
+    level = np.repeat(rng.lognormal(8, 1, n_series), days)
+    oturum = (level * (1 + 0.2 * np.sin(2 * np.pi * t / 7)) * rng.lognormal(0, 0.1, n)).round()
+    df = pd.DataFrame({
+        "segment": np.repeat([f"seg_{i:05d}" for i in range(n_series)], days),
+        "event_date": np.tile(dates, n_series),
+        "oturum_sayisi": oturum,
+        "toplam_izleme_suresi_dk": oturum * rng.normal(25, 3, n),
+    })
+    # Eksik günler doldurma adımını çalıştırır.
+    return df[rng.random(n) > 0.02].reset_index(drop=True)
+
+
+def stage_frames(raw):
+    # Politika kapalıyken her aşamanın tam (int64/float64/object) çıktısı.
+    dtypes.COMPACT = False
+    try:
+        panel, _ = preprocess_panel(raw)
+        features = engineer_features(panel, group_col="segment")
+    finally:
+        dtypes.COMPACT = True
+    return {"raw": raw, "preprocess": panel, "features": features}
+
+
+def prophet_drift(float32):
+    from model_experiments.prophet_prediction import load_data, run_prophet_model
+
+    try:
+        df, holidays_df = load_data()
+    except FileNotFoundError as e:
+        print(f"Metrik kontrolü atlandı: {e}")
+        return None
+    wide = df.astype({c: np.float64 for c in df.columns if pd.api.types.is_float_dtype(df[c])})
+    _, base, *_ = run_prophet_model(wide, holidays_df)
+    _, compact, *_ = run_prophet_model(apply_dtype_policy(wide, float32=float32, enabled=True), holidays_df)
+    return metric_drift(base, compact)
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    stages = stage_frames(make_panel())
+    print(f"Aşamalar hazır ({time.perf_counter() - t0:.1f} sn)\n")
+
+    print("Bellek raporu (int8 bayraklar, küçük takvim tamsayıları, kategori gun_adi):")
+    print(memory_report(stages).to_string(index=False))
+    print("\nBellek raporu (+ float32 özellikler):")
+    print(memory_report(stages, float32=True).to_string(index=False))
+
+    # Varsayılan politika tolerans dışına çıkarsa hata; float32 isteğe bağlı
+    # olduğu için yalnızca raporlanır.
+    for float32 in (False, True):
+        drift = prophet_drift(float32)
+        if drift is None:
+            break
+        print(f"\nProphet metrikleri, float32={float32} (tolerans {METRIC_TOLERANCE:.0%}):")
+        print(drift.to_string(index=False))
+        if not float32 and not drift["ok"].all():
+            raise SystemExit("Kompakt tipler model metriklerini tolerans dışında değiştirdi")
@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+from data_pipeline.local_aggregate import aggregate_events
+from data_pipeline.hll import rollup_sessions, standard_error
+
+EVENTS_PATH = os.getenv("ENGAGEMENT_EVENTS_PATH")
+PRECISIONS = (10, 12, 14)
+DIMENSIONS = ["device_type"]
+
+
+def make_synthetic_events(out_dir, n_rows=1_000_000, n_views=400_000, days=120, seed=0):
+    # Aynı view_id birden çok güne/satıra düşebilir; gerçek verideki tekrarları taklit eder.
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2024-08-01") + pd.to_timedelta(rng.integers(0, 86400 * days, n_rows), unit="s")
+    df = pd.DataFrame({
+        "view_id": rng.integers(0, n_views, n_rows).astype(str),
+        "view_start": start,
+        "view_end": start + pd.to_timedelta(rng.integers(0, 7200, n_rows), unit="s"),
+        "event_date": start,
+        "device_type": rng.choice(["tv", "web", "ios", "android"], n_rows),
+    })
+    bounds = np.linspace(0, n_rows, 5).astype(int)
+    for i in range(4):
+        part = df.iloc[bounds[i]:bounds[i + 1]]
+        part.to_parquet(os.path.join(out_dir, f"events_{i}.parquet"), index=False)
+    return os.path.join(out_dir, "*.parquet"), df
+
+
+def exact_rollup(events, freq):
+    ev = events[["view_id", "event_date"]].copy()
+    ev["period"] = pd.to_datetime(ev["event_date"]).dt.to_period(freq).dt.start_time
+    return ev.groupby("period")["view_id"].nunique()
+
+
+def _rel_err(est, exact):
+    return np.abs(est - exact) / np.maximum(exact, 1)
+
+
+def main():
+    tmp = None
+    if EVENTS_PATH:
+        paths, events = EVENTS_PATH, None
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        paths, events = make_synthetic_events(tmp.name)
+
+    t = time.perf_counter()
+    exact = aggregate_events(paths, dimensions=DIMENSIONS)
+    t_exact = time.perf_counter() - t
+    print(f"Tam sayım (COUNT DISTINCT eşdeğeri): {t_exact:.2f} sn, {len(exact)} satır")
+
+    rows = []
+    for p in PRECISIONS:
+        t = time.perf_counter()
+        sk = aggregate_events(paths, dimensions=DIMENSIONS, sketches=True, exact=False, precision=p)
+        t_build = time.perf_counter() - t
+
+        daily_err = _rel_err(sk["oturum_sayisi"].to_numpy(), exact["oturum_sayisi"].to_numpy())
+        row = {
+            "precision": p,
+            "teorik_hata_%": 100 * standard_error(p),
+            "sketch_kb": 2 ** p / 1024,
+            "olusturma_sn": t_build,
+            "gunluk_ort_hata_%": 100 * daily_err.mean(),
+        }
+
+        for freq in ("W", "M"):
+            t = time.perf_counter()
+            roll = rollup_sessions(sk, freq=freq)
+            row[f"rollup_{freq}_ms"] = 1000 * (time.perf_counter() - t)
+            if events is not None:
+                ref = exact_rollup(events, freq)
+                est = roll.set_index("period")["oturum_sayisi_tahmini"].reindex(ref.index)
+                row[f"rollup_{freq}_hata_%"] = 100 * _rel_err(est.to_numpy(), ref.to_numpy()).mean()
+        rows.append(row)
+
+    report = pd.DataFrame(rows)
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(report.round(3).to_string(index=False))
+
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import logging
+import time
+import numpy as np
+import pandas as pd
+
+from model_experiments.prophet_prediction import load_data, fit_prophet, regressors
+from model_experiments.prophet_intervals import INTERVAL_MODES, predict_with_intervals
+from benchmarks.bench_prophet_warm import split, HORIZON
+
+# Uzun ufuk gecikmesi için gelecek tablosu test kısmının bu kadar katına uzatılır.
+LONG_REPEAT = 20
+REPEATS = 3
+
+
+def long_future(test, repeat=LONG_REPEAT):
+    # Regresör değerleri tekrarlanır, tarihler test sonundan itibaren devam eder.
+    future = pd.concat([test] * repeat, ignore_index=True)
+    step = test["ds"].diff().median()
+    future["ds"] = test["ds"].iloc[0] + step * np.arange(len(future))
+    return future[["ds"] + regressors]
+
+
+def timed_predict(model, future_df, mode):
+    best = np.inf
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        forecast = predict_with_intervals(model, future_df, mode, seed=0 if mode == "numpy" else None)
+        best = min(best, time.perf_counter() - t0)
+    return forecast, best
+
+
+if __name__ == "__main__":
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    df, holidays_df = load_data()
+    df_prophet = df.rename(columns={"event_date": "ds", "ortalama_sure": "y"})[["ds", "y"] + regressors].dropna()
+    df_prophet = df_prophet.reset_index(drop=True)
+    train, test = split(df_prophet, len(df_prophet) - HORIZON)
+    model = fit_prophet(train, holidays_df, regressors)
+
+    future_df = pd.concat([train, test])[["ds"] + regressors]
+    future_long = long_future(test)
+    y = test["y"].to_numpy()
+
+    forecasts = {}
+    rows = []
+    for mode in INTERVAL_MODES:
+        forecast, sn = timed_predict(model, future_df, mode)
+        _, sn_long = timed_predict(model, future_long, mode)
+        forecasts[mode] = forecast
+        lower = forecast["yhat_lower"].to_numpy()[-HORIZON:]
+        upper = forecast["yhat_upper"].to_numpy()[-HORIZON:]
+        rows.append({
+            "mod": mode,
+            "ms": sn * 1000,
+            f"ms_{len(future_long)}_satir": sn_long * 1000,
+            "kapsama": np.mean((y >= lower) & (y <= upper)) if mode != "none" else np.nan,
+            "genislik": np.mean(upper - lower),
+        })
+
+    report = pd.DataFrame(rows)
+    reference = forecasts["prophet"]
+    report["prophet_fark"] = [
+        np.nanmax(np.abs(forecasts[m][["yhat_lower", "yhat_upper"]].to_numpy() - reference[["yhat_lower", "yhat_upper"]].to_numpy()))
+        if m != "none" else np.nan
+        for m in report["mod"]
+    ]
+    print(report.round(3).to_string(index=False))
+    print(f"\nHedef kapsama: %{model.interval_width * 100:.0f} ({HORIZON} test günü, {len(train)} eğitim satırı)")
@@ -0,0 +1,75 @@
+import logging
+import time
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from model_experiments.prophet_prediction import load_data, fit_prophet, regressors
+
+DAYS = 14
+HORIZON = 40
+# Sıcak ve soğuk fit'in ortalama test MAE'si arasındaki izin verilen göreli fark.
+# Prophet'in MAP yüzeyi düz olduğundan iki fit aynı log olasılığa farklı
+# noktalarda ulaşabilir; noktasal fark bilgi amaçlı raporlanır.
+MAE_TOLERANCE = 0.05
+
+
+def split(df_prophet, n_train, horizon=HORIZON):
+    # run_prophet_model ile aynı hazırlık: ölçekleyici yalnızca eğitim kısmında fit edilir.
+    train = df_prophet.iloc[:n_train].copy()
+    test = df_prophet.iloc[n_train:n_train + horizon].copy()
+    scaler = StandardScaler()
+    train[regressors] = scaler.fit_transform(train[regressors])
+    test[regressors] = scaler.transform(test[regressors])
+    return train, test
+
+
+def timed_fit(train, holidays_df, init=None):
+    t0 = time.perf_counter()
+    model = fit_prophet(train, holidays_df, regressors, init=init, save_iterations=True)
+    elapsed = time.perf_counter() - t0
+    stan_fit = model.stan_backend.stan_fit
+    return model, elapsed, stan_fit.optimized_iterations_np.shape[0], stan_fit.optimized_params_dict["lp__"]
+
+
+if __name__ == "__main__":
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    df, holidays_df = load_data()
+    df_prophet = df.rename(columns={"event_date": "ds", "ortalama_sure": "y"})[["ds", "y"] + regressors].dropna()
+    df_prophet = df_prophet.reset_index(drop=True)
+    first = len(df_prophet) - HORIZON - DAYS
+
+    # Günlük yeniden fit: her gün bir gün fazla veri; sıcak fit bir önceki günün sıcak fit'inden başlar.
+    previous = timed_fit(split(df_prophet, first - 1)[0], holidays_df)[0]
+    rows = []
+    for n_train in range(first, first + DAYS):
+        train, test = split(df_prophet, n_train)
+        cold, cold_sn, cold_iter, cold_lp = timed_fit(train, holidays_df)
+        warm, warm_sn, warm_iter, warm_lp = timed_fit(train, holidays_df, init=previous)
+        previous = warm
+
+        y = test["y"].to_numpy()
+        cold_yhat = cold.predict(test)["yhat"].to_numpy()
+        warm_yhat = warm.predict(test)["yhat"].to_numpy()
+        rows.append({
+            "son_gun": train["ds"].iloc[-1].date(),
+            "soguk_iter": cold_iter,
+            "sicak_iter": warm_iter,
+            "soguk_ms": cold_sn * 1000,
+            "sicak_ms": warm_sn * 1000,
+            "lp_farki": warm_lp - cold_lp,
+            "soguk_mae": np.abs(y - cold_yhat).mean(),
+            "sicak_mae": np.abs(y - warm_yhat).mean(),
+            "max_fark": np.abs(cold_yhat - warm_yhat).max(),
+        })
+
+    report = pd.DataFrame(rows)
+    print(report.round(3).to_string(index=False))
+    print(
+        f"\nOrtalama iterasyon: soğuk {report['soguk_iter'].mean():.0f} → sıcak {report['sicak_iter'].mean():.0f} | "
+        f"ortalama süre: soğuk {report['soguk_ms'].mean():.0f} ms → sıcak {report['sicak_ms'].mean():.0f} ms"
+    )
+    rel = abs(report["sicak_mae"].mean() - report["soguk_mae"].mean()) / report["soguk_mae"].mean()
+    print(f"Tahmin uyumu: ortalama MAE soğuk {report['soguk_mae'].mean():.3f} / sıcak {report['sicak_mae'].mean():.3f} "
+          f"(göreli fark %{rel * 100:.2f}, {'OK' if rel <= MAE_TOLERANCE else 'TOLERANS AŞILDI'}), "
+          f"ortalama log olasılık farkı {report['lp_farki'].mean():+.3f}")
@@ -0,0 +1,106 @@
+import itertools
+import time
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from data_pipeline.storage import read_frame, CLEAN
+from feature_engineering.feature_engineering_pipeline import engineer_features
+from model_experiments.prophet_prediction import regressors
+from model_experiments.recursive_forecast import (
+    recursive_forecast, session_forecast, calendar_rows, TARGET, SESSIONS, TOTAL,
+)
+
+HORIZONS = (30, 90, 180)
+N_SERIES = (1, 50)
+# Geçmiş bu katlara uzatılarak da ölçülür (yeniden hesaplama geçmişle büyür).
+HISTORY_REPEATS = (1, 5)
+# Özyinelemeli ve yeniden hesaplamalı tahminler arasındaki izin verilen fark.
+TOLERANCE = 1e-4
+
+
+def longer(clean, repeats):
+    # Seri kendi önüne tarihleri kaydırılarak eklenir; takvim kolonları yeniden üretilir.
+    span = pd.Timedelta(days=len(clean))
+    parts = [clean.assign(event_date=clean["event_date"] - span * k) for k in range(repeats - 1, -1, -1)]
+    out = pd.concat(parts, ignore_index=True)
+    cal = calendar_rows(out["event_date"])
+    out[["yil", "ay", "hafta_gunu"]] = cal[["yil", "ay", "hafta_gunu"]].to_numpy()
+    return out
+
+
+def panel(clean, n_series):
+    # Aynı seri ölçeklenerek çoğaltılır; her seri ayrı bir segment.
+    if n_series == 1:
+        return clean, None
+    parts = [
+        clean.assign(segment=f"s{i:03d}", **{c: clean[c] * (1 + i / n_series) for c in (SESSIONS, TOTAL)})
+        for i in range(n_series)
+    ]
+    return pd.concat(parts, ignore_index=True), "segment"
+
+
+def linear_predictor(history, group_col):
+    # Model süresi ölçümü baskılamasın diye ucuz bir doğrusal model.
+    train = engineer_features(history, group_col=group_col, features=regressors).dropna(subset=regressors)
+    model = LinearRegression().fit(train[regressors].to_numpy(np.float64), train[TARGET])
+    return lambda rows: model.predict(rows[regressors].to_numpy(np.float64))
+
+
+def rebuild_forecast(history, predict, horizon, group_col):
+    # Saf yöntem: her adımda tüm geçmiş + yeni satır için engineer_features.
+    keys = sorted(history[group_col].astype(str).unique()) if group_col else [None]
+    aux = session_forecast(history, keys, horizon, group_col=group_col)
+    hist = history.copy()
+    if group_col:
+        hist[group_col] = hist[group_col].astype(str)
+    last = pd.Timestamp(hist["event_date"].max())
+    out = []
+    for k in range(horizon):
+        rows = calendar_rows(np.repeat(last + pd.Timedelta(days=k + 1), len(keys)))
+        if group_col:
+            rows.insert(0, group_col, keys)
+        rows[SESSIONS] = aux[:, k]
+        rows[TOTAL] = np.nan
+        rows[TARGET] = np.nan
+        full = engineer_features(pd.concat([hist, rows], ignore_index=True), group_col=group_col, features=regressors)
+        step = full[full["event_date"] == rows["event_date"].iloc[0]]
+        yhat = predict(step)
+        rows[TARGET] = yhat
+        rows[TOTAL] = yhat * rows[SESSIONS]
+        hist = pd.concat([hist, rows], ignore_index=True)
+        out.append(rows[([group_col] if group_col else []) + ["event_date", TARGET]])
+    sort_cols = [group_col, "event_date"] if group_col else ["event_date"]
+    return pd.concat(out, ignore_index=True).sort_values(sort_cols).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    clean = read_frame(CLEAN)
+    clean = clean[["event_date", SESSIONS, TOTAL, TARGET, "yil", "ay", "hafta_gunu"]]
+    rows = []
+    for repeats, n_series in itertools.product(HISTORY_REPEATS, N_SERIES):
+        history, group_col = panel(longer(clean, repeats), n_series)
+        predict = linear_predictor(history, group_col)
+        for horizon in HORIZONS:
+            t0 = time.perf_counter()
+            fast = recursive_forecast(history, predict, horizon, regressors, group_col=group_col)
+            fast_sn = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            slow = rebuild_forecast(history, predict, horizon, group_col)
+            slow_sn = time.perf_counter() - t0
+            rows.append({
+                "seri": n_series,
+                "gecmis": len(history) // n_series,
+                "ufuk": horizon,
+                "durum_ms": fast_sn * 1000,
+                "yeniden_ms": slow_sn * 1000,
+                "hizlanma": slow_sn / fast_sn,
+                "max_fark": np.abs(fast["yhat"].to_numpy() - slow[TARGET].to_numpy()).max(),
+            })
+
+    report = pd.DataFrame(rows)
+    print(report.round(4).to_string(index=False))
+    ok = (report["max_fark"] <= TOLERANCE).all()
+    print(f"\nTahmin uyumu: en büyük fark {report['max_fark'].max():.2e} ({'OK' if ok else 'TOLERANS AŞILDI'})")
+    per_step = report["durum_ms"] / report["ufuk"]
+    print(f"Durumlu yöntemde adım başı süre: {per_step.min():.2f}–{per_step.max():.2f} ms")
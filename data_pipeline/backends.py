@@ -0,0 +1,95 @@
+import os
+import threading
+
+from .bigquery_connection import get_client, get_bqstorage_client
+
+
+DEFAULT_BACKEND = os.getenv("ENGAGEMENT_BACKEND", "bigquery")
+EVENTS_PATH = os.getenv("ENGAGEMENT_EVENTS_PATH", os.path.join("data", "events", "*.parquet"))
+BATCH_SIZE = 100_000
+
+
+class BigQueryBackend:
+    name = "bigquery"
+    dialect = "bigquery"
+
+    def __init__(self, location="US"):
+        self.location = location
+
+    def table_ref(self, table_fqn):
+        return f"`{table_fqn}`"
+
+    def query_df(self, sql):
+        job = get_client().query(sql, location=self.location)
+        return job.result().to_dataframe(bqstorage_client=get_bqstorage_client())
+
+    def iter_batches(self, sql):
+        # Storage Read API üzerinden Arrow record batch akışı.
+        job = get_client().query(sql, location=self.location)
+        return job.result().to_arrow_iterable(bqstorage_client=get_bqstorage_client())
+
+
+class DuckDBBackend:
+    name = "duckdb"
+    dialect = "duckdb"
+
+    def __init__(self, events_path=EVENTS_PATH, database=":memory:", threads=None):
+        self.events_path = events_path
+        self.database = database
+        self.threads = threads
+        self._con = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._con is None:
+            with self._lock:
+                if self._con is None:
+                    import duckdb
+
+                    con = duckdb.connect(self.database)
+                    if self.threads:
+                        con.execute(f"SET threads TO {int(self.threads)}")
+                    self._con = con
+        # DuckDB bağlantısı thread-safe değil; her thread kendi cursor'ını kullanır.
+        cur = getattr(self._local, "cursor", None)
+        if cur is None:
+            cur = self._con.cursor()
+            self._local.cursor = cur
+        return cur
+
+    def table_ref(self, table_fqn):
+        path = self.events_path.replace("'", "''")
+        return f"read_parquet('{path}')"
+
+    def query_df(self, sql):
+        return self._connection().execute(sql).df()
+
+    def iter_batches(self, sql, batch_size=BATCH_SIZE):
+        return iter(self._connection().execute(sql).fetch_record_batch(batch_size))
+
+
+BACKENDS = {
+    "bigquery": BigQueryBackend,
+    "duckdb": DuckDBBackend,
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_backend(name=None, **kwargs):
+    if name is not None and not isinstance(name, str):
+        return name
+
+    name = (name or DEFAULT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Bilinmeyen backend: {name!r} ({', '.join(BACKENDS)} olmalı)")
+
+    key = (name, tuple(sorted(kwargs.items())))
+    with _instances_lock:
+        backend = _instances.get(key)
+        if backend is None:
+            backend = BACKENDS[name](**kwargs)
+            _instances[key] = backend
+    return backend
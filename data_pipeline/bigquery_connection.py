@@ -1,19 +1,63 @@
 import os
-from google.cloud import bigquery
-from google.oauth2 import service_account
-from dotenv import load_dotenv
+import threading
 
-load_dotenv()
 
-KEY_PATH = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+PROJECT = "tabii-469409"
 
-credentials = service_account.Credentials.from_service_account_file(KEY_PATH)
+_credentials = None
+_client = None
+_bqstorage_client = None
+_lock = threading.Lock()
 
-client = bigquery.Client(
-    credentials=credentials,
-    project="tabii-469409"
-)
 
-query = "SELECT CURRENT_DATE() as today"
-df = client.query(query).to_dataframe()
-print(df)
+def _load_credentials():
+    from dotenv import load_dotenv
+    from google.oauth2 import service_account
+
+    load_dotenv()
+    key_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    return service_account.Credentials.from_service_account_file(key_path)
+
+
+def _get_credentials():
+    # Anahtar dosyası bir kez okunur; iki istemci aynı kimliği paylaşır.
+    # Çağıran _lock'u tutar.
+    global _credentials
+    if _credentials is None:
+        _credentials = _load_credentials()
+    return _credentials
+
+
+def get_client():
+    # İstemci ilk kullanımda oluşturulur ve süreç boyunca paylaşılır;
+    # bigquery.Client thread'ler arasında paylaşılabilir.
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from google.cloud import bigquery
+
+                _client = bigquery.Client(
+                    credentials=_get_credentials(),
+                    project=PROJECT
+                )
+    return _client
+
+
+def get_bqstorage_client():
+    global _bqstorage_client
+    if _bqstorage_client is None:
+        with _lock:
+            if _bqstorage_client is None:
+                from google.cloud import bigquery_storage
+
+                _bqstorage_client = bigquery_storage.BigQueryReadClient(
+                    credentials=_get_credentials()
+                )
+    return _bqstorage_client
+
+
+if __name__ == "__main__":
+    query = "SELECT CURRENT_DATE() as today"
+    df = get_client().query(query).to_dataframe()
+    print(df)
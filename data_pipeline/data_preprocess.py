@@ -2,41 +2,41 @@ import os
 import numpy as np
 import pandas as pd
 from .fetch_data import get_daily_engagements
+from .storage import write_frame, PROCESSED
+from .granularity import freq_config, dataset_name, DEFAULT_FREQ
+from .outliers import flag_outliers
+from .dtypes import apply_dtype_policy
 
 
-def _flag_outliers_iqr(s, k=1.5):
-    q1, q3 = s.quantile(0.25), s.quantile(0.75)
-    iqr = q3 - q1
-    lower, upper = q1 - k * iqr, q3 + k * iqr
-    return (s < lower) | (s > upper)
+VALUE_COLS = ["oturum_sayisi", "toplam_izleme_suresi_dk"]
+FILL_METHODS = ("zero", "ffill", "bfill", "median", "mode")
 
 
-def _flag_outliers_z(s, thresh=3.0):
-    s = pd.to_numeric(s, errors="coerce")
-    mean = s.mean()
-    std = s.std(ddof=0)
-
-    if std == 0 or np.isnan(std):
-        return pd.Series(False, index=s.index)
-
-    z = (s - mean) / std
-    return z.abs() > thresh
+def _filter_dates(df, start_date, end_date, cfg):
+    if start_date:
+        df = df[df["event_date"] >= pd.to_datetime(start_date)]
+    if end_date:
+        end = pd.to_datetime(end_date)
+        if cfg["periods_per_day"] > 1 and end == end.normalize():
+            # Saatlik modda yalnızca tarih verilen bitiş günü bütünüyle dahil edilir.
+            df = df[df["event_date"] < end + pd.Timedelta(days=1)]
+        else:
+            df = df[df["event_date"] <= end]
+    return df
 
 
-def preprocess_daily(df, start_date=None, end_date=None, fill_method="zero", save_csv_path=None):
+def preprocess_daily(df, start_date=None, end_date=None, fill_method="zero", save_csv_path=None, save_name=None, freq="D",
+                     outlier_window=None):
+    cfg = freq_config(freq)
     df = df.copy()
     df["event_date"] = pd.to_datetime(df["event_date"])
     df["oturum_sayisi"] = pd.to_numeric(df["oturum_sayisi"], errors="coerce")
     df["toplam_izleme_suresi_dk"] = pd.to_numeric(df["toplam_izleme_suresi_dk"], errors="coerce")
 
     df = df.sort_values("event_date")
+    df = _filter_dates(df, start_date, end_date, cfg)
 
-    if start_date:
-        df = df[df["event_date"] >= pd.to_datetime(start_date)]
-    if end_date:
-        df = df[df["event_date"] <= pd.to_datetime(end_date)]
-
-    full_idx = pd.date_range(df["event_date"].min(), df["event_date"].max(), freq="D")
+    full_idx = pd.date_range(df["event_date"].min(), df["event_date"].max(), freq=cfg["pandas_freq"])
     df = df.set_index("event_date").reindex(full_idx)
     df.index.name = "event_date"
 
@@ -78,12 +78,15 @@ def preprocess_daily(df, start_date=None, end_date=None, fill_method="zero", sav
     df["gun_adi"] = df.index.day_name(locale="en_US")
     df["ay_baslangic"] = (df.index.is_month_start).astype(int)
     df["ay_sonu"] = (df.index.is_month_end).astype(int)
+    if cfg["periods_per_day"] > 1:
+        df["saat"] = df.index.hour
 
-    df["outlier_oturum_iqr"] = _flag_outliers_iqr(df["oturum_sayisi"]).astype(int)
-    df["outlier_sure_iqr"] = _flag_outliers_iqr(df["toplam_izleme_suresi_dk"]).astype(int)
-
-    df["outlier_oturum_z"] = _flag_outliers_z(df["oturum_sayisi"]).astype(int)
-    df["outlier_sure_z"] = _flag_outliers_z(df["toplam_izleme_suresi_dk"]).astype(int)
+    # Bayraklar her günün yalnızca önceki outlier_window periyoduna göre
+    # hesaplanır (kayan IQR ve medyan/MAD); yeni veri eski bayrakları değiştirmez.
+    flags = flag_outliers(df, window=outlier_window or cfg["outlier_window"])
+    for col in ["outlier_oturum_iqr", "outlier_sure_iqr", "outlier_oturum_z", "outlier_sure_z"]:
+        df[col] = flags[col]
+    df = apply_dtype_policy(df)
 
     max_sure_day = df["toplam_izleme_suresi_dk"].idxmax()
     min_sure_day = df["toplam_izleme_suresi_dk"].idxmin()
@@ -105,11 +108,158 @@ def preprocess_daily(df, start_date=None, end_date=None, fill_method="zero", sav
         os.makedirs(os.path.dirname(save_csv_path), exist_ok=True)
         df.to_csv(save_csv_path, index=True, encoding="utf-8-sig")
 
+    if save_name:
+        write_frame(df.reset_index(), save_name)
+
     return df
 
 
+def _panel_grid(df, group_col, step, span=None):
+    # Her seri kendi ilk-son tarihi arasında tam periyot ızgarasına açılır;
+    # ham satırlar ızgaradaki konumlarına tek bir dizi atamasıyla yazılır.
+    # span (ilk_tarih/son_tarih, seri indeksli) verilirse ızgara sınırları
+    # ve seri listesi oradan alınır.
+    dates = df["event_date"].to_numpy().astype("datetime64[ns]")
+    if span is None:
+        codes, keys = pd.factorize(df[group_col], sort=True)
+        first = pd.Series(dates).groupby(codes).min().to_numpy()
+        last = pd.Series(dates).groupby(codes).max().to_numpy()
+    else:
+        keys = span.index
+        codes = keys.get_indexer(df[group_col])
+        first = span["ilk_tarih"].to_numpy().astype("datetime64[ns]")
+        last = span["son_tarih"].to_numpy().astype("datetime64[ns]")
+    sizes = ((last - first) // step).astype(np.int64) + 1
+    offsets = np.r_[0, np.cumsum(sizes)[:-1]]
+
+    grid_codes = np.repeat(np.arange(len(keys)), sizes)
+    grid_pos = np.arange(sizes.sum()) - np.repeat(offsets, sizes)
+    grid_dates = np.repeat(first, sizes) + grid_pos * step
+
+    target = offsets[codes] + ((dates - first[codes]) // step).astype(np.int64)
+    if len(np.unique(target)) != len(target):
+        raise ValueError(f"Aynı ({group_col}, event_date) için birden fazla satır var")
+    return codes, keys, grid_codes, grid_dates, target
+
+
+def _fill_panel(panel, group_col, fill_method):
+    vals = panel[VALUE_COLS]
+    groups = panel[group_col]
+    if fill_method == "zero":
+        return vals.fillna(0)
+    if fill_method == "ffill":
+        return vals.groupby(groups, observed=True).ffill().fillna(0)
+    if fill_method == "bfill":
+        return vals.groupby(groups, observed=True).bfill().fillna(0)
+    if fill_method == "median":
+        return vals.fillna(vals.groupby(groups, observed=True).transform("median"))
+    if fill_method == "mode":
+        out = vals.copy()
+        for col in VALUE_COLS:
+            # Series.mode gibi: en sık değer, eşitlikte en küçüğü; değer yoksa 0.
+            counts = panel.groupby([group_col, col], observed=True).size().rename("n").reset_index()
+            counts = counts.sort_values([group_col, "n", col], ascending=[True, False, True], kind="stable")
+            mode = counts.drop_duplicates(group_col).set_index(group_col)[col]
+            out[col] = vals[col].fillna(groups.map(mode).astype(np.float64)).fillna(0)
+        return out
+    raise ValueError("fill_method 'zero', 'ffill' , 'bfill' ,'median' veya 'mode' olmalı")
+
+
+def _panel_summary(panel, group_col, filled):
+    g = panel.groupby(group_col, observed=True, sort=True)
+    summary = pd.DataFrame({
+        "satir": g.size(),
+        "doldurulan": filled.groupby(panel[group_col], observed=True).sum(),
+        "ilk_tarih": g["event_date"].min(),
+        "son_tarih": g["event_date"].max(),
+    })
+    for col in ["oturum_sayisi", "toplam_izleme_suresi_dk", "ortalama_sure"]:
+        summary[f"eksik_{col}"] = panel[col].isna().groupby(panel[group_col], observed=True).sum()
+    for col, short in [("toplam_izleme_suresi_dk", "sure"), ("oturum_sayisi", "oturum")]:
+        imax = g[col].idxmax()
+        imin = g[col].idxmin()
+        summary[f"max_{short}_tarih"] = panel.loc[imax, "event_date"].to_numpy()
+        summary[f"max_{short}"] = panel.loc[imax, col].to_numpy()
+        summary[f"min_{short}_tarih"] = panel.loc[imin, "event_date"].to_numpy()
+        summary[f"min_{short}"] = panel.loc[imin, col].to_numpy()
+    for col in ["outlier_oturum_iqr", "outlier_sure_iqr", "outlier_oturum_z", "outlier_sure_z"]:
+        summary[col] = g[col].sum()
+    return summary.reset_index()
+
+
+def preprocess_panel(df, group_col="segment", start_date=None, end_date=None, fill_method="zero",
+                     save_name=None, freq="D", outlier_window=None, span=None):
+    # preprocess_daily'nin (segment, event_date) uzun tablo karşılığı: boşluk
+    # doldurma, takvim kolonları ve aykırı değer bayrakları tüm seriler için
+    # gruplu vektörel adımlarla yapılır. Ekrana yazmak yerine (panel, özet)
+    # döndürür; özet segment başına bir satırdır. span, parçalı çalışmada
+    # serilerin bu parçadaki ızgara sınırlarını verir.
+    if fill_method not in FILL_METHODS:
+        raise ValueError("fill_method 'zero', 'ffill' , 'bfill' ,'median' veya 'mode' olmalı")
+    cfg = freq_config(freq)
+    step = pd.Timedelta(1, unit=cfg["pandas_freq"]).to_timedelta64().astype("timedelta64[ns]")
+
+    df = df.copy()
+    df["event_date"] = pd.to_datetime(df["event_date"])
+    for col in VALUE_COLS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df = _filter_dates(df, start_date, end_date, cfg)
+    if span is not None:
+        first = df[group_col].map(span["ilk_tarih"]).astype("datetime64[ns]")
+        last = df[group_col].map(span["son_tarih"]).astype("datetime64[ns]")
+        df = df[(df["event_date"] >= first) & (df["event_date"] <= last)]
+
+    codes, keys, grid_codes, grid_dates, target = _panel_grid(df, group_col, step, span)
+    panel = pd.DataFrame({
+        group_col: keys.take(grid_codes),
+        "event_date": grid_dates,
+    })
+    if isinstance(df[group_col].dtype, pd.CategoricalDtype):
+        panel[group_col] = pd.Categorical(panel[group_col], categories=df[group_col].cat.categories)
+
+    # Izgaradaki her satırın ham tablodaki karşılığı (boşluklar için -1).
+    source = np.full(len(panel), -1, dtype=np.int64)
+    source[target] = np.arange(len(df))
+    observed = source >= 0
+    for col in df.columns:
+        if col in (group_col, "event_date"):
+            continue
+        panel[col] = pd.api.extensions.take(df[col].array, source, allow_fill=True)
+
+    filled = pd.Series(~observed | panel[VALUE_COLS].isna().any(axis=1).to_numpy(), index=panel.index)
+    panel[VALUE_COLS] = _fill_panel(panel, group_col, fill_method)
+
+    panel["ortalama_sure"] = np.where(
+        panel["oturum_sayisi"] > 0,
+        panel["toplam_izleme_suresi_dk"] / panel["oturum_sayisi"],
+        0.0,
+    )
+
+    dates = pd.DatetimeIndex(panel["event_date"])
+    panel["yil"] = dates.year
+    panel["ay"] = dates.month
+    panel["hafta_gunu"] = dates.weekday
+    panel["gun_adi"] = dates.day_name(locale="en_US")
+    panel["ay_baslangic"] = dates.is_month_start.astype(int)
+    panel["ay_sonu"] = dates.is_month_end.astype(int)
+    if cfg["periods_per_day"] > 1:
+        panel["saat"] = dates.hour
+
+    flags = flag_outliers(panel, group_col=group_col, window=outlier_window or cfg["outlier_window"])
+    for col in ["outlier_oturum_iqr", "outlier_sure_iqr", "outlier_oturum_z", "outlier_sure_z"]:
+        panel[col] = flags[col]
+    panel = apply_dtype_policy(panel)
+
+    summary = _panel_summary(panel, group_col, filled)
+
+    if save_name:
+        write_frame(panel, save_name)
+
+    return panel, summary
+
+
 if __name__ == "__main__":
-    raw_df = get_daily_engagements()
+    raw_df = get_daily_engagements(freq=DEFAULT_FREQ)
 
     print("\nPREPROCESS ÖNCESİ VERİ")
     print(raw_df.head())
@@ -122,7 +272,8 @@ if __name__ == "__main__":
         start_date="2024-08-01",
         end_date="2025-08-17",
         fill_method="zero",
-        save_csv_path="data/daily_engagements_process.csv",
+        save_name=dataset_name(PROCESSED, DEFAULT_FREQ),
+        freq=DEFAULT_FREQ,
     )
 
     print("\nİSTATİSTİKLER ")
@@ -0,0 +1,99 @@
+import os
+import numpy as np
+import pandas as pd
+
+
+# Aşama çıktılarına uygulanan kolon tipi politikası. ENGAGEMENT_COMPACT_DTYPES=0
+# ile kapatılır; ENGAGEMENT_FLOAT32=1 özellik kolonlarını float32'ye indirir.
+COMPACT = os.getenv("ENGAGEMENT_COMPACT_DTYPES", "1").lower() not in ("0", "false", "no")
+FLOAT32 = os.getenv("ENGAGEMENT_FLOAT32", "0").lower() in ("1", "true", "yes")
+
+FLAG_COLS = ("ay_baslangic", "ay_sonu")
+FLAG_PREFIXES = ("outlier_", "after_outlier_")
+CALENDAR_DTYPES = {"yil": "int16", "ay": "int8", "hafta_gunu": "int8", "saat": "int8"}
+CATEGORY_COLS = ("gun_adi",)
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+# Hedef ve ham ölçüler float32 modunda da tam hassasiyette kalır.
+FULL_PRECISION = ("oturum_sayisi", "toplam_izleme_suresi_dk", "ortalama_sure")
+METRIC_TOLERANCE = 0.01
+
+
+def is_flag(col):
+    return col in FLAG_COLS or col.startswith(FLAG_PREFIXES)
+
+
+def _enabled(enabled=None):
+    return COMPACT if enabled is None else enabled
+
+
+def feature_float_dtype(float32=None, enabled=None):
+    if not _enabled(enabled):
+        return np.float64
+    return np.float32 if (FLOAT32 if float32 is None else float32) else np.float64
+
+
+def flag_dtype(enabled=None):
+    return np.int8 if _enabled(enabled) else np.int64
+
+
+def _no_missing_ints(s):
+    return pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s) and not s.isna().any()
+
+
+def apply_dtype_policy(df, float32=None, enabled=None):
+    # 0/1 bayraklar int8, takvim alanları küçük tamsayı, gun_adi kategori;
+    # float32=True ise hedefler dışındaki float64 kolonlar float32 olur.
+    # Eksik değer içeren bayrak/takvim kolonlarına dokunulmaz.
+    if not _enabled(enabled):
+        return df
+    float_dtype = feature_float_dtype(float32, enabled)
+    changes = {}
+    for col in df.columns:
+        s = df[col]
+        if is_flag(col):
+            if _no_missing_ints(s) and s.dtype != np.int8:
+                changes[col] = np.int8
+        elif col in CALENDAR_DTYPES:
+            if _no_missing_ints(s) and s.dtype != CALENDAR_DTYPES[col]:
+                changes[col] = CALENDAR_DTYPES[col]
+        elif col in CATEGORY_COLS:
+            if not isinstance(s.dtype, pd.CategoricalDtype):
+                values = s.dropna().unique()
+                categories = DAY_NAMES if set(values) <= set(DAY_NAMES) else sorted(values)
+                changes[col] = pd.CategoricalDtype(categories)
+        elif s.dtype == np.float64 and float_dtype == np.float32 and col not in FULL_PRECISION:
+            changes[col] = np.float32
+    return df.astype(changes) if changes else df
+
+
+def frame_mb(df):
+    return df.memory_usage(deep=True, index=True).sum() / 2**20
+
+
+def memory_report(stages, float32=None):
+    # stages: {aşama adı: DataFrame}; her aşamanın mevcut ve politika
+    # uygulanmış bellek kullanımı (MB).
+    rows = []
+    for name, df in stages.items():
+        before = frame_mb(df)
+        after = frame_mb(apply_dtype_policy(df, float32=float32, enabled=True))
+        rows.append({
+            "asama": name,
+            "satir": len(df),
+            "kolon": df.shape[1],
+            "mevcut_mb": round(before, 3),
+            "kompakt_mb": round(after, 3),
+            "oran": round(after / before, 3) if before else np.nan,
+        })
+    return pd.DataFrame(rows)
+
+
+def metric_drift(baseline, compact, tolerance=METRIC_TOLERANCE):
+    # İki metrik sözlüğünü karşılaştırır; göreli fark tolerance'ı aşan
+    # metrikler ok=False olur.
+    rows = []
+    for name, base in baseline.items():
+        value = compact[name]
+        rel = abs(value - base) / max(abs(base), 1e-12)
+        rows.append({"metrik": name, "referans": base, "kompakt": value, "goreli_fark": rel, "ok": rel <= tolerance})
+    return pd.DataFrame(rows)
@@ -0,0 +1,117 @@
+import os
+import json
+import pandas as pd
+
+
+DATE_COL = "event_date"
+WATERMARK_FILE = "_watermark.json"
+
+
+def _partition_key(dates):
+    return pd.to_datetime(dates).dt.strftime("%Y-%m")
+
+
+def _partition_path(cache_dir, month):
+    return os.path.join(cache_dir, f"month={month}", "part.parquet")
+
+
+def _atomic_write_parquet(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _list_partitions(cache_dir):
+    if not os.path.isdir(cache_dir):
+        return []
+    months = []
+    for name in os.listdir(cache_dir):
+        if name.startswith("month=") and os.path.exists(os.path.join(cache_dir, name, "part.parquet")):
+            months.append(name.split("=", 1)[1])
+    return sorted(months)
+
+
+def read_watermark(cache_dir):
+    path = os.path.join(cache_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        meta = json.load(f)
+    wm = meta.get("watermark")
+    return pd.Timestamp(wm) if wm else None
+
+
+def write_watermark(cache_dir, watermark, **extra):
+    os.makedirs(cache_dir, exist_ok=True)
+    meta = {
+        "watermark": pd.Timestamp(watermark).isoformat(),
+        "updated_at": pd.Timestamp.now(tz="UTC").isoformat(),
+    }
+    meta.update(extra)
+    path = os.path.join(cache_dir, WATERMARK_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_cache(cache_dir, start_date=None, end_date=None):
+    months = _list_partitions(cache_dir)
+    if start_date is not None:
+        start_month = pd.Timestamp(start_date).strftime("%Y-%m")
+        months = [m for m in months if m >= start_month]
+    if end_date is not None:
+        end_month = pd.Timestamp(end_date).strftime("%Y-%m")
+        months = [m for m in months if m <= end_month]
+    if not months:
+        return None
+
+    df = pd.concat(
+        [pd.read_parquet(_partition_path(cache_dir, m)) for m in months],
+        ignore_index=True,
+    )
+    df[DATE_COL] = pd.to_datetime(df[DATE_COL])
+    if start_date is not None:
+        df = df[df[DATE_COL] >= pd.Timestamp(start_date)]
+    if end_date is not None:
+        df = df[df[DATE_COL] <= pd.Timestamp(end_date)]
+    return df.sort_values(DATE_COL).reset_index(drop=True)
+
+
+def merge_into_cache(cache_dir, new_df, since):
+    # `since` ve sonrasındaki tüm günler yeni sorgunun sonucuyla değiştirilir;
+    # yalnızca bu aralığa dokunan ay bölümleri yeniden yazılır.
+    since = pd.Timestamp(since)
+    new_df = new_df.copy()
+    new_df[DATE_COL] = pd.to_datetime(new_df[DATE_COL])
+    new_df = new_df[new_df[DATE_COL] >= since]
+
+    since_month = since.strftime("%Y-%m")
+    touched = set(m for m in _list_partitions(cache_dir) if m >= since_month)
+    new_months = _partition_key(new_df[DATE_COL])
+    touched.update(new_months.unique().tolist())
+
+    for month in sorted(touched):
+        path = _partition_path(cache_dir, month)
+        parts = []
+        if os.path.exists(path):
+            old = pd.read_parquet(path)
+            old[DATE_COL] = pd.to_datetime(old[DATE_COL])
+            parts.append(old[old[DATE_COL] < since])
+        parts.append(new_df[new_months == month])
+        merged = pd.concat(parts, ignore_index=True).sort_values(DATE_COL)
+
+        if merged.empty:
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+        _atomic_write_parquet(merged.reset_index(drop=True), path)
+
+    months = _list_partitions(cache_dir)
+    if not months:
+        return None
+    last = pd.read_parquet(_partition_path(cache_dir, months[-1]))
+    watermark = pd.to_datetime(last[DATE_COL]).max()
+    write_watermark(cache_dir, watermark)
+    return watermark
@@ -1,5 +1,12 @@
+import os
 import pandas as pd
-from .bigquery_connection import client
+from pandas.api.types import union_categoricals
+import pyarrow as pa
+import pyarrow.compute as pc
+from .backends import get_backend
+from .engagement_cache import read_cache, read_watermark, merge_into_cache
+from .storage import write_frame, RAW
+from .granularity import normalize_freq, dataset_name, DEFAULT_FREQ
 
 
 PROJECT_ID = "tabii-469409"
@@ -7,40 +14,202 @@ DATASET_ID = ""
 TABLE_FQN = f"{PROJECT_ID}.{DATASET_ID}.tabii_engagement_data"
 LOCATION = "US"
 
-SQL = f"""
+START_DATE = "2024-08-01"
+CACHE_DIR = os.path.join("data", "cache", "daily_engagements")
+REOPEN_DAYS = 3
+
+# Segment boyutu -> tablodaki kolon. SQL'e yalnızca bu listedeki isimler girer.
+DIMENSIONS = {
+    "content_category": "content_category",
+    "device_type": "device_type",
+    "region": "region",
+}
+SEGMENT_COL = "segment"
+SEGMENT_SEP = "|"
+UNKNOWN_SEGMENT = "unknown"
+
+SQL_TEMPLATE = """
 WITH base AS (
   SELECT
-    DATE(event_date) AS event_date,
+    {date_expr} AS event_date,{dim_select}
     view_id,
-    TIMESTAMP_DIFF(TIMESTAMP(view_end), TIMESTAMP(view_start), SECOND) / 60.0 AS izleme_suresi_dk
-  FROM `{TABLE_FQN}`
-  WHERE event_date >= '2024-08-01'
+    {duration_expr} / 60.0 AS izleme_suresi_dk
+  FROM {table}
+  WHERE event_date >= '{start_date}'
 )
 SELECT
-  event_date,
+  {dim_cols}event_date,
   COUNT(DISTINCT view_id) AS oturum_sayisi,
   SUM(izleme_suresi_dk) AS toplam_izleme_suresi_dk
 FROM base
-GROUP BY event_date
-ORDER BY event_date
+GROUP BY {dim_cols}event_date
+ORDER BY {dim_cols}event_date
 """
 
 
-def get_daily_engagements():
-    job = client.query(SQL, location=LOCATION)
-    df = job.result().to_dataframe(create_bqstorage_client=True)
+# Aynı agregasyon SQL'inin backend lehçesine göre değişen parçaları.
+DIALECTS = {
+    "bigquery": {
+        "date_expr": {
+            "D": "DATE(event_date)",
+            "h": "TIMESTAMP_TRUNC(TIMESTAMP(event_date), HOUR)",
+        },
+        "duration_expr": "TIMESTAMP_DIFF(TIMESTAMP(view_end), TIMESTAMP(view_start), SECOND)",
+        "string_type": "STRING",
+    },
+    "duckdb": {
+        "date_expr": {
+            "D": "CAST(event_date AS DATE)",
+            "h": "date_trunc('hour', CAST(event_date AS TIMESTAMP))",
+        },
+        "duration_expr": (
+            "CAST(trunc(epoch(CAST(view_end AS TIMESTAMP) - CAST(view_start AS TIMESTAMP))) AS BIGINT)"
+        ),
+        "string_type": "VARCHAR",
+    },
+}
+
+
+def _segment_columns(dimensions):
+    return [SEGMENT_COL] + list(dimensions) if dimensions else []
+
+
+def _check_dimensions(dimensions):
+    dimensions = list(dimensions or [])
+    unknown = [d for d in dimensions if d not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Bilinmeyen segment boyutu: {', '.join(unknown)} ({', '.join(DIMENSIONS)} olmalı)")
+    return dimensions
+
+
+def build_sql(start_date=START_DATE, backend=None, dimensions=None, freq="D"):
+    backend = get_backend(backend)
+    freq = normalize_freq(freq)
+    dimensions = _check_dimensions(dimensions)
+    dialect = DIALECTS[backend.dialect]
+    start_date = pd.Timestamp(start_date).strftime("%Y-%m-%d")
 
+    dim_select = "".join(
+        f"\n    COALESCE(CAST({DIMENSIONS[d]} AS {dialect['string_type']}), '{UNKNOWN_SEGMENT}') AS {d},"
+        for d in dimensions
+    )
+    dim_cols = "".join(f"{d}, " for d in dimensions)
+
+    return SQL_TEMPLATE.format(
+        table=backend.table_ref(TABLE_FQN),
+        start_date=start_date,
+        dim_select=dim_select,
+        dim_cols=dim_cols,
+        date_expr=dialect["date_expr"][freq],
+        duration_expr=dialect["duration_expr"],
+    )
+
+
+SQL = build_sql(backend="bigquery")
+
+
+def _batch_to_frame(batch, dimensions):
+    if dimensions:
+        cols = [pc.cast(batch.column(d), pa.string()) for d in dimensions]
+        segment = cols[0] if len(cols) == 1 else pc.binary_join_element_wise(*cols, SEGMENT_SEP)
+        batch = pa.RecordBatch.from_arrays(
+            [segment] + batch.columns,
+            names=[SEGMENT_COL] + batch.schema.names,
+        )
+
+    df = batch.to_pandas()
     df["event_date"] = pd.to_datetime(df["event_date"])
     df["oturum_sayisi"] = pd.to_numeric(df["oturum_sayisi"])
     df["toplam_izleme_suresi_dk"] = pd.to_numeric(df["toplam_izleme_suresi_dk"])
+    for col in _segment_columns(dimensions):
+        df[col] = df[col].astype("category")
+    return df
+
+
+def iter_daily_engagements(sql, backend=None, dimensions=None):
+    # Sonuç Arrow record batch'leri halinde akar; tüm tablo tek seferde
+    # DataFrame'e çevrilmez. Bellek yalnızca bu üreteç doğrudan tüketilirse
+    # batch boyutuyla sınırlıdır.
+    dimensions = _check_dimensions(dimensions)
+    for batch in get_backend(backend).iter_batches(sql):
+        if batch.num_rows:
+            yield _batch_to_frame(batch, dimensions)
+
+
+def _empty_frame(dimensions=None):
+    return pd.DataFrame(columns=_segment_columns(dimensions) + ["event_date", "oturum_sayisi", "toplam_izleme_suresi_dk"])
+
+
+def _run_query(sql, backend=None, dimensions=None):
+    # Tüm batch'ler tek tabloda birleşir: tepe bellek tüm sonuç kadardır.
+    # Artımlı yolda sorgu yalnızca watermark sonrasını kapsadığı için küçüktür.
+    frames = list(iter_daily_engagements(sql, backend=backend, dimensions=dimensions))
+    seg_cols = _segment_columns(dimensions)
+    if not frames:
+        return _empty_frame(dimensions)
+
+    categories = {
+        col: union_categoricals([f[col] for f in frames]) for col in seg_cols
+    }
+    df = pd.concat([f.drop(columns=seg_cols) for f in frames], ignore_index=True)
+    for i, col in enumerate(seg_cols):
+        df.insert(i, col, categories[col])
+    return df
+
+
+def cache_dir_for(dimensions=None, cache_dir=CACHE_DIR, freq="D"):
+    dimensions = _check_dimensions(dimensions)
+    head, tail = os.path.split(cache_dir)
+    name = dataset_name(tail, freq)
+    if name == tail and normalize_freq(freq) != "D":
+        name = f"{tail}__{normalize_freq(freq)}"
+    cache_dir = os.path.join(head, name)
+    if not dimensions:
+        return cache_dir
+    return cache_dir + "__" + "_".join(dimensions)
+
+
+def refresh_cache(cache_dir=CACHE_DIR, reopen_days=REOPEN_DAYS, start_date=START_DATE, backend=None, dimensions=None, freq="D"):
+    # Sadece watermark'tan (geç gelen olaylar için reopen_days geriden) itibaren
+    # sorgulanır; tarama maliyeti tablo geçmişine değil yeni gün sayısına bağlıdır.
+    watermark = read_watermark(cache_dir)
+    if watermark is None:
+        since = pd.Timestamp(start_date)
+    else:
+        since = max(watermark - pd.Timedelta(days=reopen_days), pd.Timestamp(start_date))
+
+    sql = build_sql(since, backend=backend, dimensions=dimensions, freq=freq)
+    new_df = _run_query(sql, backend=backend, dimensions=dimensions)
+    for col in _segment_columns(dimensions):
+        new_df[col] = new_df[col].astype(str)
+    merge_into_cache(cache_dir, new_df, since)
+    return since, len(new_df)
+
+
+def get_daily_engagements(incremental=False, cache_dir=CACHE_DIR, reopen_days=REOPEN_DAYS, backend=None, dimensions=None, freq="D"):
+    dimensions = _check_dimensions(dimensions)
+    if not incremental:
+        sql = build_sql(backend=backend, dimensions=dimensions, freq=freq)
+        return _run_query(sql, backend=backend, dimensions=dimensions)
 
+    cache_dir = cache_dir_for(dimensions, cache_dir, freq)
+    refresh_cache(cache_dir=cache_dir, reopen_days=reopen_days, backend=backend, dimensions=dimensions, freq=freq)
+    df = read_cache(cache_dir, start_date=START_DATE)
+    if df is None:
+        # Önbellekte hiç bölüm yok (ör. ilk çalıştırmada sorgu boş döndü).
+        return _empty_frame(dimensions)
+    if dimensions:
+        df = df.sort_values([SEGMENT_COL, "event_date"]).reset_index(drop=True)
+        for col in _segment_columns(dimensions):
+            df[col] = df[col].astype("category")
     return df
 
 
 if __name__ == "__main__":
-    df = get_daily_engagements()
+    df = get_daily_engagements(incremental=True, freq=DEFAULT_FREQ)
     print("Satır:", len(df))
+    print("Watermark:", read_watermark(cache_dir_for(freq=DEFAULT_FREQ)))
     print(df.head())
 
-    output_path = "data/daily_engagements.csv"
-    df.to_csv(output_path, index=False, encoding="utf-8-sig")
+    output_path = write_frame(df, dataset_name(RAW, DEFAULT_FREQ))
+    print("Kaydedildi:", output_path)
@@ -0,0 +1,53 @@
+import os
+
+
+# Zaman çözünürlüğüne göre değişen varsayılanlar. Gecikme, pencere ve fark
+# değerleri gün değil periyot cinsindendir.
+FREQS = {
+    "D": {
+        "pandas_freq": "D",
+        "periods_per_day": 1,
+        "lags": (1, 2, 7, 14, 28),
+        "windows": (7, 14, 28),
+        "diffs": (1, 7),
+        "outlier_window": 28,
+        "dataset_prefix": "daily_",
+    },
+    "h": {
+        "pandas_freq": "h",
+        "periods_per_day": 24,
+        "lags": (1, 2, 24, 168, 336),
+        "windows": (24, 168, 336),
+        "diffs": (1, 24, 168),
+        "outlier_window": 168,
+        "dataset_prefix": "hourly_",
+    },
+}
+
+ALIASES = {
+    "d": "D", "day": "D", "daily": "D",
+    "h": "h", "hour": "h", "hourly": "h",
+}
+
+
+def normalize_freq(freq="D"):
+    key = ALIASES.get(str(freq).lower())
+    if key is None:
+        raise ValueError(f"freq 'D' (günlük) veya 'h' (saatlik) olmalı, verilen: {freq!r}")
+    return key
+
+
+DEFAULT_FREQ = normalize_freq(os.getenv("ENGAGEMENT_FREQ", "D"))
+
+
+def freq_config(freq="D"):
+    return FREQS[normalize_freq(freq)]
+
+
+def dataset_name(name, freq="D"):
+    # "daily_engagements_final" -> "hourly_engagements_final"
+    cfg = freq_config(freq)
+    base = FREQS["D"]["dataset_prefix"]
+    if name.startswith(base):
+        return cfg["dataset_prefix"] + name[len(base):]
+    return name
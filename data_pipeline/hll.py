@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+
+# p=12 -> 4096 register (4 KB / sketch), standart hata ~%1.6
+PRECISION = 12
+MIN_PRECISION = 4
+MAX_PRECISION = 18
+SKETCH_COL = "oturum_hll"
+
+
+def _check_precision(p):
+    if not MIN_PRECISION <= p <= MAX_PRECISION:
+        raise ValueError(f"HLL hassasiyeti {MIN_PRECISION}-{MAX_PRECISION} aralığında olmalı")
+    return int(p)
+
+
+def standard_error(p=PRECISION):
+    return 1.04 / np.sqrt(2 ** _check_precision(p))
+
+
+def hash_values(values):
+    return pd.util.hash_array(pd.Series(values).astype(str).to_numpy(dtype=object))
+
+
+def _bit_length(w):
+    w = w.copy()
+    bl = np.zeros(w.shape, dtype=np.int64)
+    for s in (32, 16, 8, 4, 2, 1):
+        m = w >= np.uint64(1 << s)
+        w[m] >>= np.uint64(s)
+        bl += m * s
+    bl += (w > 0)
+    return bl
+
+
+def register_updates(hashes, p=PRECISION):
+    # 64 bitlik hash'in ilk p biti register indeksi, kalan bitlerdeki
+    # baştaki sıfır sayısı + 1 ise o register'a yazılacak değerdir.
+    p = _check_precision(p)
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    idx = (hashes >> np.uint64(64 - p)).astype(np.int64)
+    w = hashes & np.uint64((1 << (64 - p)) - 1)
+    rho = (64 - p) - _bit_length(w) + 1
+    return idx, rho.astype(np.uint8)
+
+
+def empty_registers(n, p=PRECISION):
+    return np.zeros((n, 2 ** _check_precision(p)), dtype=np.uint8)
+
+
+def update_registers(registers, rows, hashes, p=PRECISION):
+    idx, rho = register_updates(hashes, p)
+    np.maximum.at(registers, (np.asarray(rows, dtype=np.int64), idx), rho)
+    return registers
+
+
+def estimate(registers):
+    registers = np.atleast_2d(registers)
+    m = registers.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)), axis=1)
+
+    # Küçük kardinalitelerde doğrusal sayım (linear counting).
+    zeros = np.sum(registers == 0, axis=1)
+    with np.errstate(divide="ignore"):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+def to_bytes(registers):
+    return [row.tobytes() for row in np.atleast_2d(registers)]
+
+
+def from_bytes(values):
+    values = list(values)
+    if not values:
+        return np.zeros((0, 0), dtype=np.uint8)
+    m = len(values[0])
+    return np.frombuffer(b"".join(values), dtype=np.uint8).reshape(len(values), m)
+
+
+def merge_frame(df, by, sketch_col=SKETCH_COL):
+    # Aynı gruba düşen sketch'ler register bazında max ile birleştirilir.
+    registers = from_bytes(df[sketch_col])
+    codes, keys = pd.factorize(pd.MultiIndex.from_frame(df[by]) if len(by) > 1 else df[by[0]], sort=True)
+    merged = np.zeros((len(keys), registers.shape[1]), dtype=np.uint8)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+    merged[codes[order][bounds]] = np.maximum.reduceat(registers[order], bounds, axis=0)
+
+    if len(by) > 1:
+        out = keys.to_frame(index=False)
+        out.columns = by
+    else:
+        out = pd.DataFrame({by[0]: keys})
+    out[sketch_col] = to_bytes(merged)
+    return out, merged
+
+
+def rollup_sessions(df, freq="W", by_segment=False, segments=None, date_col="event_date",
+                    segment_col="segment", sketch_col=SKETCH_COL):
+    # Günlük (gün, segment) sketch'lerinden haftalık/aylık ya da segment
+    # birleşimi için tekil oturum tahmini; ham veriye dönmeden hesaplanır.
+    df = df[[c for c in (date_col, segment_col, sketch_col) if c in df.columns]]
+    if segments is not None:
+        df = df[df[segment_col].isin(segments)]
+
+    df = df.assign(period=pd.to_datetime(df[date_col]).dt.to_period(freq).dt.start_time)
+    by = ["period"] + ([segment_col] if by_segment else [])
+    out, merged = merge_frame(df, by, sketch_col)
+    out["oturum_sayisi_tahmini"] = estimate(merged)
+    return out.drop(columns=[sketch_col])
@@ -0,0 +1,211 @@
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .fetch_data import (
+    DIMENSIONS, SEGMENT_COL, SEGMENT_SEP, UNKNOWN_SEGMENT, START_DATE,
+    _check_dimensions, _segment_columns,
+)
+from .granularity import freq_config
+from .backends import EVENTS_PATH
+from .hll import (
+    PRECISION, SKETCH_COL, hash_values, empty_registers, update_registers,
+    estimate, to_bytes, merge_frame,
+)
+
+
+BATCH_SIZE = 250_000
+COMPACT_ROWS = 2_000_000
+EVENT_COLUMNS = ["view_id", "view_start", "view_end", "event_date"]
+
+
+def _expand_paths(paths):
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for p in paths:
+        files.extend(sorted(glob.glob(p)) if glob.has_magic(p) else [p])
+    if not files:
+        raise FileNotFoundError(f"Olay dosyası bulunamadı: {paths}")
+    return files
+
+
+def _bucket(event_date, freq):
+    ts = pd.to_datetime(event_date)
+    if freq_config(freq)["periods_per_day"] > 1:
+        return ts.dt.floor("h")
+    return ts.dt.normalize()
+
+
+def _duration_minutes(view_start, view_end):
+    # BigQuery TIMESTAMP_DIFF(..., SECOND) gibi tam saniyeye (sıfıra doğru) keser.
+    seconds = (pd.to_datetime(view_end) - pd.to_datetime(view_start)).dt.total_seconds()
+    return np.trunc(seconds) / 60.0
+
+
+def _compact(pairs, key_cols):
+    if len(pairs) == 1:
+        return pairs
+    return [pd.concat(pairs, ignore_index=True).drop_duplicates(key_cols + ["view_hash"])]
+
+
+class _SketchAccumulator:
+    # Anahtar başına bir HLL register satırı; satırlar gerektikçe büyütülür.
+    def __init__(self, key_cols, p):
+        self.key_cols = key_cols
+        self.p = p
+        self.rows = {}
+        self.registers = empty_registers(0, p)
+
+    def add(self, views):
+        keys = views[self.key_cols].drop_duplicates()
+        tuples = list(keys.itertuples(index=False, name=None))
+        for t in tuples:
+            if t not in self.rows:
+                self.rows[t] = len(self.rows)
+        if len(self.rows) > len(self.registers):
+            grow = max(len(self.rows), 2 * len(self.registers)) - len(self.registers)
+            self.registers = np.vstack([self.registers, empty_registers(grow, self.p)])
+
+        keys = keys.assign(_row=[self.rows[t] for t in tuples])
+        rows = views[self.key_cols].merge(keys, on=self.key_cols, how="left")["_row"].to_numpy()
+        update_registers(self.registers, rows, views["view_hash"].to_numpy(), self.p)
+
+    def to_frame(self):
+        out = pd.DataFrame(list(self.rows), columns=self.key_cols)
+        out[SKETCH_COL] = to_bytes(self.registers[:len(self.rows)])
+        return out
+
+
+def _aggregate_file(path, dimensions, freq, start_date, batch_size, exact=True, sketches=False, precision=PRECISION):
+    # Dosyayı record batch'ler halinde okur. Süre toplamları anahtar başına
+    # birikir; tekil sayım için (anahtar, view_id hash) çiftleri ve/veya
+    # anahtar başına HLL sketch'i tutulur.
+    key_cols = list(dimensions) + ["event_date"]
+    source_cols = EVENT_COLUMNS + [DIMENSIONS[d] for d in dimensions]
+    start = pd.Timestamp(start_date)
+
+    sums = []
+    pairs = []
+    buffered = 0
+    acc = _SketchAccumulator(key_cols, precision) if sketches else None
+    pf = pq.ParquetFile(path)
+    for batch in pf.iter_batches(batch_size=batch_size, columns=source_cols):
+        raw = batch.to_pandas()
+        raw = raw[pd.to_datetime(raw["event_date"]) >= start]
+        if raw.empty:
+            continue
+
+        part = pd.DataFrame({"event_date": _bucket(raw["event_date"], freq)})
+        for d in dimensions:
+            part[d] = raw[DIMENSIONS[d]].astype("string").fillna(UNKNOWN_SEGMENT).astype(str).values
+        part["izleme_suresi_dk"] = _duration_minutes(raw["view_start"], raw["view_end"]).values
+
+        sums.append(
+            part.groupby(key_cols, sort=False, observed=True)["izleme_suresi_dk"]
+            .sum(min_count=1).reset_index()
+        )
+
+        has_view = raw["view_id"].notna().values
+        views = part.loc[has_view, key_cols].copy()
+        views["view_hash"] = hash_values(raw.loc[has_view, "view_id"].values)
+        views = views.drop_duplicates()
+        if acc is not None:
+            acc.add(views)
+        if not exact:
+            continue
+        pairs.append(views)
+        buffered += len(views)
+        if buffered > COMPACT_ROWS:
+            pairs = _compact(pairs, key_cols)
+            buffered = len(pairs[0])
+
+    if not sums:
+        return None, None, None
+    sums = pd.concat(sums, ignore_index=True).groupby(key_cols, sort=False, observed=True).sum(min_count=1).reset_index()
+    pairs = _compact(pairs, key_cols)[0] if pairs else None
+    return sums, pairs, acc.to_frame() if acc is not None else None
+
+
+def _finalize(sums, pairs, sketch_df, dimensions):
+    key_cols = list(dimensions) + ["event_date"]
+    out = sums
+    if sketch_df is not None:
+        sketch_df, registers = merge_frame(sketch_df, key_cols)
+        sketch_df["_hll_est"] = estimate(registers)
+        out = out.merge(sketch_df, on=key_cols, how="left")
+
+    if pairs is not None:
+        counts = pairs.groupby(key_cols, observed=True).size().rename("oturum_sayisi").reset_index()
+        out = out.merge(counts, on=key_cols, how="left")
+    else:
+        out["oturum_sayisi"] = out["_hll_est"].round()
+    out["oturum_sayisi"] = out["oturum_sayisi"].fillna(0).astype("int64")
+    out = out.rename(columns={"izleme_suresi_dk": "toplam_izleme_suresi_dk"})
+    out = out.sort_values(key_cols).reset_index(drop=True)
+
+    if dimensions:
+        segment = out[dimensions[0]].astype(str)
+        for d in dimensions[1:]:
+            segment = segment + SEGMENT_SEP + out[d].astype(str)
+        out.insert(0, SEGMENT_COL, segment)
+        for col in _segment_columns(dimensions):
+            out[col] = out[col].astype("category")
+
+    columns = _segment_columns(dimensions) + ["event_date", "oturum_sayisi", "toplam_izleme_suresi_dk"]
+    if sketch_df is not None:
+        columns.append(SKETCH_COL)
+    return out[columns]
+
+
+def aggregate_events(paths=EVENTS_PATH, dimensions=None, freq="D", start_date=START_DATE,
+                     batch_size=BATCH_SIZE, workers=1, sketches=False, exact=True, precision=PRECISION):
+    # get_daily_engagements ile aynı kolonları ve sıralamayı döndürür.
+    # sketches=True her (gün, segment) için bir HLL sketch kolonu ekler;
+    # exact=False ile tekil sayım yalnızca sketch'ten tahmin edilir ve bellek
+    # kullanımı oturum sayısından bağımsız kalır.
+    dimensions = _check_dimensions(dimensions)
+    if not exact and not sketches:
+        raise ValueError("exact=False için sketches=True olmalı")
+    files = _expand_paths(paths)
+    key_cols = list(dimensions) + ["event_date"]
+    args = (dimensions, freq, start_date, batch_size, exact, sketches, precision)
+
+    sums_parts, pair_parts, sketch_parts = [], [], []
+
+    def _collect(result):
+        sums, pairs, sketch_df = result
+        if sums is not None:
+            sums_parts.append(sums)
+            if pairs is not None:
+                pair_parts.append(pairs)
+            if sketch_df is not None:
+                sketch_parts.append(sketch_df)
+
+    if workers and workers > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as ex:
+            futures = [ex.submit(_aggregate_file, f, *args) for f in files]
+            for fut in as_completed(futures):
+                _collect(fut.result())
+    else:
+        for f in files:
+            _collect(_aggregate_file(f, *args))
+
+    if not sums_parts:
+        columns = _segment_columns(dimensions) + ["event_date", "oturum_sayisi", "toplam_izleme_suresi_dk"]
+        return pd.DataFrame(columns=columns + ([SKETCH_COL] if sketches else []))
+
+    sums = pd.concat(sums_parts, ignore_index=True).groupby(key_cols, observed=True).sum(min_count=1).reset_index()
+    pairs = _compact(pair_parts, key_cols)[0] if pair_parts else None
+    sketch_df = pd.concat(sketch_parts, ignore_index=True) if sketch_parts else None
+    return _finalize(sums, pairs, sketch_df, dimensions)
+
+
+if __name__ == "__main__":
+    df = aggregate_events(workers=os.cpu_count())
+    print("Satır:", len(df))
+    print(df.head())
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from feature_engineering.feature_engine import _group_position
+
+
+# Kaynak kolon -> bayrak öneki: outlier_oturum_iqr, outlier_oturum_z, ...
+OUTLIER_SOURCES = {
+    "oturum_sayisi": "outlier_oturum",
+    "toplam_izleme_suresi_dk": "outlier_sure",
+}
+WINDOW = 28
+IQR_K = 1.5
+# Iglewicz-Hoaglin değiştirilmiş z skoru için olağan eşik.
+MAD_THRESH = 3.5
+MAD_SCALE = 0.6745
+CHUNK_ROWS = 200_000
+
+
+def _quantile(sorted_vals, count, q):
+    # NaN'lar sıralamada sona düşer; her satırın ilk `count` değeri üzerinde
+    # pandas/numpy'deki gibi doğrusal interpolasyonlu çeyreklik.
+    p = q * np.maximum(count - 1, 0)
+    lo = np.floor(p).astype(np.int64)
+    hi = np.minimum(lo + 1, np.maximum(count - 1, 0))
+    a = np.take_along_axis(sorted_vals, lo[:, None], axis=1)[:, 0]
+    b = np.take_along_axis(sorted_vals, hi[:, None], axis=1)[:, 0]
+    return a + (b - a) * (p - lo)
+
+
+def rolling_robust_stats(x, pos, rows, window=WINDOW):
+    # rows satırlarının her biri için aynı serideki önceki `window` gözlemin
+    # (satırın kendisi hariç) medyanı, çeyrekleri ve MAD'i. Yalnızca geçmişe
+    # bakıldığı için yeni veri eski satırların sonucunu değiştirmez.
+    offsets = np.arange(1, window + 1)
+    idx = rows[:, None] - offsets[None, :]
+    valid = pos[rows][:, None] >= offsets[None, :]
+    vals = np.where(valid, x[np.where(valid, idx, 0)], np.nan)
+
+    count = np.sum(~np.isnan(vals), axis=1)
+    vals = np.sort(vals, axis=1)
+    median = _quantile(vals, count, 0.5)
+    q1 = _quantile(vals, count, 0.25)
+    q3 = _quantile(vals, count, 0.75)
+    mad = _quantile(np.sort(np.abs(vals - median[:, None]), axis=1), count, 0.5)
+    return {"count": count, "median": median, "q1": q1, "q3": q3, "mad": mad}
+
+
+def _flags(x, stats, min_periods, k, thresh):
+    enough = (stats["count"] >= min_periods) & ~np.isnan(x)
+    iqr = stats["q3"] - stats["q1"]
+    out_iqr = (x < stats["q1"] - k * iqr) | (x > stats["q3"] + k * iqr)
+
+    mad = stats["mad"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = MAD_SCALE * (x - stats["median"]) / mad
+    out_z = (mad > 0) & (np.abs(z) > thresh)
+    return (enough & out_iqr).astype(int), (enough & out_z).astype(int)
+
+
+def flag_outliers(df, sources=OUTLIER_SOURCES, group_col=None, date_col=None, window=WINDOW,
+                  min_periods=None, k=IQR_K, thresh=MAD_THRESH, since=None, chunk_rows=CHUNK_ROWS):
+    # Kayan pencereli (nedensel) IQR ve medyan/MAD bayrakları; df seri ve
+    # tarih sırasına göre dizili olmalı. group_col verilirse tüm seriler tek
+    # seferde işlenir. since verilirse yalnızca o tarihten sonraki satırlar
+    # hesaplanır, önceki satırların df'teki mevcut bayrakları korunur.
+    n = len(df)
+    min_periods = max(window // 2, 1) if min_periods is None else min_periods
+    pos = _group_position(n, df[group_col].to_numpy() if group_col else None)
+
+    if since is None:
+        rows = np.arange(n)
+    else:
+        dates = df.index if date_col is None else df[date_col]
+        rows = np.flatnonzero(np.asarray(pd.to_datetime(dates) >= pd.to_datetime(since)))
+
+    out = pd.DataFrame(index=df.index)
+    for col, prefix in sources.items():
+        if col not in df.columns:
+            continue
+        x = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+        names = (f"{prefix}_iqr", f"{prefix}_z")
+        flags = [
+            df[name].fillna(0).to_numpy(dtype=int).copy() if since is not None and name in df.columns
+            else np.zeros(n, dtype=int)
+            for name in names
+        ]
+        for start in range(0, len(rows), chunk_rows):
+            part = rows[start:start + chunk_rows]
+            stats = rolling_robust_stats(x, pos, part, window)
+            iqr_flag, z_flag = _flags(x[part], stats, min_periods, k, thresh)
+            flags[0][part] = iqr_flag
+            flags[1][part] = z_flag
+        out[names[0]] = flags[0]
+        out[names[1]] = flags[1]
+    return out
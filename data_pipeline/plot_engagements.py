@@ -2,6 +2,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FuncFormatter
 import matplotlib.dates as mdates
+from .storage import read_frame, RAW
 
 
 def _fmt_mn(x, _pos):
@@ -55,9 +56,6 @@ def plot_dual_axis(df, start_date, end_date):
 
 
 if __name__ == "__main__":
-    df = pd.read_csv(
-        "data/daily_engagements.csv",
-        parse_dates=["event_date"]
-    )
+    df = read_frame(RAW, columns=["event_date", "oturum_sayisi", "toplam_izleme_suresi_dk"])
 
     plot_dual_axis(df, start_date="2024-08-01", end_date="2025-08-17")
@@ -0,0 +1,195 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+
+DATA_DIR = os.getenv("ENGAGEMENT_DATA_DIR", "data")
+DEFAULT_FORMAT = os.getenv("ENGAGEMENT_STORAGE_FORMAT", "parquet")
+
+FORMATS = {
+    "arrow": ".arrow",
+    "parquet": ".parquet",
+}
+LEGACY_EXT = ".csv"
+DATE_COLUMNS = ("event_date", "ds")
+
+# Aşamalar arası veri setlerinin adları (eski CSV dosya adlarıyla aynı).
+RAW = "daily_engagements"
+PROCESSED = "daily_engagements_process"
+CLEAN = "daily_engagements_clean"
+FEATURES = "daily_engagements_fe2"
+FINAL = "daily_engagements_final"
+PANEL_FEATURES = "daily_engagements_panel_fe"
+HOLIDAYS = "prophet_holidays_tr"
+
+
+def dataset_path(name, fmt=DEFAULT_FORMAT, data_dir=None):
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt {', '.join(FORMATS)} olmalı")
+    return os.path.join(data_dir or DATA_DIR, name + FORMATS[fmt])
+
+
+def find_dataset(name, data_dir=None):
+    base = os.path.join(data_dir or DATA_DIR, name)
+    for ext in list(FORMATS.values()) + [LEGACY_EXT]:
+        if os.path.exists(base + ext):
+            return base + ext
+    return None
+
+
+def _remove_stale(name, path, data_dir=None):
+    for other in FORMATS.values():
+        stale = os.path.join(data_dir or DATA_DIR, name + other)
+        if stale != path and os.path.exists(stale):
+            os.remove(stale)
+
+
+def write_frame(df, name, fmt=DEFAULT_FORMAT, data_dir=None, index=False):
+    path = dataset_path(name, fmt, data_dir)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=index)
+
+    tmp_path = path + ".tmp"
+    if fmt == "parquet":
+        pq.write_table(table, tmp_path, compression="zstd")
+    else:
+        # Sıkıştırmasız IPC dosyası, okurken memory-map ile kopyasız açılabilir.
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+    _remove_stale(name, path, data_dir)
+    return path
+
+
+class FrameWriter:
+    # Veri setini parça parça yazar (Parquet'te row group, Arrow'da record
+    # batch olarak); bellekte yalnızca o anki parça tutulur. close() ile
+    # write_frame gibi atomik olarak yerine konur.
+    def __init__(self, name, fmt=DEFAULT_FORMAT, data_dir=None, index=False):
+        self.name = name
+        self.fmt = fmt
+        self.data_dir = data_dir
+        self.index = index
+        self.path = dataset_path(name, fmt, data_dir)
+        self.tmp_path = self.path + ".tmp"
+        self.schema = None
+        self.rows = 0
+        self._sink = None
+        self._writer = None
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+    def write(self, df):
+        if self.schema is None:
+            table = pa.Table.from_pandas(df, preserve_index=self.index)
+            self.schema = table.schema
+            if self.fmt == "parquet":
+                self._writer = pq.ParquetWriter(self.tmp_path, self.schema, compression="zstd")
+            else:
+                self._sink = pa.OSFile(self.tmp_path, "wb")
+                options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+                self._writer = pa.ipc.new_file(self._sink, self.schema, options=options)
+        else:
+            table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=self.index)
+        self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is None:
+            raise ValueError(f"{self.name} için yazılacak veri yok")
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+        os.replace(self.tmp_path, self.path)
+        _remove_stale(self.name, self.path, self.data_dir)
+        return self.path
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def _filter_table(table, columns=None, filters=None):
+    # Parquet dışındaki kaynaklarda (col, op, değer) filtreleri okumadan sonra
+    # uygulanır; filtre kolonu istenen kolonlarda olmasa da önce süzülür.
+    if filters is not None:
+        table = table.filter(pq.filters_to_expression(filters))
+    if columns is not None:
+        table = table.select(columns)
+    return table
+
+
+def _read_csv(source, columns=None, filters=None):
+    head = pd.read_csv(source, nrows=0)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    needed = None if columns is None else set(columns) | {f[0] for f in filters or []}
+    usecols = [c for c in head.columns if needed is None or c in needed]
+    parse_dates = [c for c in DATE_COLUMNS if c in usecols]
+    df = pd.read_csv(source, usecols=usecols, parse_dates=parse_dates)
+    if filters is None:
+        return df
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if columns is not None:
+        columns = [c for c in usecols if c in columns]
+    return _filter_table(table, columns, filters).to_pandas()
+
+
+def _read_table(path, columns=None, memory_map=True, filters=None):
+    if path.endswith(FORMATS["parquet"]):
+        return pq.read_table(path, columns=columns, memory_map=memory_map, filters=filters)
+
+    if memory_map:
+        source = pa.memory_map(path, "r")
+        table = pa.ipc.open_file(source).read_all()
+    else:
+        table = feather.read_table(path, memory_map=False)
+    return _filter_table(table, columns, filters)
+
+
+def read_file(source, columns=None, memory_map=True, filters=None):
+    name = getattr(source, "name", source)
+    if str(name).endswith(LEGACY_EXT):
+        return _read_csv(source, columns, filters)
+    if not isinstance(source, str):
+        source = pa.BufferReader(source.read())
+        table = (
+            pq.read_table(source, columns=columns, filters=filters)
+            if str(name).endswith(FORMATS["parquet"])
+            else _filter_table(feather.read_table(source), columns, filters)
+        )
+        return table.to_pandas()
+    return _read_table(source, columns, memory_map, filters).to_pandas()
+
+
+def read_frame(name, columns=None, memory_map=True, filters=None, data_dir=None):
+    path = find_dataset(name, data_dir)
+    if path is None:
+        raise FileNotFoundError(f"Veri seti bulunamadı: {os.path.join(data_dir or DATA_DIR, name)}")
+    return read_file(path, columns=columns, memory_map=memory_map, filters=filters)
+
+
+def read_schema(name, data_dir=None):
+    path = find_dataset(name, data_dir)
+    if path is None:
+        raise FileNotFoundError(f"Veri seti bulunamadı: {os.path.join(data_dir or DATA_DIR, name)}")
+    if path.endswith(FORMATS["parquet"]):
+        return pq.read_schema(path)
+    if path.endswith(FORMATS["arrow"]):
+        with pa.memory_map(path, "r") as source:
+            return pa.ipc.open_file(source).schema
+    return pa.Schema.from_pandas(_read_csv(path).head(0), preserve_index=False)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+from data_pipeline.storage import read_frame, FrameWriter, RAW, PANEL_FEATURES
+from data_pipeline.granularity import freq_config, dataset_name, DEFAULT_FREQ
+from data_pipeline.data_preprocess import preprocess_panel
+from feature_engineering.feature_engineering_pipeline import engineer_features
+from feature_engineering.incremental_features import HORIZONS
+
+
+CHUNK_DAYS = 90
+# Parça kenarında birebir aynı sonucu veren doldurma yöntemleri; ffill/bfill
+# halo'dan uzun boşluklarda, median/mode ise tüm seriye bakar.
+CHUNK_FILL_METHODS = ("zero",)
+_SERIES_COL = "_seri"
+
+
+def halo_periods(freq="D", horizons=HORIZONS):
+    # Bir parçanın ilk satırı için gereken geçmiş: en uzun lag/pencere/fark
+    # ya da aykırı değer penceresi + taşıma ufku (after_outlier_* için).
+    cfg = freq_config(freq)
+    span = max(cfg["lags"] + cfg["windows"] + cfg["diffs"])
+    return max(span, cfg["outlier_window"] + max(horizons))
+
+
+def _series_bounds(source, group_col, start_date, end_date, data_dir):
+    # Yalnızca seri ve tarih kolonları okunur; her serinin ızgara sınırları.
+    cols = ["event_date"] + ([group_col] if group_col else [])
+    keys = read_frame(source, columns=cols, data_dir=data_dir)
+    keys["event_date"] = pd.to_datetime(keys["event_date"])
+    if start_date:
+        keys = keys[keys["event_date"] >= pd.to_datetime(start_date)]
+    if end_date:
+        keys = keys[keys["event_date"] <= pd.to_datetime(end_date)]
+    if keys.empty:
+        raise ValueError(f"{source} içinde işlenecek satır yok")
+    groups = keys[group_col] if group_col else pd.Series(0, index=keys.index, name=_SERIES_COL)
+    bounds = keys["event_date"].groupby(groups, observed=True).agg(["min", "max"])
+    return bounds.rename(columns={"min": "ilk_tarih", "max": "son_tarih"})
+
+
+def iter_chunks(bounds, chunk_periods, halo, step):
+    # (okuma başı, çıktı başı, çıktı sonu) üçlüleri; sonlar hariçtir.
+    start = bounds["ilk_tarih"].min()
+    end = bounds["son_tarih"].max() + step
+    lo = start
+    while lo < end:
+        hi = min(lo + chunk_periods * step, end)
+        yield lo - halo * step, lo, hi
+        lo = hi
+
+
+def run_chunked(source=RAW, output=PANEL_FEATURES, freq="D", group_col=None, chunk_periods=None,
+                fill_method="zero", features=None, start_date=None, end_date=None, data_dir=None):
+    # preprocess + engineer_features zincirini zaman dilimleri halinde çalıştırır.
+    # Her dilim halo_periods kadar geçmişle okunur, böylece lag/rolling/aykırı
+    # değer kolonları tüm geçmişle hesaplananlarla aynı olur; yalnızca dilimin
+    # kendi satırları çıktıya eklenir. Bellek kullanımı geçmişin uzunluğuna
+    # değil dilim boyuna bağlıdır.
+    if fill_method not in CHUNK_FILL_METHODS:
+        raise ValueError(f"Parçalı modda fill_method {', '.join(CHUNK_FILL_METHODS)} olmalı")
+    cfg = freq_config(freq)
+    step = pd.Timedelta(1, unit=cfg["pandas_freq"])
+    chunk_periods = chunk_periods or CHUNK_DAYS * cfg["periods_per_day"]
+    halo = halo_periods(freq)
+
+    bounds = _series_bounds(source, group_col, start_date, end_date, data_dir)
+    series_col = group_col or _SERIES_COL
+    categories = pd.Index(bounds.index)
+
+    with FrameWriter(output, data_dir=data_dir) as writer:
+        for read_lo, lo, hi in iter_chunks(bounds, chunk_periods, halo, step):
+            span = pd.DataFrame({
+                "ilk_tarih": bounds["ilk_tarih"].clip(lower=read_lo),
+                "son_tarih": bounds["son_tarih"].clip(upper=hi - step),
+            })
+            span = span[span["ilk_tarih"] <= span["son_tarih"]]
+            if span.empty:
+                continue
+
+            raw = read_frame(
+                source, data_dir=data_dir,
+                filters=[("event_date", ">=", read_lo), ("event_date", "<", hi)],
+            )
+            if group_col is None:
+                raw[_SERIES_COL] = 0
+            raw[series_col] = pd.Categorical(raw[series_col], categories=categories)
+            span.index = pd.CategoricalIndex(span.index, categories=categories)
+
+            panel, _ = preprocess_panel(raw, group_col=series_col, fill_method=fill_method, freq=freq, span=span)
+            out = engineer_features(panel, freq=freq, group_col=series_col, features=features)
+            out = out[out["event_date"].to_numpy() >= np.datetime64(lo)]
+            if group_col is None:
+                out = out.drop(columns=[_SERIES_COL])
+            writer.write(out.reset_index(drop=True))
+        rows = writer.rows
+    return writer.path, rows
+
+
+if __name__ == "__main__":
+    path, rows = run_chunked(
+        source=dataset_name(RAW, DEFAULT_FREQ),
+        output=dataset_name(PANEL_FEATURES, DEFAULT_FREQ),
+        freq=DEFAULT_FREQ,
+    )
+    print(f"Parçalı işleme tamamlandı → {path} ({rows} satır)")
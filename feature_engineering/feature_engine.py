@@ -0,0 +1,218 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+# kind: "cyclical" | "lag" | "roll_mean" | "roll_std" | "diff" | "carry"
+FeatureSpec = namedtuple("FeatureSpec", ["name", "kind", "source", "param"])
+
+CYCLICAL_PERIODS = {"hour": 24.0, "dow": 7.0, "month": 12.0}
+INT_KINDS = ("carry",)
+
+
+def plan_features(columns, target_cols, lags, windows, diffs,
+                  outlier_cols=("outlier_oturum", "outlier_sure"), horizons=(1, 2, 3),
+                  day_col="hafta_gunu", month_col="ay", hour_col="saat"):
+    # add_*_if_missing yardımcılarıyla aynı isimleri ve kolon sırasını üretir;
+    # zaten var olan kolonlar plana alınmaz.
+    existing = set(columns)
+    plan = []
+
+    def _add(name, kind, source, param):
+        if name not in existing:
+            existing.add(name)
+            plan.append(FeatureSpec(name, kind, source, param))
+
+    for prefix, col in (("hour", hour_col), ("dow", day_col), ("month", month_col)):
+        if col in columns:
+            _add(f"{prefix}_sin", "cyclical", col, ("sin", CYCLICAL_PERIODS[prefix]))
+            _add(f"{prefix}_cos", "cyclical", col, ("cos", CYCLICAL_PERIODS[prefix]))
+
+    targets = [c for c in target_cols if c in columns]
+    for c in targets:
+        for L in lags:
+            _add(f"{c}_lag{L}", "lag", c, L)
+    for c in targets:
+        for w in windows:
+            _add(f"{c}_roll{w}_mean", "roll_mean", c, w)
+            _add(f"{c}_roll{w}_std", "roll_std", c, w)
+    for c in targets:
+        for p in diffs:
+            _add(f"{c}_diff{p}", "diff", c, p)
+    for o in outlier_cols:
+        if o not in columns:
+            continue
+        for h in horizons:
+            _add(f"after_{o}_{h}d", "carry", o, h)
+    return plan
+
+
+def feature_dependencies(spec):
+    # Bir özelliğin hesaplanması için gereken kolonlar. Kaynak kolon da
+    # planlanmış bir özellikse select_features onu da plana ekler.
+    return (spec.source,)
+
+
+def select_features(plan, features, columns=()):
+    # Yalnızca istenen özellikler ve bağımlılıkları; sıra plandaki gibi kalır.
+    # Veride zaten bulunan kolonlar hesaplanmaz.
+    registry = {s.name: s for s in plan}
+    available = set(columns)
+    unknown = [f for f in features if f not in registry and f not in available]
+    if unknown:
+        raise ValueError(f"Tanımsız özellik(ler): {', '.join(unknown)}")
+
+    needed = set()
+    stack = list(features)
+    while stack:
+        name = stack.pop()
+        if name in needed or name not in registry:
+            continue
+        needed.add(name)
+        stack.extend(feature_dependencies(registry[name]))
+    return [s for s in plan if s.name in needed]
+
+
+def _group_position(n, groups):
+    # Her satırın kendi serisi içindeki sırası; seriler ardışık satırlarda olmalı.
+    if groups is None:
+        return np.arange(n)
+    codes = pd.factorize(groups)[0]
+    starts = np.r_[True, codes[1:] != codes[:-1]]
+    start_idx = np.maximum.accumulate(np.where(starts, np.arange(n), 0))
+    return np.arange(n) - start_idx
+
+
+def _shift(x, k, pos, fill=np.nan):
+    out = np.full(len(x), fill, dtype=np.float64)
+    if k < len(x):
+        out[k:] = x[:-k] if k else x
+    out[pos < k] = fill
+    return out
+
+
+def _window_sum(v, w):
+    # S[i] = v[i-w:i].sum(). Dizi w uzunluğunda bloklara bölünür; her pencere
+    # bir bloğun sonu (ters kümülatif) ile sonraki bloğun başının (ileri
+    # kümülatif) toplamıdır. Böylece yalnızca pencere içindeki değerler
+    # toplanır ve uzun seriler boyunca kümülatif toplam hatası birikmez.
+    n = len(v)
+    nb = -(-(n + 1) // w)
+    pad = np.zeros(nb * w)
+    pad[:n] = v
+    blocks = pad.reshape(nb, w)
+    head = np.zeros_like(blocks)
+    head[:, 1:] = np.cumsum(blocks, axis=1)[:, :-1]
+    tail = np.cumsum(blocks[:, ::-1], axis=1)[:, ::-1]
+    head, tail = head.ravel(), tail.ravel()
+
+    out = np.full(n, np.nan)
+    hi = np.arange(w, n)
+    out[w:] = tail[hi - w] + head[hi]
+    return out
+
+
+class _WindowStats:
+    # Bir kaynak kolon için NaN ve değer-değişimi sayaçları bir kez hesaplanır;
+    # her pencere ortalaması/std'si blok toplamlarından O(n) ile çıkarılır.
+    def __init__(self, x):
+        self.x = x
+        self.isnan = np.isnan(x)
+        finite = x[~self.isnan]
+        self.center = finite.mean() if len(finite) else 0.0
+        self.xc = np.where(self.isnan, 0.0, x - self.center)
+        self.nans = np.r_[0, np.cumsum(self.isnan)]
+        changed = np.r_[True, x[1:] != x[:-1]]
+        self.changes = np.r_[0, np.cumsum(changed)]
+        self._sums = {}
+
+    def _sum(self, w):
+        if w not in self._sums:
+            self._sums[w] = _window_sum(self.xc, w)
+        return self._sums[w]
+
+    def _valid(self, w, pos):
+        # shift(1).rolling(w): i. satırın penceresi [i-w, i-1] aralığıdır.
+        n = len(self.x)
+        hi = np.arange(n)
+        lo = np.clip(hi - w, 0, None)
+        valid = (hi >= w) & (pos >= w)
+        valid &= (self.nans[hi] - self.nans[lo]) == 0
+        return hi, lo, valid
+
+    def mean(self, w, pos):
+        _, _, valid = self._valid(w, pos)
+        out = self._sum(w) / w + self.center
+        return np.where(valid, out, np.nan)
+
+    def std(self, w, pos):
+        hi, lo, valid = self._valid(w, pos)
+        if w < 2:
+            return np.full(len(hi), np.nan)
+        sx = self._sum(w)
+        sxx = _window_sum(self.xc * self.xc, w)
+        var = np.clip((sxx - sx * sx / w) / (w - 1), 0.0, None)
+        # pandas gibi: pencerede tüm değerler aynıysa std tam olarak 0.
+        same = (self.changes[hi] - self.changes[np.clip(lo + 1, 0, None)]) == 0
+        var = np.where(same, 0.0, var)
+        return np.where(valid, np.sqrt(var), np.nan)
+
+
+def compute_features(df, plan, group_col=None, float_dtype=np.float64, int_dtype=np.int64):
+    # Tüm plan tek bir önceden ayrılmış float bloğa (ve int bayrak bloğuna)
+    # yazılır; DataFrame'e kolon kolon ekleme ve ara kopyalar yapılmaz.
+    # Hesaplama float64'te yapılır, sonuç bloğa float_dtype ile yazılır.
+    n = len(df)
+    pos = _group_position(n, df[group_col].to_numpy() if group_col else None)
+
+    float_specs = [s for s in plan if s.kind not in INT_KINDS]
+    int_specs = [s for s in plan if s.kind in INT_KINDS]
+    float_block = np.empty((n, len(float_specs)), dtype=float_dtype)
+    int_block = np.empty((n, len(int_specs)), dtype=int_dtype)
+
+    sources = {}
+    stats = {}
+
+    def _source(col):
+        if col not in sources:
+            sources[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+        return sources[col]
+
+    def _stats(col):
+        if col not in stats:
+            stats[col] = _WindowStats(_source(col))
+        return stats[col]
+
+    for j, spec in enumerate(float_specs):
+        if spec.kind == "cyclical":
+            func, period = spec.param
+            x = df[spec.source].to_numpy()
+            float_block[:, j] = getattr(np, func)(2*np.pi*x/period)
+        elif spec.kind == "lag":
+            float_block[:, j] = _shift(_source(spec.source), spec.param, pos)
+        elif spec.kind == "diff":
+            x = _source(spec.source)
+            float_block[:, j] = x - _shift(x, spec.param, pos)
+        elif spec.kind == "roll_mean":
+            float_block[:, j] = _stats(spec.source).mean(spec.param, pos)
+        elif spec.kind == "roll_std":
+            float_block[:, j] = _stats(spec.source).std(spec.param, pos)
+        else:
+            raise ValueError(f"Bilinmeyen özellik türü: {spec.kind}")
+
+    for j, spec in enumerate(int_specs):
+        x = _source(spec.source)
+        shifted = _shift(np.nan_to_num(x, nan=0.0), spec.param, pos, fill=0.0)
+        int_block[:, j] = shifted.astype(int_dtype)
+
+    frames = []
+    if float_specs:
+        frames.append(pd.DataFrame(float_block, index=df.index, columns=[s.name for s in float_specs]))
+    if int_specs:
+        frames.append(pd.DataFrame(int_block, index=df.index, columns=[s.name for s in int_specs]))
+    if not frames:
+        return pd.DataFrame(index=df.index)
+
+    block = pd.concat(frames, axis=1) if len(frames) > 1 else frames[0]
+    return block[[s.name for s in plan]]
@@ -1,14 +1,23 @@
 import pandas as pd
 import numpy as np
-import os 
+from data_pipeline.storage import read_frame, write_frame, CLEAN, FEATURES
+from data_pipeline.granularity import freq_config, dataset_name, DEFAULT_FREQ
+from data_pipeline.dtypes import apply_dtype_policy, feature_float_dtype, flag_dtype
+from feature_engineering.feature_engine import plan_features, select_features, compute_features
 
-def _ensure_datetime(df, date_col="event_date"):
+def _ensure_datetime(df, date_col="event_date", group_col=None):
     out = df.copy()
     out[date_col] = pd.to_datetime(out[date_col], errors="coerce")
-    return out.sort_values(date_col).reset_index(drop=True)
+    sort_cols = [group_col, date_col] if group_col else date_col
+    return out.sort_values(sort_cols, kind="stable").reset_index(drop=True)
 
-def add_cyclical_if_missing(df, day_col="hafta_gunu", month_col="ay"):
+def add_cyclical_if_missing(df, day_col="hafta_gunu", month_col="ay", hour_col="saat"):
     out = df.copy()
+    if hour_col in out.columns:
+        if "hour_sin" not in out.columns:
+            out["hour_sin"] = np.sin(2*np.pi*out[hour_col]/24.0)
+        if "hour_cos" not in out.columns:
+            out["hour_cos"] = np.cos(2*np.pi*out[hour_col]/24.0)
     if day_col in out.columns:
         if "dow_sin" not in out.columns:
             out["dow_sin"] = np.sin(2*np.pi*out[day_col]/7.0)
@@ -69,20 +78,37 @@ def add_outlier_carry_if_missing(df, outlier_cols=("outlier_oturum", "outlier_su
                 out[name] = out[o].shift(h).fillna(0).astype(int)
     return out
 
-def engineer_features(df, date_col="event_date"):
-    out = _ensure_datetime(df, date_col)
-    target_cols = [c for c in ["oturum_sayisi", "toplam_izleme_suresi_dk", "ortalama_sure"] if c in out.columns]
-    out = add_cyclical_if_missing(out, day_col="hafta_gunu", month_col="ay")
-    out = add_lags_if_missing(out, cols=target_cols)
-    out = add_rollings_if_missing(out, cols=target_cols)
-    out = add_diffs_if_missing(out, cols=target_cols)
-    out = add_outlier_carry_if_missing(out)
-    return out
+TARGET_COLS = ["oturum_sayisi", "toplam_izleme_suresi_dk", "ortalama_sure"]
+
+def feature_plan(columns, freq="D", features=None):
+    # Verilen kolonlardan üretilebilecek tüm özellikler (kayıt); features
+    # verilirse yalnızca onlar ve bağımlılıkları.
+    cfg = freq_config(freq)
+    plan = plan_features(
+        columns, [c for c in TARGET_COLS if c in columns],
+        lags=cfg["lags"], windows=cfg["windows"], diffs=cfg["diffs"],
+        day_col="hafta_gunu", month_col="ay", hour_col="saat",
+    )
+    if features is not None:
+        plan = select_features(plan, features, columns)
+    return plan
+
+def engineer_features(df, date_col="event_date", freq="D", group_col=None, features=None):
+    # Gecikme/pencere/fark değerleri periyot cinsindendir (günlük veya saatlik).
+    # Tüm özellikler önceden planlanır ve tek blok olarak eklenir; sonuç
+    # add_*_if_missing zincirinin ürettiği kolonlarla aynıdır. group_col
+    # verilirse (ör. "segment") her seri kendi içinde hesaplanır. features
+    # verilirse (ör. bir modelin regresörleri) yalnızca o kolonlar hesaplanır.
+    out = _ensure_datetime(df, date_col, group_col)
+    plan = feature_plan(out.columns, freq, features)
+    if not plan:
+        return apply_dtype_policy(out)
+    block = compute_features(out, plan, group_col=group_col,
+                             float_dtype=feature_float_dtype(), int_dtype=flag_dtype())
+    return apply_dtype_policy(pd.concat([out, block], axis=1))
 
 if __name__ == "__main__":
-    input_file = os.path.join("data", "daily_engagements_clean.csv") 
-    output_file = os.path.join("data", "daily_engagements_fe2.csv")    
-    df = pd.read_csv(input_file)  
-    out = engineer_features(df)
-    out.to_csv(output_file, index=False)
+    df = read_frame(dataset_name(CLEAN, DEFAULT_FREQ))
+    out = engineer_features(df, freq=DEFAULT_FREQ)
+    output_file = write_frame(out, dataset_name(FEATURES, DEFAULT_FREQ))
     print(f"Feature engineering tamamlandı → {output_file} (shape={out.shape})")
@@ -1,62 +1,30 @@
-import os
 import sys
 import pandas as pd
+from data_pipeline.storage import read_frame, write_frame, find_dataset, HOLIDAYS
+from feature_engineering.holiday_calendar import get_calendar
 
-try:
-    from holidays import Turkey
-except Exception:
-    from holidays.countries import Turkey
-
-INP = "data/daily_engagements_fe.csv"
-OUT = "data/prophet_holidays_tr.csv"
+INP = "daily_engagements_fe"
+OUT = HOLIDAYS
 DATE_COL = "event_date"
 
-START = pd.Timestamp("2024-08-02")
-END   = pd.Timestamp("2025-08-17")
-
-def create_tr_holidays_range(start=START, end=END):
-    years = list(range(start.year, end.year + 1))
-    tr = Turkey(years=years)
-    dates = pd.to_datetime(list(tr.keys()))
-    mask = (dates >= start) & (dates <= end)
-    dates = dates[mask]
-    rows = [{"ds": d, "holiday": tr.get(d.date())} for d in dates]
-    return pd.DataFrame(rows).sort_values("ds").reset_index(drop=True)
-
-def weekend_effect_from_df(df, date_col=DATE_COL, start=START, end=END):
-    out = df.copy()
-    out[date_col] = pd.to_datetime(out[date_col]).dt.normalize()
-    mask_range = (out[date_col] >= start) & (out[date_col] <= end)
-    wknd_dates = (
-        out.loc[mask_range & out[date_col].dt.weekday.isin([5, 6]), date_col]
-        .drop_duplicates()
-        .sort_values()
-        .reset_index(drop=True)
-    )
-    rows = [{"ds": d, "holiday": "weekend"} for d in wknd_dates]
-    return pd.DataFrame(rows)
+# Çıktı, verinin son gününden bu kadar gün sonrasını da kapsar (tahmin ufku).
+FUTURE_DAYS = 365
 
 def main():
-    if not os.path.exists(INP):
-        print(f"[HATA] Girdi dosyası bulunamadı: {INP}")
+    if find_dataset(INP) is None:
+        print(f"[HATA] Girdi veri seti bulunamadı: {INP}")
         sys.exit(1)
 
-    df = pd.read_csv(INP, parse_dates=[DATE_COL])
-
-    tr_h = create_tr_holidays_range(START, END)
-    wk_h = weekend_effect_from_df(df, DATE_COL, START, END)
+    dates = read_frame(INP, columns=[DATE_COL])[DATE_COL]
+    start = pd.to_datetime(dates).min()
+    end = pd.to_datetime(dates).max() + pd.Timedelta(days=FUTURE_DAYS)
 
-    holidays_df = (
-        pd.concat([tr_h, wk_h], ignore_index=True)
-        .drop_duplicates(subset=["ds", "holiday"])
-        .sort_values("ds")
-        .reset_index(drop=True)
-    )
+    # Tatiller, bayram arifeleri ve hafta sonları aynı takvimden gelir.
+    holidays_df = get_calendar().prophet_holidays(start, end)
 
-    os.makedirs(os.path.dirname(OUT), exist_ok=True)
-    holidays_df.to_csv(OUT, index=False)
+    out_path = write_frame(holidays_df, OUT)
 
-    print(f"[OK] Çıktı: {OUT} → shape={holidays_df.shape}")
+    print(f"[OK] Çıktı: {out_path} → shape={holidays_df.shape}")
     print(holidays_df.head(10))
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    from holidays import Turkey
+except Exception:
+    from holidays.countries import Turkey
+
+
+# Gün başına bit maskesi.
+HOLIDAY = 1
+WEEKEND = 2
+PRE_HOLIDAY = 4
+POST_HOLIDAY = 8
+ALL = HOLIDAY | WEEKEND | PRE_HOLIDAY | POST_HOLIDAY
+# sarimax_model'deki holiday_dummy eskiden tatil + hafta sonu günleriydi.
+DUMMY_BITS = HOLIDAY | WEEKEND
+
+START_YEAR = 2015
+END_YEAR = date.today().year + 10
+WEEKEND_DAYS = (5, 6)
+# Tatil bloğunun (ardışık aynı isimli günler) öncesi/sonrası gün sayısı.
+WINDOWS = {
+    "Ramazan Bayramı": (1, 0),
+    "Kurban Bayramı": (1, 0),
+}
+WEEKEND_NAME = "weekend"
+# holidays.Turkey ileri yılları bu ekle işaretler, aynı güne düşen tatilleri
+# ";" ile birleştirir; WINDOWS eşleşmesi parçalar üzerinden yapılır.
+ESTIMATED_SUFFIX = " (tahmini)"
+
+
+def _name_parts(name):
+    return {part.strip().removesuffix(ESTIMATED_SUFFIX) for part in name.split(";")}
+
+
+class HolidayCalendar:
+    # START_YEAR..END_YEAR arasındaki her gün için tek bir uint8 bit maskesi
+    # ve isim kodu tutar; tarih dizileri için sorgu, origin'e göre gün farkıyla
+    # dizi indekslemedir. Aralık dışındaki bir tarih sorulursa takvim o yılları
+    # kapsayacak şekilde bir kez yeniden kurulur.
+
+    def __init__(self, start_year=START_YEAR, end_year=END_YEAR, windows=WINDOWS, weekend_days=WEEKEND_DAYS):
+        self.windows = dict(windows)
+        self.weekend_days = tuple(weekend_days)
+        self._build(start_year, end_year)
+
+    def _build(self, start_year, end_year):
+        self.start_year = int(start_year)
+        self.end_year = int(end_year)
+        self.origin = np.datetime64(f"{self.start_year}-01-01", "D")
+        n = int((np.datetime64(f"{self.end_year + 1}-01-01", "D") - self.origin).astype(np.int64))
+
+        self.mask = np.zeros(n, dtype=np.uint8)
+        self.codes = np.zeros(n, dtype=np.int16)
+        self.names = [""]
+        name_codes = {}
+
+        def _code(name):
+            if name not in name_codes:
+                name_codes[name] = len(self.names)
+                self.names.append(name)
+            return name_codes[name]
+
+        # 1970-01-01 perşembe (3); hafta_gunu ile aynı, pazartesi = 0.
+        weekday = (self.origin.astype(np.int64) + np.arange(n) + 3) % 7
+        self.mask[np.isin(weekday, self.weekend_days)] |= WEEKEND
+
+        items = sorted(Turkey(years=range(self.start_year, self.end_year + 1)).items())
+        days = np.array([np.datetime64(d, "D") for d, _ in items], dtype="datetime64[D]")
+        idx = (days - self.origin).astype(np.int64)
+        names = [name for _, name in items]
+        parts = [_name_parts(name) for name in names]
+        self.mask[idx] |= HOLIDAY
+        self.codes[idx] = [_code(name) for name in names]
+
+        for name, (pre, post) in self.windows.items():
+            block = np.sort(idx[[i for i, nm in enumerate(parts) if name in nm]])
+            if not len(block):
+                continue
+            starts = block[np.r_[True, np.diff(block) > 1]]
+            ends = block[np.r_[np.diff(block) > 1, True]]
+            for bit, offsets, label in (
+                (PRE_HOLIDAY, [s - k for s in starts for k in range(1, pre + 1)], f"{name} öncesi"),
+                (POST_HOLIDAY, [e + k for e in ends for k in range(1, post + 1)], f"{name} sonrası"),
+            ):
+                offsets = np.array([o for o in offsets if 0 <= o < n], dtype=np.int64)
+                if not len(offsets):
+                    continue
+                self.mask[offsets] |= bit
+                free = offsets[self.codes[offsets] == 0]
+                self.codes[free] = _code(label)
+
+    def _index(self, dates):
+        days = np.asarray(pd.to_datetime(dates), dtype="datetime64[D]").ravel()
+        valid = ~np.isnat(days)
+        if valid.any():
+            years = days[valid][[np.argmin(days[valid]), np.argmax(days[valid])]].astype("datetime64[Y]")
+            lo_year, hi_year = (years.astype(np.int64) + 1970).tolist()
+            if lo_year < self.start_year or hi_year > self.end_year:
+                self._build(min(lo_year, self.start_year), max(hi_year, self.end_year))
+        idx = np.zeros(len(days), dtype=np.int64)
+        idx[valid] = (days[valid] - self.origin).astype(np.int64)
+        return idx, valid
+
+    def flags(self, dates):
+        # Her tarih için bit maskesi (saatli tarihler güne indirgenir).
+        idx, valid = self._index(dates)
+        return np.where(valid, self.mask[idx], 0).astype(np.uint8)
+
+    def dummy(self, dates, bits=DUMMY_BITS):
+        return ((self.flags(dates) & bits) != 0).astype(np.int8)
+
+    def holiday_names(self, dates):
+        idx, valid = self._index(dates)
+        return np.asarray(self.names, dtype=object)[np.where(valid, self.codes[idx], 0)]
+
+    def prophet_holidays(self, start, end, bits=ALL):
+        # Prophet'in holidays argümanı için (ds, holiday) tablosu; hafta sonu
+        # günleri "weekend" satırı olarak, tatil/pencere günleri kendi adıyla.
+        days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+        if not len(days):
+            return pd.DataFrame({"ds": pd.Series(dtype="datetime64[ns]"), "holiday": pd.Series(dtype=object)})
+        flags = self.flags(days)
+        names = self.holiday_names(days)
+
+        named = (flags & (bits & ~WEEKEND)) != 0
+        parts = [pd.DataFrame({"ds": days[named], "holiday": names[named]})]
+        if bits & WEEKEND:
+            weekend = (flags & WEEKEND) != 0
+            parts.append(pd.DataFrame({"ds": days[weekend], "holiday": WEEKEND_NAME}))
+        return (
+            pd.concat(parts, ignore_index=True)
+            .drop_duplicates(subset=["ds", "holiday"])
+            .sort_values("ds", kind="stable")
+            .reset_index(drop=True)
+        )
+
+
+@lru_cache(maxsize=None)
+def get_calendar():
+    return HolidayCalendar()
+
+
+def holidays_for(dates, future_days=365, bits=ALL):
+    # Verinin aralığı + ileriye future_days gün için Prophet tatil tablosu.
+    dates = pd.to_datetime(pd.Series(dates)).dropna()
+    return get_calendar().prophet_holidays(dates.min(), dates.max() + pd.Timedelta(days=future_days), bits)
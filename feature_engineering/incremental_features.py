@@ -0,0 +1,383 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from data_pipeline.granularity import freq_config, normalize_freq
+from data_pipeline.storage import read_frame, CLEAN
+from data_pipeline.dtypes import flag_dtype, feature_float_dtype
+from feature_engineering.feature_engine import plan_features, select_features
+
+
+TARGET_COLS = ("oturum_sayisi", "toplam_izleme_suresi_dk", "ortalama_sure")
+OUTLIER_COLS = ("outlier_oturum", "outlier_sure")
+HORIZONS = (1, 2, 3)
+
+
+class IncrementalFeatureState:
+    # engineer_features'ın lag/rolling/diff/carry kolonlarını, yeni gelen her
+    # periyot için yalnızca seri başına halka tamponlar ve pencere başına
+    # koşan toplamlar üzerinden üretir (gözlem başına O(pencere sayısı)).
+    # Tüm durum (S, ...) dizilerinde tutulur; S seri sayısıdır.
+
+    def __init__(self, freq="D", target_cols=TARGET_COLS, outlier_cols=OUTLIER_COLS, horizons=HORIZONS,
+                 group_col=None, date_col="event_date"):
+        cfg = freq_config(freq)
+        self.freq = normalize_freq(freq)
+        self.step = pd.Timedelta(1, unit=cfg["pandas_freq"]).to_timedelta64().astype("timedelta64[ns]")
+        self.lags = tuple(cfg["lags"])
+        self.windows = tuple(cfg["windows"])
+        self.diffs = tuple(cfg["diffs"])
+        self.target_cols = tuple(target_cols)
+        self.outlier_cols = tuple(outlier_cols)
+        self.horizons = tuple(horizons)
+        self.group_col = group_col
+        self.date_col = date_col
+        self.cap = max(self.lags + self.windows + self.diffs)
+        self.ocap = max(self.horizons)
+
+        self.keys = []
+        self.index = {}
+        self.targets = []
+        self.outliers = []
+        self.n_obs = np.zeros(0, dtype=np.int64)
+        self.last_date = np.zeros(0, dtype="datetime64[ns]")
+        self.buf = {}
+        self.obuf = {}
+        self.center = {}
+        self.run = {}
+        self.s1 = {}
+        self.s2 = {}
+        self.nn = {}
+
+    # -- durum kurulumu -------------------------------------------------
+
+    def _grow(self, new_keys):
+        if not new_keys:
+            return
+        k = len(new_keys)
+        for key in new_keys:
+            self.index[key] = len(self.keys)
+            self.keys.append(key)
+        self.n_obs = np.r_[self.n_obs, np.zeros(k, dtype=np.int64)]
+        self.last_date = np.r_[self.last_date, np.full(k, np.datetime64("NaT"), dtype="datetime64[ns]")]
+        for c in self.targets:
+            self.buf[c] = np.vstack([self.buf[c], np.full((k, self.cap), np.nan)])
+            self.center[c] = np.r_[self.center[c], np.full(k, np.nan)]
+            self.run[c] = np.r_[self.run[c], np.zeros(k, dtype=np.int64)]
+            for w in self.windows:
+                self.s1[c][w] = np.r_[self.s1[c][w], np.zeros(k)]
+                self.s2[c][w] = np.r_[self.s2[c][w], np.zeros(k)]
+                self.nn[c][w] = np.r_[self.nn[c][w], np.zeros(k, dtype=np.int64)]
+        for o in self.outliers:
+            self.obuf[o] = np.vstack([self.obuf[o], np.zeros((k, self.ocap))])
+
+    def _codes(self, df):
+        if self.group_col is None:
+            if not self.keys:
+                self._grow([None])
+            return np.zeros(len(df), dtype=np.int64)
+        keys = df[self.group_col].astype(str).to_numpy()
+        self._grow([k for k in pd.unique(keys) if k not in self.index])
+        return np.array([self.index[k] for k in keys], dtype=np.int64)
+
+    def _init_columns(self, columns):
+        self.targets = [c for c in self.target_cols if c in columns]
+        self.outliers = [o for o in self.outlier_cols if o in columns]
+        for c in self.targets:
+            self.buf[c] = np.zeros((0, self.cap))
+            self.center[c] = np.zeros(0)
+            self.run[c] = np.zeros(0, dtype=np.int64)
+            self.s1[c] = {w: np.zeros(0) for w in self.windows}
+            self.s2[c] = {w: np.zeros(0) for w in self.windows}
+            self.nn[c] = {w: np.zeros(0, dtype=np.int64) for w in self.windows}
+        for o in self.outliers:
+            self.obuf[o] = np.zeros((0, self.ocap))
+
+    def _sort(self, df):
+        df = df.copy()
+        df[self.date_col] = pd.to_datetime(df[self.date_col])
+        sort_cols = [self.group_col, self.date_col] if self.group_col else [self.date_col]
+        return df.sort_values(sort_cols, kind="stable").reset_index(drop=True)
+
+    def _refresh(self, rows):
+        # Koşan toplamlar tampondan yeniden hesaplanır (kayan nokta birikimi
+        # olmasın diye her `cap` gözlemde bir yapılır).
+        if len(rows) == 0:
+            return
+        n = self.n_obs[rows]
+        for c in self.targets:
+            center = self.center[c][rows]
+            for w in self.windows:
+                t = n[:, None] - w + np.arange(w)[None, :]
+                vals = self.buf[c][rows[:, None], t % self.cap]
+                vals = np.where(t >= 0, vals, 0.0)
+                isnan = np.isnan(vals) & (t >= 0)
+                xc = np.where(isnan, 0.0, vals - center[:, None])
+                xc = np.where(t >= 0, xc, 0.0)
+                self.s1[c][w][rows] = xc.sum(axis=1)
+                self.s2[c][w][rows] = (xc * xc).sum(axis=1)
+                self.nn[c][w][rows] = isnan.sum(axis=1)
+
+    def fit(self, history):
+        # Geçmişin yalnızca seri başına son `cap` satırı duruma yazılır.
+        history = self._sort(history)
+        if not self.targets and not self.outliers:
+            self._init_columns(history.columns)
+        codes = self._codes(history)
+
+        pos = history.groupby(codes, sort=False).cumcount().to_numpy()
+        counts = np.bincount(codes, minlength=len(self.keys))
+        self.n_obs = counts.astype(np.int64)
+        keep = pos >= counts[codes] - self.cap
+        slots = pos % self.cap
+
+        last = history.groupby(codes, sort=True)[self.date_col].max()
+        self.last_date[last.index.to_numpy()] = last.to_numpy().astype("datetime64[ns]")
+
+        for c in self.targets:
+            x = pd.to_numeric(history[c], errors="coerce").to_numpy(dtype=np.float64)
+            self.buf[c][codes[keep], slots[keep]] = x[keep]
+            centers = pd.Series(x[keep]).groupby(codes[keep]).mean()
+            self.center[c][centers.index.to_numpy()] = centers.fillna(0.0).to_numpy()
+
+            # Sondaki eşit değer koşusunun uzunluğu (sabit pencerede std = 0).
+            tail = pd.DataFrame({"g": codes[keep], "x": x[keep]})
+            changed = tail["x"].ne(tail.groupby("g")["x"].shift(1)) | tail["x"].isna()
+            block = changed.groupby(tail["g"]).cumsum()
+            run = tail.groupby(["g", block]).cumcount() + 1
+            last_run = run.groupby(tail["g"]).last()
+            self.run[c][last_run.index.to_numpy()] = last_run.to_numpy()
+
+        for o in self.outliers:
+            v = history[o].fillna(0).to_numpy(dtype=np.float64)
+            okeep = pos >= counts[codes] - self.ocap
+            self.obuf[o][codes[okeep], (pos % self.ocap)[okeep]] = v[okeep]
+
+        self._refresh(np.unique(codes))
+        return self
+
+    # -- güncelleme -----------------------------------------------------
+
+    def _lag(self, c, rows, k):
+        n = self.n_obs[rows]
+        vals = self.buf[c][rows, (n - k) % self.cap]
+        return np.where(n >= k, vals, np.nan)
+
+    def _features(self, plan, step_rows, rows):
+        n = self.n_obs[rows]
+        out = {}
+        for spec in plan:
+            if spec.kind == "cyclical":
+                func, period = spec.param
+                out[spec.name] = getattr(np, func)(2*np.pi*step_rows[spec.source].to_numpy()/period)
+            elif spec.kind == "lag":
+                out[spec.name] = self._lag(spec.source, rows, spec.param)
+            elif spec.kind == "diff":
+                x = pd.to_numeric(step_rows[spec.source], errors="coerce").to_numpy(dtype=np.float64)
+                out[spec.name] = x - self._lag(spec.source, rows, spec.param)
+            elif spec.kind in ("roll_mean", "roll_std"):
+                c, w = spec.source, spec.param
+                valid = (n >= w) & (self.nn[c][w][rows] == 0)
+                s1 = self.s1[c][w][rows]
+                if spec.kind == "roll_mean":
+                    val = s1 / w + self.center[c][rows]
+                else:
+                    var = np.clip((self.s2[c][w][rows] - s1 * s1 / w) / (w - 1), 0.0, None) if w > 1 \
+                        else np.full(len(rows), np.nan)
+                    var = np.where(self.run[c][rows] >= w, 0.0, var)
+                    val = np.sqrt(var)
+                out[spec.name] = np.where(valid, val, np.nan)
+            elif spec.kind == "carry":
+                m = self.n_obs[rows]
+                vals = self.obuf[spec.source][rows, (m - spec.param) % self.ocap]
+                out[spec.name] = np.where(m >= spec.param, vals, 0.0).astype(np.int64)
+        return out
+
+    def _push(self, step_rows, rows):
+        n = self.n_obs[rows]
+        for c in self.targets:
+            x = pd.to_numeric(step_rows[c], errors="coerce").to_numpy(dtype=np.float64)
+            center = self.center[c][rows]
+            new_center = np.isnan(center)
+            center = np.where(new_center, np.nan_to_num(x), center)
+            self.center[c][rows] = center
+
+            x_nan = np.isnan(x)
+            xc = np.where(x_nan, 0.0, x - center)
+            for w in self.windows:
+                leaving = self.buf[c][rows, (n - w) % self.cap]
+                has_leaving = n >= w
+                l_nan = np.isnan(leaving) & has_leaving
+                lc = np.where(has_leaving & ~l_nan, leaving - center, 0.0)
+                self.s1[c][w][rows] += xc - lc
+                self.s2[c][w][rows] += xc * xc - lc * lc
+                self.nn[c][w][rows] += x_nan.astype(np.int64) - l_nan.astype(np.int64)
+
+            prev = self.buf[c][rows, (n - 1) % self.cap]
+            same = (n > 0) & (x == prev)
+            self.run[c][rows] = np.where(same, np.minimum(self.run[c][rows] + 1, self.cap), 1)
+            self.buf[c][rows, n % self.cap] = x
+
+        for o in self.outliers:
+            v = step_rows[o].fillna(0).to_numpy(dtype=np.float64)
+            self.obuf[o][rows, n % self.ocap] = v
+
+        self.n_obs[rows] = n + 1
+        self._refresh(rows[(n + 1) % self.cap == 0])
+
+    def _plan(self, columns, features=None):
+        plan = plan_features(
+            columns, self.target_cols,
+            lags=self.lags, windows=self.windows, diffs=self.diffs,
+            outlier_cols=self.outlier_cols, horizons=self.horizons,
+        )
+        if features is not None:
+            plan = select_features(plan, features, columns)
+        return plan
+
+    def _check_next(self, rows, dates):
+        expected = self.last_date[rows] + self.step
+        known = ~np.isnat(self.last_date[rows])
+        if np.any(known & (dates != expected)):
+            raise ValueError("Yeni satırlar son tarihten itibaren ardışık olmalı (önce preprocess ile boşlukları doldurun)")
+
+    def peek(self, next_rows, features=None):
+        # Seri başına bir sonraki tek periyodun özelliklerini durumu
+        # ilerletmeden üretir (özyinelemeli tahminde hedef henüz bilinmezken).
+        # Lag/rolling yalnızca geçmişe bakar; diff kolonları satırdaki hedef
+        # değerini kullandığından hedef boşsa NaN olur. Değer belli olunca
+        # aynı satırlar update() ile itilir.
+        if not self.targets and not self.outliers:
+            raise ValueError("Önce fit() ya da load() çağrılmalı")
+        next_rows = self._sort(next_rows)
+        codes = self._codes(next_rows)
+        if len(np.unique(codes)) != len(codes):
+            raise ValueError("peek() seri başına tek satır bekler")
+        self._check_next(codes, next_rows[self.date_col].to_numpy().astype("datetime64[ns]"))
+        plan = self._plan(next_rows.columns, features)
+        feats = self._features(plan, next_rows, codes)
+        feats = pd.DataFrame(feats, index=next_rows.index)[[s.name for s in plan]]
+        return pd.concat([next_rows, feats], axis=1)
+
+    def update(self, new_rows, features=None):
+        # Yeni periyotların özellik satırlarını döndürür ve durumu ilerletir.
+        # Her seri için yeni satırlar son görülen tarihin hemen ardından gelmeli.
+        # features verilirse yalnızca o kolonlar üretilir; durum yine tam ilerler.
+        new_rows = self._sort(new_rows)
+        if not self.targets and not self.outliers:
+            self._init_columns(new_rows.columns)
+        codes = self._codes(new_rows)
+        plan = self._plan(new_rows.columns, features)
+
+        dates = new_rows[self.date_col].to_numpy().astype("datetime64[ns]")
+        step_no = new_rows.groupby(codes, sort=False).cumcount().to_numpy()
+        values = {spec.name: np.empty(len(new_rows), dtype=flag_dtype() if spec.kind == "carry" else feature_float_dtype())
+                  for spec in plan}
+
+        for k in range(int(step_no.max()) + 1 if len(new_rows) else 0):
+            idx = np.flatnonzero(step_no == k)
+            rows = codes[idx]
+            self._check_next(rows, dates[idx])
+
+            step_rows = new_rows.iloc[idx]
+            feats = self._features(plan, step_rows, rows)
+            for name, val in feats.items():
+                values[name][idx] = val
+            self._push(step_rows, rows)
+            self.last_date[rows] = dates[idx]
+
+        feats = pd.DataFrame(values, index=new_rows.index)[[s.name for s in plan]]
+        return pd.concat([new_rows, feats], axis=1)
+
+    # -- serileştirme ---------------------------------------------------
+
+    def save(self, path):
+        meta = {
+            "freq": self.freq,
+            "target_cols": list(self.target_cols),
+            "outlier_cols": list(self.outlier_cols),
+            "horizons": list(self.horizons),
+            "group_col": self.group_col,
+            "date_col": self.date_col,
+            "keys": self.keys,
+            "targets": self.targets,
+            "outliers": self.outliers,
+        }
+        arrays = {
+            "n_obs": self.n_obs,
+            "last_date": self.last_date.astype("int64"),
+        }
+        for c in self.targets:
+            arrays[f"buf::{c}"] = self.buf[c]
+            arrays[f"center::{c}"] = self.center[c]
+            arrays[f"run::{c}"] = self.run[c]
+            for w in self.windows:
+                arrays[f"s1::{c}::{w}"] = self.s1[c][w]
+                arrays[f"s2::{c}::{w}"] = self.s2[c][w]
+                arrays[f"nn::{c}::{w}"] = self.nn[c][w]
+        for o in self.outliers:
+            arrays[f"obuf::{o}"] = self.obuf[o]
+        with open(path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta, ensure_ascii=False)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            state = cls(
+                freq=meta["freq"], target_cols=meta["target_cols"], outlier_cols=meta["outlier_cols"],
+                horizons=meta["horizons"], group_col=meta["group_col"], date_col=meta["date_col"],
+            )
+            state.keys = meta["keys"]
+            state.index = {k: i for i, k in enumerate(state.keys)}
+            state.targets = meta["targets"]
+            state.outliers = meta["outliers"]
+            state.n_obs = data["n_obs"]
+            state.last_date = data["last_date"].astype("datetime64[ns]")
+            for c in state.targets:
+                state.buf[c] = data[f"buf::{c}"]
+                state.center[c] = data[f"center::{c}"]
+                state.run[c] = data[f"run::{c}"]
+                state.s1[c] = {w: data[f"s1::{c}::{w}"] for w in state.windows}
+                state.s2[c] = {w: data[f"s2::{c}::{w}"] for w in state.windows}
+                state.nn[c] = {w: data[f"nn::{c}::{w}"] for w in state.windows}
+            for o in state.outliers:
+                state.obuf[o] = data[f"obuf::{o}"]
+        return state
+
+
+def check_against_batch(df, n_new=30, freq="D", group_col=None, rtol=1e-7, atol=1e-9):
+    # Son n_new periyodu artımlı üretir ve toplu engineer_features ile
+    # karşılaştırır; kolon başına en büyük mutlak farkı döndürür.
+    from feature_engineering.feature_engineering_pipeline import engineer_features
+
+    batch = engineer_features(df, freq=freq, group_col=group_col)
+    state = IncrementalFeatureState(freq=freq, group_col=group_col)
+    df = state._sort(df)
+    pos = df.groupby(df[group_col] if group_col else np.zeros(len(df)), sort=False).cumcount()
+    size = df.groupby(df[group_col] if group_col else np.zeros(len(df)), sort=False)[df.columns[0]].transform("size")
+    is_new = (pos >= size - n_new).to_numpy()
+
+    state.fit(df[~is_new])
+    inc = state.update(df[is_new])
+
+    ref = batch[is_new].reset_index(drop=True)
+    inc = inc.reset_index(drop=True)[ref.columns]
+    report = {}
+    for col in ref.columns:
+        if not pd.api.types.is_numeric_dtype(ref[col]) or pd.api.types.is_bool_dtype(ref[col]):
+            continue
+        a = ref[col].to_numpy(dtype=np.float64)
+        b = inc[col].to_numpy(dtype=np.float64)
+        same_nan = np.array_equal(np.isnan(a), np.isnan(b))
+        diff = np.nanmax(np.abs(a - b)) if np.any(~np.isnan(a)) else 0.0
+        ok = same_nan and np.allclose(a, b, rtol=rtol, atol=atol, equal_nan=True)
+        report[col] = {"max_abs_diff": diff, "nan_uyumu": same_nan, "ok": ok}
+    return pd.DataFrame(report).T
+
+
+if __name__ == "__main__":
+    df = read_frame(CLEAN)
+    report = check_against_batch(df)
+    print(report[~report["ok"].astype(bool)] if not report["ok"].all() else "Artımlı ve toplu özellikler tutarlı.")
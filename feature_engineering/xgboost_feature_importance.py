@@ -4,19 +4,20 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from xgboost import XGBRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error
+from data_pipeline.storage import read_frame, find_dataset, FINAL
+from model_experiments.model_cache import fingerprint, get_or_fit
 
 HERE = Path(__file__).resolve().parent
-CSV_PATH = HERE / "data" / "daily_engagements_final.csv"
+DATA_PATH = find_dataset(FINAL)
 OUT_DIR = HERE / "_outputs"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-print(f"CSV okunuyor: {CSV_PATH}")
-assert CSV_PATH.exists(), f"CSV bulunamadı: {CSV_PATH}"
+print(f"Veri okunuyor: {DATA_PATH}")
+assert DATA_PATH is not None, f"Veri seti bulunamadı: {FINAL}"
 
-df = pd.read_csv(CSV_PATH)
+df = read_frame(FINAL)
 
 if "event_date" in df.columns:
-    df["event_date"] = pd.to_datetime(df["event_date"], errors="coerce")
     df = df.sort_values("event_date").reset_index(drop=True)
 
 target = "ortalama_sure"
@@ -43,7 +44,7 @@ y_train, y_test = y_all.iloc[:split_idx], y_all.iloc[split_idx:]
 
 print(f"Train: {X_train.shape}, Test: {X_test.shape}")
 
-model = XGBRegressor(
+xgb_params = dict(
     n_estimators=500,
     learning_rate=0.05,
     max_depth=5,
@@ -55,7 +56,17 @@ model = XGBRegressor(
     eval_metric="rmse"
 )
 
-model.fit(X_train, y_train, eval_set=[(X_test, y_test)], verbose=False)
+
+def _fit():
+    model = XGBRegressor(**xgb_params)
+    return model.fit(X_train, y_train, eval_set=[(X_test, y_test)], verbose=False)
+
+
+# Aynı veri ve parametrelerle daha önce eğitildiyse model önbellekten yüklenir.
+cache_key = fingerprint(X_train, y_train, X_test, y_test, model="xgboost", **xgb_params)
+model, from_cache = get_or_fit("xgboost", cache_key, _fit)
+if from_cache:
+    print("Model önbellekten yüklendi.")
 
 y_pred = model.predict(X_test)
 mse = mean_squared_error(y_test, y_pred)
@@ -0,0 +1,217 @@
+import logging
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from data_pipeline.granularity import freq_config, normalize_freq, DEFAULT_FREQ
+from feature_engineering.holiday_calendar import holidays_for
+from model_experiments.prophet_prediction import REGRESSORS as PROPHET_REGRESSORS, forecast_metrics, run_prophet_model
+from model_experiments.sarimax_search import limit_blas_threads
+from model_experiments.sarimax_state import SarimaxState, sarimax_frame, sarimax_regressors
+
+
+MODELS = ("prophet", "sarimax")
+HORIZON_DAYS = 40
+STEP_DAYS = 30
+N_FOLDS = 6
+MIN_TRAIN_DAYS = 120
+
+# İşçi süreçteki paylaşılan tablo ve sabit girdiler (initializer ile bir kez kurulur).
+_worker = {}
+
+
+def _widen(values):
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]")
+    if np.issubdtype(values.dtype, np.integer) or values.dtype == bool:
+        return values.astype(np.int64)
+    return values.astype(np.float64)
+
+
+class SharedFrame:
+    # Sayısal/tarih kolonlarını tek bir paylaşılan bellek bloğunda kolon
+    # kolon tutar. İşçiler ada göre bağlanıp kopyasız numpy görünümü alır;
+    # böylece tablo her katman (fold) için yeniden pickle edilmez.
+
+    def __init__(self, df=None, spec=None):
+        if df is not None:
+            # Her kolon 8 baytlık tipe genişletilir (tarih, float64, int64).
+            values = {c: _widen(df[c].to_numpy()) for c in df.columns}
+            self.columns = list(values)
+            self.dtypes = [str(v.dtype) for v in values.values()]
+            self.rows = len(df)
+            self.shm = shared_memory.SharedMemory(create=True, size=max(8 * self.rows * len(self.columns), 1))
+            self.owner = True
+            for i, c in enumerate(self.columns):
+                self._view(i)[:] = values[c]
+        else:
+            name, self.columns, self.dtypes, self.rows = spec
+            # Blok ana sürece ait; yalnızca o unlink eder.
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+
+    @property
+    def spec(self):
+        return self.shm.name, self.columns, self.dtypes, self.rows
+
+    def _view(self, i):
+        return np.ndarray(self.rows, dtype=self.dtypes[i], buffer=self.shm.buf, offset=8 * self.rows * i)
+
+    def frame(self, start=0, stop=None):
+        # [start, stop) satırlarının kopyası (görünümler bloğu açık tutmasın diye).
+        return pd.DataFrame({c: self._view(i)[start:stop].copy() for i, c in enumerate(self.columns)})
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def make_cutoffs(n_rows, horizon, n_folds=N_FOLDS, step=None, min_train=1, window=None):
+    # Sondan geriye doğru (train_start, cutoff, test_end) konum üçlüleri;
+    # eğitim [train_start, cutoff), test [cutoff, test_end). window verilirse
+    # kayan pencere (sabit eğitim uzunluğu), yoksa genişleyen pencere.
+    step = step or horizon
+    folds = []
+    cutoff = n_rows - horizon
+    while len(folds) < n_folds and cutoff >= max(min_train, window or 0):
+        start = cutoff - window if window else 0
+        folds.append((start, cutoff, cutoff + horizon))
+        cutoff -= step
+    if not folds:
+        raise ValueError(f"Geriye dönük test için veri yetersiz ({n_rows} satır, ufuk {horizon})")
+    return folds[::-1]
+
+
+def init_worker(shared, blas_threads=1):
+    # Backtest ve ayar araması işçilerinin ortak kurulumu. shared: işçide blok
+    # spesifikasyonu, seri çalışmada SharedFrame'in kendisi. Havuzda her işçi
+    # tek BLAS thread'i kullanır; seri çalışmada (blas_threads=None) ana
+    # sürecin ayarına dokunulmaz. Dönüş: işçi sözlüğüne eklenecek girdiler.
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    logging.getLogger("prophet").setLevel(logging.WARNING)
+    warnings.filterwarnings("ignore")
+    limits = limit_blas_threads(blas_threads) if blas_threads else None
+    frame = shared if isinstance(shared, SharedFrame) else SharedFrame(spec=shared)
+    return {"frame": frame, "limits": limits}
+
+
+def _init_worker(shared, holidays_df, freq, sarimax_order, blas_threads=1):
+    _worker.update(init_worker(shared, blas_threads), holidays=holidays_df, freq=freq, sarimax_order=sarimax_order)
+
+
+def _fit_prophet(df, horizon, holidays_df, freq):
+    regressors = PROPHET_REGRESSORS[normalize_freq(freq)]
+    data = df.rename(columns={"ds": "event_date", "y": "ortalama_sure"})
+    # Yalnızca yhat kullanılır; aralık simülasyonu atlanır. Fold modelleri
+    # yeniden kullanılmaz, önbelleğe yazılmaz.
+    forecast, _, _, _, _ = run_prophet_model(
+        data, holidays_df, horizon, regressors=regressors, freq=freq, cache=False, interval_mode="none"
+    )
+    return forecast["yhat"].to_numpy()[-horizon:]
+
+
+def _fit_sarimax(df, horizon, freq, order=None):
+    exog_cols = sarimax_regressors(freq) + ["holiday_dummy"]
+    train, test = df.iloc[:-horizon].set_index("ds"), df.iloc[-horizon:].set_index("ds")
+    state = SarimaxState(exog_cols, freq=freq, order=order).fit(train["y"], train)
+    return np.asarray(state.forecast(test).predicted_mean)
+
+
+def _run_fold(task):
+    model, fold, (start, cutoff, end) = task
+    df = _worker["frame"].frame(start, end)
+    df["ds"] = pd.to_datetime(df["ds"])
+    horizon = end - cutoff
+    t0 = time.perf_counter()
+    if model == "prophet":
+        yhat = _fit_prophet(df, horizon, _worker["holidays"], _worker["freq"])
+    elif model == "sarimax":
+        yhat = _fit_sarimax(df, horizon, _worker["freq"], _worker["sarimax_order"])
+    else:
+        raise ValueError(f"Bilinmeyen model: {model}")
+    return pd.DataFrame({
+        "model": model,
+        "fold": fold,
+        "cutoff": df["ds"].iloc[-horizon],
+        "horizon": np.arange(1, horizon + 1),
+        "ds": df["ds"].to_numpy()[-horizon:],
+        "y": df["y"].to_numpy()[-horizon:],
+        "yhat": yhat,
+        "fit_sn": time.perf_counter() - t0,
+    })
+
+
+def summarize(detail, y_all=None):
+    # Model ve ufuk başına forecast_metrics (MAE, ortalama yüzde hata, doğruluk);
+    # y_all: oranın paydası olan tüm seri (verilmezse test satırları).
+    y_all = detail["y"] if y_all is None else y_all
+    rows = [
+        {"model": model, "horizon": horizon, **forecast_metrics(g["y"], g["yhat"], y_all), "folds": g["fold"].nunique()}
+        for (model, horizon), g in detail.groupby(["model", "horizon"])
+    ]
+    return pd.DataFrame(rows, columns=["model", "horizon", "mae", "mape", "accuracy", "folds"])
+
+
+def backtest(df=None, models=MODELS, freq=DEFAULT_FREQ, horizon=None, n_folds=N_FOLDS, step=None,
+             window=None, min_train=None, workers=None, holidays_df=None, sarimax_order=None):
+    # Genişleyen (window=None) ya da kayan pencereli geriye dönük test.
+    # Her (model, fold) ayrı bir süreçte fit edilir; tablo paylaşılan
+    # bellekten okunur. Dönüş: (satır bazında tahminler, model×ufuk özeti).
+    cfg = freq_config(freq)
+    ppd = cfg["periods_per_day"]
+    horizon = horizon or HORIZON_DAYS * ppd
+    step = step or STEP_DAYS * ppd
+    min_train = min_train or MIN_TRAIN_DAYS * ppd
+
+    df = sarimax_frame(freq) if df is None else df
+    # Paylaşılan bloğa yalnızca modellerin kullandığı (sayısal) kolonlar girer.
+    columns = ["ds", "y"]
+    if "prophet" in models:
+        columns += PROPHET_REGRESSORS[normalize_freq(freq)]
+    if "sarimax" in models:
+        columns += sarimax_regressors(freq) + ["holiday_dummy"]
+    columns = list(dict.fromkeys(columns))
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        raise ValueError(f"Eksik kolonlar: {', '.join(missing)}")
+    df = df[columns].reset_index(drop=True)
+    holidays_df = holidays_for(df["ds"]) if holidays_df is None else holidays_df
+
+    folds = make_cutoffs(len(df), horizon, n_folds, step, min_train, window)
+    tasks = [(model, i, fold) for model in models for i, fold in enumerate(folds)]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+
+    shared = SharedFrame(df)
+    try:
+        if workers > 1:
+            initargs = (shared.spec, holidays_df, freq, sarimax_order)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+                parts = list(pool.map(_run_fold, tasks))
+        else:
+            _init_worker(shared, holidays_df, freq, sarimax_order, blas_threads=None)
+            try:
+                parts = [_run_fold(task) for task in tasks]
+            finally:
+                _worker.clear()
+    finally:
+        shared.close()
+
+    detail = pd.concat(parts, ignore_index=True)
+    return detail, summarize(detail, df["y"])
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    detail, summary = backtest(freq=DEFAULT_FREQ)
+    overall = detail.assign(abs_err=(detail["y"] - detail["yhat"]).abs()).groupby("model")["abs_err"].mean()
+
+    print(f"- GERİYE DÖNÜK TEST ({detail['fold'].nunique()} fold, {time.perf_counter() - t0:.1f} sn) -")
+    for model, mae in overall.items():
+        print(f"-{model}: ortalama MAE {mae:.2f} dakika")
+    print(summary.pivot(index="horizon", columns="model", values="mae").round(2).to_string())
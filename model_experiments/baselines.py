@@ -0,0 +1,142 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from data_pipeline.storage import read_frame, find_dataset, FINAL, PANEL_FEATURES
+from data_pipeline.granularity import freq_config, dataset_name, DEFAULT_FREQ
+from model_experiments.prophet_prediction import forecast_metrics
+
+
+# Tüm fonksiyonlar (seri × zaman) matrisinde çalışır; seri boyunca tek
+# NumPy geçişi, zaman boyunca en fazla bir döngü (SES).
+TARGET = "ortalama_sure"
+GROUP_COL = "segment"
+BASELINES = ("naive", "seasonal_naive", "moving_average", "ses")
+MA_WINDOW_DAYS = 7
+SEASON_DAYS = 7
+# SES için seri başına seçilen düzeltme katsayısı adayları.
+SES_ALPHAS = np.round(np.linspace(0.05, 1.0, 20), 2)
+
+
+def panel_matrix(panel, group_col=GROUP_COL, target=TARGET, date_col="event_date"):
+    # Uzun tablodan (seri adları, tarihler, seri × tarih matrisi); eksik hücreler NaN.
+    series_codes, keys = pd.factorize(panel[group_col], sort=True)
+    date_codes, dates = pd.factorize(pd.to_datetime(panel[date_col]), sort=True)
+    values = np.full((len(keys), len(dates)), np.nan)
+    values[series_codes, date_codes] = panel[target].to_numpy(dtype=np.float64)
+    return pd.Index(keys), pd.DatetimeIndex(dates), values
+
+
+def stack_series(arrays):
+    # Farklı uzunluktaki serileri sağa hizalı bir matriste toplar; böylece
+    # son test_gun_sayisi kolon her serinin kendi son periyotlarıdır.
+    length = max((len(a) for a in arrays), default=0)
+    values = np.full((len(arrays), length), np.nan)
+    for i, a in enumerate(arrays):
+        if len(a):
+            values[i, length - len(a):] = a
+    return values
+
+
+def ffill(values):
+    # Satır boyunca ileri doldurma (baştaki NaN'lar kalır).
+    idx = np.where(np.isnan(values), 0, np.arange(values.shape[1]))
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return values[np.arange(values.shape[0])[:, None], idx]
+
+
+def naive(train, horizon):
+    last = ffill(train)[:, -1]
+    return np.repeat(last[:, None], horizon, axis=1)
+
+
+def seasonal_naive(train, horizon, season):
+    # Son tam sezon, ufuk boyunca tekrarlanır.
+    last = ffill(train)[:, -season:]
+    reps = -(-horizon // season)
+    return np.tile(last, (1, reps))[:, :horizon]
+
+
+def moving_average(train, horizon, window):
+    with warnings.catch_warnings():
+        # Penceresi tamamen boş seriler NaN kalır.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        level = np.nanmean(train[:, -window:], axis=1)
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+def ses(train, horizon, alphas=SES_ALPHAS):
+    # Basit üstel düzeltme; her seri için alpha, tek adım hata kareleri
+    # toplamını en küçükleyen aday olur. Tüm (alpha, seri) çiftleri zaman
+    # üzerinde tek döngüde birlikte güncellenir; NaN gözlemde seviye değişmez.
+    alphas = np.asarray(alphas, dtype=np.float64)[:, None]
+    x = np.asarray(train, dtype=np.float64)
+    first = np.argmax(np.isfinite(x), axis=1)
+    level = np.broadcast_to(x[np.arange(len(x)), first], (len(alphas), len(x))).copy()
+    sse = np.zeros_like(level)
+    for t in range(1, x.shape[1]):
+        obs = x[:, t]
+        err = obs - level
+        valid = np.isfinite(err) & (t > first)
+        sse += np.where(valid, err ** 2, 0.0)
+        level = np.where(valid, level + alphas * err, level)
+    best = np.argmin(sse, axis=0)
+    final = level[best, np.arange(len(x))]
+    return np.repeat(final[:, None], horizon, axis=1), alphas[best, 0]
+
+
+def forecast(train, horizon, method, freq=DEFAULT_FREQ):
+    ppd = freq_config(freq)["periods_per_day"]
+    if method == "naive":
+        return naive(train, horizon)
+    if method == "seasonal_naive":
+        return seasonal_naive(train, horizon, SEASON_DAYS * ppd)
+    if method == "moving_average":
+        return moving_average(train, horizon, MA_WINDOW_DAYS * ppd)
+    if method == "ses":
+        return ses(train, horizon)[0]
+    raise ValueError(f"method {', '.join(BASELINES)} olmalı")
+
+
+def metrics(values, pred, test_gun_sayisi):
+    # Seri başına prophet_prediction.forecast_metrics (payda tüm dönem).
+    return forecast_metrics(values[:, -test_gun_sayisi:], pred, values, axis=1)
+
+
+def run_baselines(values, test_gun_sayisi=40, methods=BASELINES, freq=DEFAULT_FREQ, keys=None):
+    # values: seri × zaman matrisi. Son test_gun_sayisi periyodu test olur.
+    # Dönüş: ({yöntem: seri × ufuk tahmin}, seri × yöntem metrik tablosu).
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    if values.shape[1] <= test_gun_sayisi:
+        raise ValueError(f"Test gün sayısı ({test_gun_sayisi}) veri uzunluğundan ({values.shape[1]}) küçük olmalı")
+    train = values[:, :-test_gun_sayisi]
+    keys = pd.RangeIndex(len(values)) if keys is None else pd.Index(keys)
+
+    forecasts, rows = {}, []
+    for method in methods:
+        pred = forecast(train, test_gun_sayisi, method, freq)
+        forecasts[method] = pred
+        rows.append(pd.DataFrame({"seri": keys, "yontem": method, **metrics(values, pred, test_gun_sayisi)}))
+    return forecasts, pd.concat(rows, ignore_index=True)
+
+
+def best_method(table):
+    # Seri başına en düşük MAE'li yöntem.
+    idx = table.dropna(subset=["mae"]).groupby("seri")["mae"].idxmin()
+    return table.loc[idx].reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    test_gun_sayisi = 40 * freq_config(DEFAULT_FREQ)["periods_per_day"]
+    panel_name = dataset_name(PANEL_FEATURES, DEFAULT_FREQ)
+    if find_dataset(panel_name) is not None:
+        keys, dates, values = panel_matrix(read_frame(panel_name, columns=[GROUP_COL, "event_date", TARGET]))
+    else:
+        df = read_frame(dataset_name(FINAL, DEFAULT_FREQ), columns=["event_date", TARGET])
+        keys, dates, values = panel_matrix(df.assign(**{GROUP_COL: "toplam"}))
+
+    forecasts, table = run_baselines(values, test_gun_sayisi, keys=keys)
+    print(f"- TEMEL TAHMİNLER ({len(keys)} seri, {values.shape[1]} periyot) -")
+    print(table.groupby("yontem")[["mae", "mape", "accuracy"]].mean().round(2).to_string())
+    print(best_method(table)["yontem"].value_counts().to_string())
@@ -0,0 +1,435 @@
+import logging
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from data_pipeline.storage import read_frame, write_frame, find_dataset, FrameWriter, PANEL_FEATURES
+from data_pipeline.granularity import freq_config, normalize_freq, dataset_name, DEFAULT_FREQ
+from feature_engineering.holiday_calendar import get_calendar, holidays_for
+from model_experiments.baselines import BASELINES, forecast as baseline_forecast, stack_series
+from model_experiments.prophet_prediction import REGRESSORS as PROPHET_REGRESSORS, run_prophet_model
+from model_experiments.sarimax_search import limit_blas_threads
+from model_experiments.sarimax_state import SarimaxState, sarimax_regressors, TARGET
+
+
+MODELS = ("prophet", "sarimax", "xgboost")
+# Tüm seriler için tek NumPy geçişinde hesaplanan ucuz katman (None: kapalı).
+# Model fit edilemeyen kısa ya da hatalı seriler için de tahmin kalır.
+BASELINE = "ses"
+GROUP_COL = "segment"
+HORIZON_DAYS = 40
+# Ufkun üstüne en az bu kadar eğitim periyodu olmayan seriler fit edilmez.
+MIN_TRAIN_DAYS = 60
+# İşçi başına bellek sınırı (MB, RSS); 0 ya da boş: sınır yok.
+WORKER_MEMORY_MB = int(os.getenv("ENGAGEMENT_BATCH_WORKER_MB", "4096") or 0)
+WATCH_INTERVAL = 0.5
+MEMORY_EXIT_CODE = 137
+# Havuz çöktüğünde açık görevlerin hata metni bununla başlar.
+POOL_BROKEN = "BrokenProcessPool"
+# Sızıntılar birikmesin diye işçi süreç bu kadar seriden sonra yenilenir.
+TASKS_PER_CHILD = 200
+RETRIES = 1
+# Çıktı bu kadar satır biriktikçe tek parça halinde yazılır.
+WRITE_ROWS = 50_000
+REPORT_EVERY = 10.0
+INTERVAL_WIDTH = 0.8
+BATCH_FORECASTS = "daily_batch_forecasts"
+FIT_TIMES = "daily_batch_fit_times"
+# Geçmiş süresi olmayan seriler için satır başına kaba süre tahmini (sn).
+DEFAULT_SEC_PER_ROW = {"prophet": 1e-3, "sarimax": 2e-3, "xgboost": 5e-4}
+SARIMAX_ORDER = None
+XGB_PARAMS = dict(
+    n_estimators=300,
+    learning_rate=0.05,
+    max_depth=5,
+    subsample=0.9,
+    colsample_bytree=0.9,
+    reg_lambda=1.0,
+    random_state=42,
+    n_jobs=1,
+)
+# XGBoost girdisi olmayan kolonlar (hedef ve onu doğrudan veren sayımlar).
+XGB_EXCLUDE = {"event_date", "ds", "y", "oturum_sayisi", "toplam_izleme_suresi_dk", TARGET}
+OUTPUT_COLUMNS = ["seri", "model", "ds", "y", "yhat", "yhat_lower", "yhat_upper"]
+
+# İşçi süreçteki sabit girdiler (initializer ile bir kez kurulur).
+_worker = {}
+
+
+def _watch_memory(memory_mb, interval=WATCH_INTERVAL):
+    # RLIMIT_AS yerine yerleşik bellek (RSS) izlenir: adres alanı sınırı
+    # OpenBLAS/XGBoost'un tembel yüklemelerini bozuyor. Sınır aşılınca süreç
+    # kapanır; havuz yeniden kurulur ve açık görevler yeniden denenir.
+    if not memory_mb or not os.path.exists("/proc/self/statm"):
+        return
+    page = os.sysconf("SC_PAGE_SIZE")
+    limit = int(memory_mb) * 2**20
+
+    def _loop():
+        while True:
+            with open("/proc/self/statm") as f:
+                rss = int(f.read().split()[1]) * page
+            if rss > limit:
+                os._exit(MEMORY_EXIT_CODE)
+            time.sleep(interval)
+
+    threading.Thread(target=_loop, daemon=True).start()
+
+
+def _init_worker(holidays_df, freq, horizon, memory_mb):
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    logging.getLogger("prophet").setLevel(logging.WARNING)
+    warnings.filterwarnings("ignore")
+    # Her işçi tek çekirdek kullanır; paralellik süreç sayısından gelir.
+    _worker["limits"] = limit_blas_threads(1)
+    _watch_memory(memory_mb)
+    _worker.update(holidays=holidays_df, freq=freq, horizon=horizon)
+
+
+# -- model başına tek seri tahmini ------------------------------------------
+# Hepsi son `horizon` periyodu dışarıda bırakıp (yhat, alt, üst) döndürür.
+
+def _forecast_prophet(df, horizon, holidays_df, freq):
+    data = df.rename(columns={"ds": "event_date", "y": TARGET})
+    # Binlerce seri model önbelleğini yalnızca döndürür; önbellek kapalı.
+    forecast, _, _, _, _ = run_prophet_model(
+        data, holidays_df, horizon, regressors=PROPHET_REGRESSORS[normalize_freq(freq)], freq=freq,
+        cache=False, interval_mode="analytic",
+    )
+    tail = forecast.iloc[-horizon:]
+    return tail["yhat"].to_numpy(), tail["yhat_lower"].to_numpy(), tail["yhat_upper"].to_numpy()
+
+
+def _forecast_sarimax(df, horizon, holidays_df, freq):
+    exog_cols = sarimax_regressors(freq) + ["holiday_dummy"]
+    data = df[["ds", "y"] + exog_cols].dropna().set_index("ds")
+    train, test = data.iloc[:-horizon], data.iloc[-horizon:]
+    state = SarimaxState(exog_cols, freq=freq, order=SARIMAX_ORDER).fit(train["y"], train, stepwise=True)
+    pred = state.forecast(test)
+    ci = np.asarray(pred.conf_int(alpha=1 - INTERVAL_WIDTH))
+    return np.asarray(pred.predicted_mean), ci[:, 0], ci[:, 1]
+
+
+def _forecast_xgboost(df, horizon, holidays_df, freq):
+    from xgboost import XGBRegressor
+
+    features = [c for c in df.select_dtypes(include=[np.number]).columns if c not in XGB_EXCLUDE]
+    train, test = df.iloc[:-horizon], df.iloc[-horizon:]
+    train = train.dropna(subset=["y"])
+    model = XGBRegressor(**XGB_PARAMS).fit(train[features], train["y"])
+    yhat = model.predict(test[features]).astype(np.float64)
+    # Aralık: eğitim artıklarının quantile'ları (nokta tahmini etrafında).
+    resid = train["y"].to_numpy() - model.predict(train[features])
+    lo, hi = np.quantile(resid, [(1 - INTERVAL_WIDTH) / 2, (1 + INTERVAL_WIDTH) / 2])
+    return yhat, yhat + lo, yhat + hi
+
+
+FORECASTERS = {
+    "prophet": _forecast_prophet,
+    "sarimax": _forecast_sarimax,
+    "xgboost": _forecast_xgboost,
+}
+
+
+def _run_task(task):
+    series, model, df, _ = task
+    horizon = _worker["horizon"]
+    t0 = time.perf_counter()
+    try:
+        yhat, lower, upper = FORECASTERS[model](df, horizon, _worker["holidays"], _worker["freq"])
+    except Exception as e:
+        # MemoryError dahil; süreç ayakta kalır, görev yeniden denenebilir.
+        return series, model, None, time.perf_counter() - t0, repr(e)
+    out = pd.DataFrame({
+        "seri": str(series),
+        "model": model,
+        "ds": df["ds"].to_numpy()[-horizon:],
+        "y": df["y"].to_numpy(dtype=np.float64)[-horizon:],
+        "yhat": np.asarray(yhat, dtype=np.float64),
+        "yhat_lower": np.asarray(lower, dtype=np.float64),
+        "yhat_upper": np.asarray(upper, dtype=np.float64),
+    }, columns=OUTPUT_COLUMNS)
+    return series, model, out, time.perf_counter() - t0, None
+
+
+# -- zamanlama -----------------------------------------------------------------
+
+def load_fit_times(freq=DEFAULT_FREQ, data_dir=None):
+    name = dataset_name(FIT_TIMES, freq)
+    if find_dataset(name, data_dir) is None:
+        return pd.DataFrame(columns=["seri", "model", "satir", "fit_sn"])
+    return read_frame(name, data_dir=data_dir)
+
+
+def expected_seconds(tasks, history):
+    # Önceki gecenin süresi varsa o, yoksa modelin satır başı ortalaması
+    # (o da yoksa DEFAULT_SEC_PER_ROW) × seri uzunluğu.
+    past = {(str(s), m): sn for s, m, sn in history[["seri", "model", "fit_sn"]].itertuples(index=False)}
+    per_row = (history["fit_sn"] / history["satir"].clip(lower=1)).groupby(history["model"]).median().to_dict()
+    expected = []
+    for series, model, df, _ in tasks:
+        sn = past.get((str(series), model))
+        if sn is None:
+            sn = per_row.get(model, DEFAULT_SEC_PER_ROW[model]) * len(df)
+        expected.append(sn)
+    return expected
+
+
+class _Progress:
+    def __init__(self, total, every, per_series=1):
+        # per_series: seri başına görev sayısı (model sayısı); verim seri/sn verilir.
+        self.total = total
+        self.every = every
+        self.per_series = per_series
+        self.t0 = time.perf_counter()
+        self.last = self.t0
+        self.done = 0
+        self.failed = 0
+
+    def step(self, ok):
+        self.done += 1
+        self.failed += not ok
+        now = time.perf_counter()
+        if self.every and (now - self.last >= self.every or self.done == self.total):
+            self.last = now
+            print(self.line())
+
+    def rate(self):
+        return self.done / max(time.perf_counter() - self.t0, 1e-9)
+
+    def line(self):
+        rate = self.rate()
+        remaining = (self.total - self.done) / rate if rate else float("nan")
+        return (f"[{self.done}/{self.total} görev] {rate / self.per_series:.2f} seri/sn, "
+                f"hata {self.failed}, kalan ~{remaining:.0f} sn")
+
+
+class _Output:
+    # Sonuç parçalarını biriktirip WRITE_ROWS'ta bir FrameWriter parçası olarak yazar.
+
+    def __init__(self, name, data_dir, write_rows):
+        self.writer = FrameWriter(name, data_dir=data_dir)
+        self.write_rows = write_rows
+        self.parts = []
+        self.rows = 0
+
+    def add(self, frame):
+        self.parts.append(frame)
+        self.rows += len(frame)
+        if self.rows >= self.write_rows:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.writer.write(pd.concat(self.parts, ignore_index=True))
+            self.parts, self.rows = [], 0
+
+    def close(self):
+        self.flush()
+        if self.writer.schema is None:
+            # Hiç başarılı seri yoksa da boş ama şemalı bir çıktı bırakılır.
+            self.writer.write(pd.DataFrame({c: pd.Series(dtype=t) for c, t in (
+                ("seri", object), ("model", object), ("ds", "datetime64[ns]"), ("y", float),
+                ("yhat", float), ("yhat_lower", float), ("yhat_upper", float),
+            )}))
+        return self.writer.close()
+
+
+def _schedule(tasks, expected, run, retries, progress, output, times, failures):
+    # run(görevler) -> sonuç üreteci. Uzun sürecek görevler önce başlar ki
+    # gecenin sonunda tek bir büyük seri havuzu bekletmesin (LPT).
+    # Havuz çöktüğünde hangi görevin işçiyi öldürdüğü bilinmez: o an açık
+    # görevler deneme sayılmadan şüpheli olur ve tek başına yeniden çalışır;
+    # yalnızca tek başınayken havuzu çökerten görevin denemesi harcanır.
+    order = np.argsort(-np.asarray(expected), kind="stable")
+    queue = [tasks[i] for i in order]
+    suspects = []
+    while queue or suspects:
+        if queue:
+            batch, queue, isolated = queue, [], False
+        else:
+            batch, suspects, isolated = suspects[:1], suspects[1:], True
+        for task, (series, model, out, sn, error) in run(batch):
+            attempt = task[3]
+            broken = error is not None and error.startswith(POOL_BROKEN)
+            if error is None:
+                output.add(out)
+                times.append({"seri": str(series), "model": model, "satir": len(task[2]), "fit_sn": sn})
+                progress.step(True)
+            elif broken and not isolated:
+                suspects.append(task)
+            elif attempt < retries:
+                (suspects if broken else queue).append(task[:3] + (attempt + 1,))
+            else:
+                failures.append({"seri": str(series), "model": model, "deneme": attempt + 1, "hata": error})
+                progress.step(False)
+
+
+def _pool_runner(workers, initargs, window):
+    # Görevleri havuza en fazla `window` kadar açık iş olacak şekilde verir.
+    # Bir işçi öldürülürse (ör. bellek sınırında) havuz yeniden kurulur ve
+    # açık görevler POOL_BROKEN hatasıyla döner; yeniden deneme _schedule'dadır.
+    state = {"pool": None}
+
+    def _new_pool():
+        return ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=initargs,
+            max_tasks_per_child=TASKS_PER_CHILD,
+        )
+
+    def run(queue):
+        queue = list(queue)
+        pending = {}
+        while queue or pending:
+            if state["pool"] is None:
+                state["pool"] = _new_pool()
+            while queue and len(pending) < window:
+                task = queue.pop(0)
+                pending[state["pool"].submit(_run_task, task)] = task
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            broken = False
+            for fut in done:
+                task = pending.pop(fut)
+                try:
+                    yield task, fut.result()
+                except BrokenProcessPool as e:
+                    broken = True
+                    yield task, (task[0], task[1], None, 0.0, repr(e))
+            if broken:
+                for fut, task in pending.items():
+                    yield task, (task[0], task[1], None, 0.0, f"{POOL_BROKEN}: işçi süreç sonlandı (bellek sınırı?)")
+                pending = {}
+                state["pool"].shutdown(cancel_futures=True)
+                state["pool"] = None
+
+    def close():
+        if state["pool"] is not None:
+            state["pool"].shutdown(cancel_futures=True)
+
+    return run, close
+
+
+def _write_baseline(series, method, horizon, freq, output):
+    # Ufuktan uzun tüm seriler, sağa hizalı tek matriste birlikte tahmin edilir.
+    series = [(key, df) for key, df in series if len(df) > horizon + 1]
+    if not series:
+        return 0
+    values = stack_series([df["y"].to_numpy(dtype=np.float64) for _, df in series])
+    pred = baseline_forecast(values[:, :-horizon], horizon, method, freq)
+    # Temel yöntemler aralık üretmez; kolonlar şema için float NaN olur.
+    missing = np.full(pred.size, np.nan)
+    output.add(pd.DataFrame({
+        "seri": np.repeat([str(key) for key, _ in series], horizon),
+        "model": method,
+        "ds": np.concatenate([df["ds"].to_numpy()[-horizon:] for _, df in series]),
+        "y": values[:, -horizon:].ravel(),
+        "yhat": pred.ravel(),
+        "yhat_lower": missing,
+        "yhat_upper": missing,
+    }, columns=OUTPUT_COLUMNS))
+    return len(series)
+
+
+def split_series(panel, group_col=GROUP_COL, target=TARGET):
+    # Panelden (seri adı, seri tablosu) çiftleri; tablo ds/y adlandırmalı,
+    # SARIMAX için holiday_dummy eklenmiş ve tarihe göre sıralı.
+    panel = panel.rename(columns={"event_date": "ds", target: "y"})
+    panel["ds"] = pd.to_datetime(panel["ds"])
+    if "holiday_dummy" not in panel.columns:
+        panel["holiday_dummy"] = get_calendar().dummy(panel["ds"])
+    series = []
+    for key, df in panel.groupby(group_col, observed=True, sort=False):
+        series.append((key, df.drop(columns=[group_col]).sort_values("ds").reset_index(drop=True)))
+    return series
+
+
+def run_batch(panel=None, models=MODELS, group_col=GROUP_COL, freq=DEFAULT_FREQ, horizon=None, workers=None,
+              memory_mb=WORKER_MEMORY_MB, retries=RETRIES, output=None, data_dir=None, report_every=REPORT_EVERY,
+              write_rows=WRITE_ROWS, baseline=BASELINE):
+    # Paneldeki her seri için her modeli fit edip son `horizon` periyodu
+    # tahmin eder; sonuçlar tek bir kolonlu veri setine parça parça yazılır.
+    # baseline verilirse önce tüm seriler için o temel yöntemin tahmini yazılır.
+    # Dönüş: (çıktı yolu, özet sözlüğü, başarısız seriler tablosu).
+    cfg = freq_config(freq)
+    ppd = cfg["periods_per_day"]
+    horizon = horizon or HORIZON_DAYS * ppd
+    unknown = [m for m in models if m not in FORECASTERS]
+    if unknown:
+        raise ValueError(f"Bilinmeyen model: {', '.join(unknown)} ({', '.join(FORECASTERS)} olmalı)")
+    if baseline is not None and baseline not in BASELINES:
+        raise ValueError(f"baseline {', '.join(BASELINES)} olmalı")
+
+    panel = read_frame(dataset_name(PANEL_FEATURES, freq), data_dir=data_dir) if panel is None else panel
+    if group_col not in panel.columns:
+        raise ValueError(f"Eksik kolon: {group_col}")
+    min_rows = horizon + MIN_TRAIN_DAYS * ppd
+    all_series = split_series(panel, group_col)
+    series = [(k, df) for k, df in all_series if len(df) >= min_rows]
+    holidays_df = holidays_for(panel["event_date"] if "event_date" in panel.columns else panel["ds"])
+
+    tasks = [(key, model, df, 0) for key, df in series for model in models]
+    history = load_fit_times(freq, data_dir)
+    expected = expected_seconds(tasks, history)
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+
+    progress = _Progress(len(tasks), report_every, len(models))
+    out = _Output(output or dataset_name(BATCH_FORECASTS, freq), data_dir, write_rows)
+    times, failures = [], []
+    try:
+        n_baseline = _write_baseline(all_series, baseline, horizon, freq, out) if baseline else 0
+        if workers > 1:
+            run, close = _pool_runner(workers, (holidays_df, freq, horizon, memory_mb), window=2 * workers)
+            try:
+                _schedule(tasks, expected, run, retries, progress, out, times, failures)
+            finally:
+                close()
+        else:
+            # Tek süreçte bellek sınırı uygulanmaz (ana süreci de kısıtlardı).
+            _init_worker(holidays_df, freq, horizon, None)
+            try:
+                run = lambda queue: ((task, _run_task(task)) for task in queue)
+                _schedule(tasks, expected, run, retries, progress, out, times, failures)
+            finally:
+                _worker.clear()
+        path = out.close()
+    except BaseException:
+        out.writer.abort()
+        raise
+
+    if times:
+        # Bu gecenin süreleri bir sonraki sıralamanın girdisi olur.
+        fresh = pd.DataFrame(times)
+        keys = set(zip(fresh["seri"], fresh["model"]))
+        old = history[[(str(s), m) not in keys for s, m in zip(history["seri"], history["model"])]]
+        write_frame(pd.concat([old, fresh], ignore_index=True), dataset_name(FIT_TIMES, freq), data_dir=data_dir)
+
+    elapsed = time.perf_counter() - progress.t0
+    summary = {
+        "seri": len(series),
+        "kisa_seri": len(all_series) - len(series),
+        "baseline_seri": n_baseline,
+        "gorev": len(tasks),
+        "basarili": len(times),
+        "basarisiz": len(failures),
+        "sure_sn": elapsed,
+        "seri_per_sn": len(times) / len(models) / elapsed if elapsed else float("nan"),
+        "fit_sn_toplam": float(sum(t["fit_sn"] for t in times)),
+    }
+    return path, summary, pd.DataFrame(failures, columns=["seri", "model", "deneme", "hata"])
+
+
+if __name__ == "__main__":
+    path, summary, failures = run_batch(freq=DEFAULT_FREQ)
+    print(f"- TOPLU TAHMİN ({summary['seri']} seri, {summary['gorev']} görev, {summary['sure_sn']:.1f} sn) -")
+    print(f"-Başarılı: {summary['basarili']} | başarısız: {summary['basarisiz']} | kısa seri: {summary['kisa_seri']} "
+          f"| temel tahminli seri: {summary['baseline_seri']}")
+    print(f"-Verim: {summary['seri_per_sn']:.2f} seri/sn (toplam fit {summary['fit_sn_toplam']:.1f} sn)")
+    if len(failures):
+        print(failures.to_string(index=False))
+    print(f"Tahminler: {path}")
@@ -0,0 +1,188 @@
+import contextlib
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_pipeline.storage import DATA_DIR
+
+
+# Fit edilmiş modeller için disk önbelleği. ENGAGEMENT_MODEL_CACHE=0 ile kapatılır.
+ENABLED = os.getenv("ENGAGEMENT_MODEL_CACHE", "1").lower() not in ("0", "false", "no")
+CACHE_DIR = os.getenv("ENGAGEMENT_MODEL_CACHE_DIR", os.path.join(DATA_DIR, "model_cache"))
+MAX_ENTRIES = int(os.getenv("ENGAGEMENT_MODEL_CACHE_ENTRIES", "32"))
+MAX_MB = float(os.getenv("ENGAGEMENT_MODEL_CACHE_MB", "512"))
+# Anahtar biçimi değişirse eski kayıtlar kendiliğinden geçersiz olsun diye.
+KEY_VERSION = 1
+
+
+def _update(h, obj):
+    if isinstance(obj, pd.DataFrame):
+        h.update(json.dumps([[str(c), str(t)] for c, t in obj.dtypes.items()]).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(f"{obj.name}|{obj.dtype}".encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"{obj.dtype}|{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    else:
+        h.update(json.dumps(obj, sort_keys=True, default=str).encode())
+
+
+def fingerprint(*frames, **config):
+    # Eğitim verisi (DataFrame/Series/dizi), tatil tablosu ve model
+    # ayarlarından kararlı bir anahtar; herhangi biri değişirse anahtar değişir.
+    h = hashlib.blake2b(digest_size=16)
+    _update(h, {"version": KEY_VERSION, **config})
+    for frame in frames:
+        _update(h, frame)
+    return h.hexdigest()
+
+
+# -- serileştiriciler ---------------------------------------------------
+
+def _save_prophet(model, path):
+    from prophet.serialize import model_to_json
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(model_to_json(model))
+
+
+def _load_prophet(path):
+    from prophet.serialize import model_from_json
+
+    with open(path, encoding="utf-8") as f:
+        return model_from_json(f.read())
+
+
+def _save_sarimax(results, path):
+    results.save(path)
+
+
+def _load_sarimax(path):
+    from statsmodels.tsa.statespace.mlemodel import MLEResults
+
+    return MLEResults.load(path)
+
+
+def _save_xgboost(model, path):
+    model.save_model(path)
+
+
+def _load_xgboost(path):
+    from xgboost import XGBRegressor
+
+    model = XGBRegressor()
+    model.load_model(path)
+    return model
+
+
+SERIALIZERS = {
+    "prophet": (".json", _save_prophet, _load_prophet),
+    "sarimax": (".pkl", _save_sarimax, _load_sarimax),
+    "xgboost": (".ubj", _save_xgboost, _load_xgboost),
+}
+
+
+class ModelCache:
+    # Her kayıt tek bir dosyadır: <tür>-<anahtar><uzantı>. Son erişim zamanı
+    # dosyanın mtime'ıdır (isabette güncellenir); kayıt sayısı ya da toplam
+    # boyut sınırı aşılınca en eski erişilenler silinir.
+
+    def __init__(self, cache_dir=None, max_entries=MAX_ENTRIES, max_mb=MAX_MB):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.max_entries = max_entries
+        self.max_mb = max_mb
+
+    def _path(self, kind, key):
+        if kind not in SERIALIZERS:
+            raise ValueError(f"Model türü {', '.join(SERIALIZERS)} olmalı")
+        return os.path.join(self.cache_dir, f"{kind}-{key}{SERIALIZERS[kind][0]}")
+
+    def get(self, kind, key):
+        path = self._path(kind, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            model = SERIALIZERS[kind][2](path)
+        except FileNotFoundError:
+            # Başka bir süreç aynı anda silmiş olabilir.
+            return None
+        except Exception:
+            # Bozuk ya da uyumsuz sürümle yazılmış kayıt: silinir, yeniden fit edilir.
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            return None
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        return model
+
+    def put(self, kind, key, model):
+        path = self._path(kind, key)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = path + ".tmp" + SERIALIZERS[kind][0]
+        SERIALIZERS[kind][1](model, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict()
+        return path
+
+    def entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return pd.DataFrame(columns=["dosya", "tur", "mb", "son_erisim"])
+        rows = []
+        for name in os.listdir(self.cache_dir):
+            kind = name.split("-", 1)[0]
+            if kind not in SERIALIZERS or ".tmp" in name:
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                # Başka bir süreç aynı anda silmiş olabilir.
+                continue
+            rows.append({"dosya": name, "tur": kind, "mb": stat.st_size / 2**20, "son_erisim": stat.st_mtime})
+        return (
+            pd.DataFrame(rows, columns=["dosya", "tur", "mb", "son_erisim"])
+            .sort_values("son_erisim", ascending=False)
+            .reset_index(drop=True)
+        )
+
+    def evict(self):
+        # En yeni erişilenden başlayarak sınırlara sığanlar tutulur.
+        entries = self.entries()
+        keep = (np.arange(len(entries)) < self.max_entries) & (entries["mb"].cumsum().to_numpy() <= self.max_mb)
+        removed = entries.loc[~keep, "dosya"].tolist()
+        for name in removed:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def clear(self):
+        for name in self.entries()["dosya"]:
+            os.remove(os.path.join(self.cache_dir, name))
+
+
+def resolve_cache(cache=None):
+    # cache: None (ortam ayarı), True/False ya da bir ModelCache.
+    if isinstance(cache, ModelCache):
+        return cache
+    if cache is None:
+        cache = ENABLED
+    return ModelCache() if cache else None
+
+
+def get_or_fit(kind, key, fit, cache=None):
+    # (model, önbellekten mi) döndürür; fit() yalnızca kayıt yoksa çağrılır.
+    cache = resolve_cache(cache)
+    if cache is not None:
+        model = cache.get(kind, key)
+        if model is not None:
+            return model, True
+    model = fit()
+    if cache is not None:
+        cache.put(kind, key, model)
+    return model, False
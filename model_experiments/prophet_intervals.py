@@ -0,0 +1,147 @@
+from statistics import NormalDist
+
+import numpy as np
+
+
+# prophet: Prophet'in kendi Monte Carlo'su (uncertainty_samples kadar örnek)
+# none:    aralık yok (yhat_lower/yhat_upper NaN)
+# numpy:   aynı üretici süreçten parça parça vektörel simülasyon
+# analytic: trend kayması + gözlem gürültüsü için kapalı form normal yaklaşım
+INTERVAL_MODES = ("prophet", "none", "numpy", "analytic")
+DEFAULT_SAMPLES = 1000
+# numpy modunda aynı anda bellekte tutulan satır sayısı (örnek × satır matrisi).
+CHUNK_ROWS = 256
+
+
+def _bounds(model):
+    lower_p = 100 * (1.0 - model.interval_width) / 2
+    upper_p = 100 * (1.0 + model.interval_width) / 2
+    return lower_p, upper_p
+
+
+def _trend_process(model, forecast):
+    # Prophet'in gelecekteki trend kayması süreci (_sample_uncertainty ile aynı
+    # parametreler): her adımda change_likelihood olasılıkla Laplace(0, mean_delta)
+    # eğim değişimi. Dönüş: gelecek satır maskesi, adım aralığı, olasılık, ölçek.
+    t = ((forecast["ds"] - model.start) / model.t_scale).to_numpy()
+    future = t > 1
+    future_t = t[future]
+    if len(future_t) > 1:
+        single_diff = np.diff(future_t).mean()
+    else:
+        single_diff = np.diff(model.history["t"].to_numpy()).mean()
+    likelihood = len(model.changepoints_t) * single_diff
+    mean_delta = np.mean(np.abs(model.params["delta"][0])) + 1e-8
+    return future, single_diff, likelihood, mean_delta
+
+
+def _check(model):
+    if model.growth not in ("linear", "flat") or model.mcmc_samples:
+        raise ValueError("numpy/analytic aralıkları yalnızca doğrusal ya da düz trendli MAP fit için")
+
+
+def analytic_intervals(model, forecast):
+    # Gelecekte h. adımdaki trend sapması, kaymaların ağırlıklı toplamıdır:
+    # u_h = d * sum_i x_i (h - i + 1/2), Var(x) = 2 p b^2. Toplamın kapalı formu
+    # Var(u_h) = d^2 2 p b^2 h (4h^2 - 1) / 12; gözlem gürültüsü sigma_obs ile eklenir.
+    _check(model)
+    lower_p, upper_p = _bounds(model)
+    z = NormalDist().inv_cdf(upper_p / 100)
+
+    y_scale = model.y_scale
+    sigma = float(np.ravel(model.params["sigma_obs"])[0]) * y_scale
+    var = np.full(len(forecast), sigma ** 2)
+    if model.growth == "linear":
+        future, single_diff, likelihood, mean_delta = _trend_process(model, forecast)
+        h = np.arange(1, future.sum() + 1, dtype=np.float64)
+        trend_var = single_diff ** 2 * 2 * likelihood * mean_delta ** 2 * h * (4 * h ** 2 - 1) / 12
+        mult = 1 + forecast["multiplicative_terms"].to_numpy()[future]
+        var[future] += trend_var * (y_scale * mult) ** 2
+
+    half = z * np.sqrt(var)
+    yhat = forecast["yhat"].to_numpy()
+    return yhat - half, yhat + half
+
+
+def simulated_intervals(model, forecast, samples=DEFAULT_SAMPLES, seed=None, chunk_rows=CHUNK_ROWS):
+    # Prophet'in örneklemesiyle aynı süreç, ama yalnızca gelecekteki satırlar
+    # için trend yolu simüle edilir ve satırlar chunk_rows'luk parçalar halinde
+    # işlenir (eğim ve seviye parça sınırında taşınır). Bellek: samples × chunk_rows.
+    # Geçmiş satırlarda trend belirsizliği yoktur; aralık gürültünün quantile'ıdır.
+    _check(model)
+    lower_p, upper_p = _bounds(model)
+    rng = np.random.default_rng(seed)
+
+    y_scale = model.y_scale
+    sigma = float(np.ravel(model.params["sigma_obs"])[0]) * y_scale
+    yhat = forecast["yhat"].to_numpy()
+    lower = np.empty(len(forecast))
+    upper = np.empty(len(forecast))
+
+    if model.growth == "linear":
+        future, single_diff, likelihood, mean_delta = _trend_process(model, forecast)
+    else:
+        future = np.zeros(len(forecast), dtype=bool)
+
+    past = np.flatnonzero(~future)
+    for lo in range(0, len(past), chunk_rows):
+        rows = past[lo:lo + chunk_rows]
+        sims = yhat[rows] + rng.normal(0, sigma, (samples, len(rows)))
+        lower[rows], upper[rows] = np.percentile(sims, [lower_p, upper_p], axis=0)
+
+    rows_future = np.flatnonzero(future)
+    if len(rows_future):
+        mult = 1 + forecast["multiplicative_terms"].to_numpy()
+        prev_shift = np.zeros(samples)
+        slope = np.zeros(samples)
+        level = np.zeros(samples)
+        for lo in range(0, len(rows_future), chunk_rows):
+            rows = rows_future[lo:lo + chunk_rows]
+            n = len(rows)
+            shift = rng.laplace(0, mean_delta, (samples, n)) * (rng.uniform(size=(samples, n)) < likelihood)
+            mat = (shift + np.concatenate([prev_shift[:, None], shift[:, :-1]], axis=1)) / 2
+            slopes = slope[:, None] + np.cumsum(mat, axis=1)
+            levels = level[:, None] + np.cumsum(slopes, axis=1)
+            prev_shift, slope, level = shift[:, -1], slopes[:, -1], levels[:, -1]
+
+            sims = (
+                yhat[rows]
+                + levels * single_diff * y_scale * mult[rows]
+                + rng.normal(0, sigma, (samples, n))
+            )
+            lower[rows], upper[rows] = np.percentile(sims, [lower_p, upper_p], axis=0)
+    return lower, upper
+
+
+def predict_with_intervals(model, future_df, mode="prophet", samples=None, seed=None):
+    # model.predict'in aralık modlu karşılığı; prophet dışındaki modlarda
+    # Prophet'in örneklemesi kapatılıp yhat_lower/yhat_upper burada üretilir.
+    if mode not in INTERVAL_MODES:
+        raise ValueError(f"interval_mode {', '.join(INTERVAL_MODES)} olmalı")
+    if mode == "prophet":
+        if samples is None:
+            return model.predict(future_df)
+        saved, model.uncertainty_samples = model.uncertainty_samples, samples
+        try:
+            return model.predict(future_df)
+        finally:
+            model.uncertainty_samples = saved
+
+    saved, model.uncertainty_samples = model.uncertainty_samples, 0
+    try:
+        forecast = model.predict(future_df)
+    finally:
+        model.uncertainty_samples = saved
+
+    if mode == "none":
+        lower = upper = np.full(len(forecast), np.nan)
+    elif mode == "analytic":
+        lower, upper = analytic_intervals(model, forecast)
+    else:
+        lower, upper = simulated_intervals(model, forecast, samples or DEFAULT_SAMPLES, seed)
+
+    # Prophet'in sütun sırası: ds, trend, yhat_lower, yhat_upper, ...
+    position = forecast.columns.get_loc("trend") + 1
+    forecast.insert(position, "yhat_lower", lower)
+    forecast.insert(position + 1, "yhat_upper", upper)
+    return forecast
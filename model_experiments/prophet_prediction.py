@@ -1,15 +1,15 @@
+import warnings
 import pandas as pd
 import numpy as np
 from prophet import Prophet
-from sklearn.metrics import mean_absolute_error
 from sklearn.preprocessing import StandardScaler
 import matplotlib.pyplot as plt
-
-df = pd.read_csv('data/daily_engagements_final.csv')
-holidays_df = pd.read_csv('data/prophet_holidays_tr.csv')
-
-df['event_date'] = pd.to_datetime(df['event_date'])
-holidays_df['ds'] = pd.to_datetime(holidays_df['ds'])
+from data_pipeline.storage import read_frame, FINAL, CLEAN
+from data_pipeline.granularity import normalize_freq, freq_config, dataset_name, DEFAULT_FREQ
+from feature_engineering.feature_engineering_pipeline import engineer_features
+from feature_engineering.holiday_calendar import holidays_for
+from model_experiments.model_cache import fingerprint, get_or_fit
+from model_experiments.prophet_intervals import predict_with_intervals
 
 regressors = [
     'ortalama_sure_lag1','ortalama_sure_roll7_mean', 'toplam_izleme_suresi_dk_roll14_std',
@@ -17,63 +17,155 @@ regressors = [
     'toplam_izleme_suresi_dk_lag1', 'ortalama_sure_lag7'
 ]
 
-yeni_hedef_degisken = 'ortalama_sure'
-
-df_prophet = df.rename(columns={'event_date': 'ds', yeni_hedef_degisken: 'y'})
-df_prophet = df_prophet[['ds', 'y'] + regressors]
-df_prophet.dropna(inplace=True)
-
-test_gun_sayisi = 40
-train_df = df_prophet.iloc[:-test_gun_sayisi].copy()
-test_df = df_prophet.iloc[-test_gun_sayisi:].copy()
-
-scaler = StandardScaler()
-train_df[regressors] = scaler.fit_transform(train_df[regressors])
-test_df[regressors] = scaler.transform(test_df[regressors])
-
-model = Prophet(
-    holidays=holidays_df,
-    yearly_seasonality=False,
-    weekly_seasonality=False
-)
-
-for regressor in regressors:
-    model.add_regressor(regressor)
-
-model.fit(train_df)
-
-future_df = pd.concat([train_df, test_df])[['ds'] + regressors]
-forecast = model.predict(future_df)
-
-y_true = test_df['y'].values
-y_pred = forecast['yhat'][-test_gun_sayisi:].values
-
-mae = mean_absolute_error(y_true, y_pred)
-ortalama_deger = pd.concat([train_df, test_df])['y'].mean()
-ortalama_yuzde_hata = (mae / ortalama_deger) * 100
-dogruluk_orani = 100 - ortalama_yuzde_hata
-
-print("- TAHMİN SONUÇLARI -")
-print(f'-Ortalama Mutlak Hata (MAE): {mae:.2f} dakika')
-print(f'-Ortalama Yüzdesel Hata: %{ortalama_yuzde_hata:.2f}')
-print(f'-YAKLAŞIK DOĞRULUK ORANI: %{dogruluk_orani:.2f} ')
-
-full_actual_data = pd.concat([train_df, test_df])
-
-fig, ax = plt.subplots(figsize=(15, 7))
-ax.plot(full_actual_data['ds'].dt.to_pydatetime(), full_actual_data['y'], label='Gerçek Değerler', color='dodgerblue', linewidth=2)
-ax.plot(forecast['ds'].dt.to_pydatetime(), forecast['yhat'], label='Tahmin Edilen Değerler', color='red', linestyle='--')
+hourly_regressors = [
+    'ortalama_sure_lag1','ortalama_sure_roll24_mean', 'toplam_izleme_suresi_dk_roll168_std',
+    'ortalama_sure_roll168_mean', 'month_sin', 'ortalama_sure_roll336_mean',
+    'toplam_izleme_suresi_dk_lag1', 'ortalama_sure_lag24'
+]
 
-split_date = test_df['ds'].iloc[0]
-ax.axvline(x=split_date, color='green', linestyle=':', linewidth=2, label='Eğitim/Test Ayrımı')
+REGRESSORS = {
+    'D': regressors,
+    'h': hourly_regressors,
+}
 
-ax.set_title('Ortalama Sure | Gerçek ve Tahmin Edilen Değerlerin Karşılaştırılması ')
-ax.set_xlabel('Tarih')
-ax.set_ylabel('Ortalama Süre (dk)')
-ax.legend()
-ax.grid(True)
-fig.autofmt_xdate()
-plt.tight_layout()
-plt.show()
+yeni_hedef_degisken = 'ortalama_sure'
 
 
+def load_data(regressors=None, target=yeni_hedef_degisken, freq='D', compute=False):
+    # Prophet yalnızca hedef ve regresör kolonlarına ihtiyaç duyar.
+    # compute=True: regresörler temiz veriden istek üzerine hesaplanır
+    # (tüm özellik tablosu üretilmez).
+    regressors = REGRESSORS[normalize_freq(freq)] if regressors is None else regressors
+    if compute:
+        df = engineer_features(read_frame(dataset_name(CLEAN, freq)), freq=freq, features=regressors)
+        df = df[['event_date', target] + list(regressors)]
+    else:
+        df = read_frame(dataset_name(FINAL, freq), columns=['event_date', target] + list(regressors))
+    holidays_df = holidays_for(df['event_date'])
+    return df, holidays_df
+
+
+def stan_init(model):
+    # Fit edilmiş modelin optimize parametreleri; yeni fit'e başlangıç
+    # değeri (init) olarak verilir. Boyutu uymayan delta/beta'yı Prophet
+    # kendisi varsayılana çevirir.
+    params = {name: float(model.params[name][0][0]) for name in ('k', 'm', 'sigma_obs')}
+    for name in ('delta', 'beta'):
+        params[name] = np.asarray(model.params[name][0], dtype=np.float64)
+    return params
+
+
+def fit_prophet(train_df, holidays_df, regressors, freq='D', init=None, params=None, **fit_kwargs):
+    # init: önceki bir fit (Prophet) ya da stan_init sözlüğü; verilirse Stan
+    # optimizasyonu varsayılan başlangıç yerine oradan başlar.
+    # params: varsayılanların üzerine yazılan Prophet ayarları (ör. prophet_tuning
+    # sonucu); 'regressor_prior_scale' tüm regresörlere uygulanır.
+    params = dict(params or {})
+    prior_scale = params.pop('regressor_prior_scale', None)
+    settings = {
+        'yearly_seasonality': False,
+        'weekly_seasonality': False,
+        'daily_seasonality': freq_config(freq)['periods_per_day'] > 1,
+        **params,
+    }
+    model = Prophet(holidays=holidays_df, **settings)
+
+    for regressor in regressors:
+        model.add_regressor(regressor, prior_scale=prior_scale)
+
+    if init is not None:
+        fit_kwargs['init'] = stan_init(init) if isinstance(init, Prophet) else init
+    return model.fit(train_df, **fit_kwargs)
+
+
+def forecast_metrics(y_true, y_pred, y_all, axis=None):
+    # MAE, MAE'nin tüm dönem (eğitim + test) ortalamasına oranı (%) ve
+    # 100 - bu oran. NaN'lar atlanır; axis=1 ile seri × zaman matrisinde seri başına.
+    with warnings.catch_warnings(), np.errstate(divide='ignore', invalid='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mae = np.nanmean(np.abs(np.asarray(y_true, dtype=np.float64) - np.asarray(y_pred, dtype=np.float64)), axis=axis)
+        ortalama_deger = np.nanmean(np.asarray(y_all, dtype=np.float64), axis=axis)
+        ortalama_yuzde_hata = (mae / ortalama_deger) * 100
+    return {
+        'mae': mae,
+        'mape': ortalama_yuzde_hata,
+        'accuracy': 100 - ortalama_yuzde_hata,
+    }
+
+
+def run_prophet_model(df, holidays_df, test_gun_sayisi=40, regressors=None, target=yeni_hedef_degisken, freq='D',
+                      cache=None, warm_start=None, interval_mode='prophet', interval_samples=None, params=None):
+    # test_gun_sayisi, saatlik modda test periyodu (saat) sayısıdır.
+    # cache: fit edilmiş model önbelleği (None: ENGAGEMENT_MODEL_CACHE ayarı,
+    # False: her seferinde fit). Eğitim verisi, tatiller ve ayarlar aynıysa
+    # Stan fit'i atlanır. warm_start: önceki fit (ya da stan_init çıktısı);
+    # bir gün fazlasıyla yeniden fit ederken optimizasyonu kısaltır.
+    # interval_mode: yhat_lower/yhat_upper yöntemi (prophet_intervals.INTERVAL_MODES).
+    # params: fit_prophet'e giden Prophet ayarları.
+    freq = normalize_freq(freq)
+    regressors = REGRESSORS[freq] if regressors is None else list(regressors)
+    missing = [c for c in ['event_date', target] + list(regressors) if c not in df.columns]
+    if missing:
+        raise ValueError(f"Eksik kolonlar: {', '.join(missing)}")
+
+    df_prophet = df.rename(columns={'event_date': 'ds', target: 'y'})
+    df_prophet = df_prophet[['ds', 'y'] + list(regressors)]
+    df_prophet = df_prophet.dropna()
+
+    if len(df_prophet) <= test_gun_sayisi:
+        raise ValueError(f"Test gün sayısı ({test_gun_sayisi}) veri uzunluğundan ({len(df_prophet)}) küçük olmalı")
+
+    train_df = df_prophet.iloc[:-test_gun_sayisi].copy()
+    test_df = df_prophet.iloc[-test_gun_sayisi:].copy()
+
+    scaler = StandardScaler()
+    train_df[regressors] = scaler.fit_transform(train_df[regressors])
+    test_df[regressors] = scaler.transform(test_df[regressors])
+
+    key = fingerprint(train_df, holidays_df, model='prophet', regressors=list(regressors), freq=freq,
+                      params=params or {})
+    model, _ = get_or_fit(
+        'prophet', key,
+        lambda: fit_prophet(train_df, holidays_df, regressors, freq, init=warm_start, params=params), cache
+    )
+
+    future_df = pd.concat([train_df, test_df])[['ds'] + list(regressors)]
+    forecast = predict_with_intervals(model, future_df, interval_mode, interval_samples)
+
+    y_true = test_df['y'].values
+    y_pred = forecast['yhat'][-test_gun_sayisi:].values
+
+    metrics = forecast_metrics(y_true, y_pred, df_prophet['y'])
+    return forecast, metrics, train_df, test_df, df_prophet
+
+
+if __name__ == "__main__":
+    df, holidays_df = load_data(freq=DEFAULT_FREQ)
+
+    test_gun_sayisi = 40 * freq_config(DEFAULT_FREQ)['periods_per_day']
+    forecast, metrics, train_df, test_df, df_prophet = run_prophet_model(
+        df, holidays_df, test_gun_sayisi, freq=DEFAULT_FREQ
+    )
+
+    print("- TAHMİN SONUÇLARI -")
+    print(f'-Ortalama Mutlak Hata (MAE): {metrics["mae"]:.2f} dakika')
+    print(f'-Ortalama Yüzdesel Hata: %{metrics["mape"]:.2f}')
+    print(f'-YAKLAŞIK DOĞRULUK ORANI: %{metrics["accuracy"]:.2f} ')
+
+    full_actual_data = pd.concat([train_df, test_df])
+
+    fig, ax = plt.subplots(figsize=(15, 7))
+    ax.plot(full_actual_data['ds'].dt.to_pydatetime(), full_actual_data['y'], label='Gerçek Değerler', color='dodgerblue', linewidth=2)
+    ax.plot(forecast['ds'].dt.to_pydatetime(), forecast['yhat'], label='Tahmin Edilen Değerler', color='red', linestyle='--')
+
+    split_date = test_df['ds'].iloc[0]
+    ax.axvline(x=split_date, color='green', linestyle=':', linewidth=2, label='Eğitim/Test Ayrımı')
+
+    ax.set_title('Ortalama Sure | Gerçek ve Tahmin Edilen Değerlerin Karşılaştırılması ')
+    ax.set_xlabel('Tarih')
+    ax.set_ylabel('Ortalama Süre (dk)')
+    ax.legend()
+    ax.grid(True)
+    fig.autofmt_xdate()
+    plt.tight_layout()
+    plt.show()
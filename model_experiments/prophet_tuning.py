@@ -0,0 +1,225 @@
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from data_pipeline.granularity import freq_config, normalize_freq, dataset_name, DEFAULT_FREQ
+from data_pipeline.storage import write_frame
+from feature_engineering.holiday_calendar import holidays_for
+from model_experiments.backtest import (
+    SharedFrame, init_worker, make_cutoffs, HORIZON_DAYS, STEP_DAYS, N_FOLDS, MIN_TRAIN_DAYS,
+)
+from model_experiments.prophet_intervals import predict_with_intervals
+from model_experiments.prophet_prediction import REGRESSORS, fit_prophet, forecast_metrics, load_data
+
+
+# Aranan Prophet ayarları; regresör alt kümesi ayrıca "regresorler" adıyla aranır.
+PARAM_GRID = {
+    "changepoint_prior_scale": (0.01, 0.05, 0.1, 0.5),
+    "seasonality_prior_scale": (0.1, 10.0),
+    "holidays_prior_scale": (0.1, 10.0),
+    "regressor_prior_scale": (0.1, 1.0, 10.0),
+    "seasonality_mode": ("additive", "multiplicative"),
+    "weekly_seasonality": (False, True),
+}
+# Izgara büyükse rastgele bu kadar aday denenir (None: tüm ızgara).
+N_CONFIGS = 60
+# Her turda adayların 1/ETA'sı kalır, kalanların fold bütçesi ETA katına çıkar.
+ETA = 3
+MIN_FOLDS = 1
+RESULTS = "daily_prophet_tuning"
+
+# İşçi süreçteki paylaşılan tablo ve sabit girdiler.
+_worker = {}
+
+
+def regressor_subsets(freq=DEFAULT_FREQ):
+    # Regresör listesinin adlandırılmış alt kümeleri; adlar sonuç tablosuna yazılır.
+    regs = REGRESSORS[normalize_freq(freq)]
+    return {
+        "tum": list(regs),
+        "hedef": [r for r in regs if r.startswith("ortalama_sure")],
+        "gecikme": [r for r in regs if "_lag" in r],
+        "pencere": [r for r in regs if "_roll" in r],
+        "yok": [],
+    }
+
+
+def configurations(grid=None, subsets=None, n_configs=N_CONFIGS, seed=0):
+    grid = PARAM_GRID if grid is None else grid
+    subsets = list(regressor_subsets() if subsets is None else subsets)
+    keys = list(grid) + ["regresorler"]
+    configs = [dict(zip(keys, values)) for values in itertools.product(*grid.values(), subsets)]
+    if n_configs and len(configs) > n_configs:
+        configs = random.Random(seed).sample(configs, n_configs)
+    return configs
+
+
+def rung_budgets(n_folds, eta=ETA, min_folds=MIN_FOLDS):
+    # Tur başına değerlendirilen fold sayısı: min_folds, min_folds*eta, ... n_folds.
+    budgets = []
+    budget = min_folds
+    while budget < n_folds:
+        budgets.append(budget)
+        budget *= eta
+    return budgets + [n_folds]
+
+
+def _init_worker(shared, holidays_df, freq, blas_threads=1):
+    _worker.update(init_worker(shared, blas_threads), holidays=holidays_df, freq=freq, subsets=regressor_subsets(freq))
+
+
+def _fit_fold(config, start, cutoff, end):
+    df = _worker["frame"].frame(start, end)
+    df["ds"] = pd.to_datetime(df["ds"])
+    regs = _worker["subsets"][config["regresorler"]]
+    params = {k: v for k, v in config.items() if k != "regresorler"}
+
+    train, test = df.iloc[:cutoff - start].copy(), df.iloc[cutoff - start:].copy()
+    if regs:
+        scaler = StandardScaler()
+        train[regs] = scaler.fit_transform(train[regs])
+        test[regs] = scaler.transform(test[regs])
+    model = fit_prophet(train[["ds", "y"] + regs], _worker["holidays"], regs, _worker["freq"], params=params)
+    # Yalnızca yhat gerekir; aralık hesaplanmaz.
+    yhat = predict_with_intervals(model, test[["ds"] + regs], "none")["yhat"].to_numpy()
+    metrics = forecast_metrics(test["y"], yhat, df["y"])
+    return metrics["mae"], metrics["mape"]
+
+
+def _run_task(task):
+    cid, config, fold, (start, cutoff, end) = task
+    t0 = time.perf_counter()
+    try:
+        mae, mape = _fit_fold(config, start, cutoff, end)
+    except Exception as e:
+        return cid, fold, np.inf, np.nan, time.perf_counter() - t0, repr(e)
+    return cid, fold, mae, mape, time.perf_counter() - t0, None
+
+
+class _Halving:
+    def __init__(self, configs, folds, run):
+        self.configs = configs
+        self.folds = folds
+        self.run = run
+        # (aday, fold) -> (mae, mape, süre, hata)
+        self.scores = {}
+        self.eliminated = {}
+
+    def _evaluate(self, survivors, budget):
+        tasks = [
+            (cid, self.configs[cid], fold, self.folds[fold])
+            for cid in survivors for fold in range(budget) if (cid, fold) not in self.scores
+        ]
+        for cid, fold, mae, mape, sn, error in self.run(tasks):
+            self.scores[cid, fold] = (mae, mape, sn, error)
+
+    def mean_mae(self, cid, budget):
+        return np.mean([self.scores[cid, fold][0] for fold in range(budget)])
+
+    def search(self, eta):
+        survivors = list(range(len(self.configs)))
+        budgets = rung_budgets(len(self.folds), eta)
+        for rung, budget in enumerate(budgets):
+            self._evaluate(survivors, budget)
+            if budget == budgets[-1] or len(survivors) <= 1:
+                break
+            # Aynı fold'larda ortalama MAE'ye göre en iyi 1/eta devam eder.
+            survivors.sort(key=lambda cid: self.mean_mae(cid, budget))
+            keep = max(1, len(survivors) // eta)
+            for cid in survivors[keep:]:
+                self.eliminated[cid] = rung
+            survivors = survivors[:keep]
+
+    def table(self):
+        rows = []
+        for cid, config in enumerate(self.configs):
+            done = sorted(fold for c, fold in self.scores if c == cid)
+            scores = [self.scores[cid, fold] for fold in done]
+            errors = [s[3] for s in scores if s[3] is not None]
+            rows.append({
+                **config,
+                "mae": np.mean([s[0] for s in scores]),
+                "mape": np.mean([s[1] for s in scores]),
+                "folds": len(done),
+                "elendigi_tur": self.eliminated.get(cid, np.nan),
+                "fit_sn": sum(s[2] for s in scores),
+                "hata": errors[0] if errors else None,
+            })
+        table = pd.DataFrame(rows)
+        # Daha çok fold'da değerlendirilenler önce, sonra MAE.
+        table = table.sort_values(["folds", "mae"], ascending=[False, True]).reset_index(drop=True)
+        table.insert(0, "sira", np.arange(1, len(table) + 1))
+        return table
+
+
+def tune(df=None, holidays_df=None, freq=DEFAULT_FREQ, configs=None, horizon=None, n_folds=N_FOLDS, step=None,
+         min_train=None, eta=ETA, workers=None):
+    # Ardışık yarılama (successive halving): tüm adaylar önce en eski (en kısa
+    # eğitimli, en ucuz) fold'larda fit edilir; her turda en iyi 1/eta kalır ve
+    # sonraki fold'lar eklenir. Dönüş: sıralı sonuç tablosu.
+    cfg = freq_config(freq)
+    ppd = cfg["periods_per_day"]
+    horizon = horizon or HORIZON_DAYS * ppd
+    step = step or STEP_DAYS * ppd
+    min_train = min_train or MIN_TRAIN_DAYS * ppd
+    configs = configurations() if configs is None else list(configs)
+
+    if df is None:
+        df, loaded_holidays = load_data(freq=freq)
+        holidays_df = loaded_holidays if holidays_df is None else holidays_df
+    regs = REGRESSORS[normalize_freq(freq)]
+    df = df.rename(columns={"event_date": "ds", "ortalama_sure": "y"})
+    missing = [c for c in ["ds", "y"] + regs if c not in df.columns]
+    if missing:
+        raise ValueError(f"Eksik kolonlar: {', '.join(missing)}")
+    df = df[["ds", "y"] + regs].dropna().reset_index(drop=True)
+    holidays_df = holidays_for(df["ds"]) if holidays_df is None else holidays_df
+
+    folds = make_cutoffs(len(df), horizon, n_folds, step, min_train)
+    workers = min(workers or os.cpu_count() or 1, len(configs))
+
+    shared = SharedFrame(df)
+    try:
+        if workers > 1:
+            initargs = (shared.spec, holidays_df, freq)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+                search = _Halving(configs, folds, lambda tasks: pool.map(_run_task, tasks))
+                search.search(eta)
+        else:
+            _init_worker(shared, holidays_df, freq, blas_threads=None)
+            try:
+                search = _Halving(configs, folds, lambda tasks: map(_run_task, tasks))
+                search.search(eta)
+            finally:
+                _worker.clear()
+    finally:
+        shared.close()
+    return search.table()
+
+
+def best_params(table, freq=DEFAULT_FREQ):
+    # Tablonun ilk satırından run_prophet_model(params=..., regressors=...) girdileri;
+    # regresör alt kümesinin adı kolon listesine çevrilir.
+    best = table.iloc[0]
+    params = {k: best[k].item() if hasattr(best[k], "item") else best[k] for k in PARAM_GRID if k in table.columns}
+    return params, regressor_subsets(freq)[best["regresorler"]]
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    table = tune(freq=DEFAULT_FREQ)
+    path = write_frame(table, dataset_name(RESULTS, DEFAULT_FREQ))
+    fits = int(table["folds"].sum())
+    full = len(table) * int(table["folds"].max())
+
+    print(f"- PROPHET AYAR ARAMASI ({len(table)} aday, {fits}/{full} fit, {time.perf_counter() - t0:.1f} sn) -")
+    print(table.head(10).round(4).to_string(index=False))
+    params, regressors = best_params(table, DEFAULT_FREQ)
+    print(f"\nEn iyi ayarlar: {params}, regresörler: {table['regresorler'].iloc[0]} {regressors}")
+    print(f"Sonuçlar: {path}")
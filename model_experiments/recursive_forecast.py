@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from data_pipeline.storage import read_frame, CLEAN
+from data_pipeline.granularity import freq_config, normalize_freq, dataset_name, DEFAULT_FREQ
+from feature_engineering.feature_engineering_pipeline import engineer_features
+from feature_engineering.holiday_calendar import get_calendar, holidays_for
+from feature_engineering.incremental_features import IncrementalFeatureState
+from model_experiments.baselines import forecast as baseline_forecast, stack_series
+from model_experiments.prophet_intervals import predict_with_intervals
+from model_experiments.prophet_prediction import REGRESSORS, fit_prophet, forecast_metrics
+from model_experiments.sarimax_state import SarimaxState, sarimax_regressors
+
+
+TARGET = "ortalama_sure"
+# Hedef dışındaki girdiler: oturum sayısı ucuz bir temel yöntemle öngörülür,
+# toplam süre ise tahmin × oturum olarak hedefle tutarlı tutulur.
+SESSIONS = "oturum_sayisi"
+TOTAL = "toplam_izleme_suresi_dk"
+AUX_METHOD = "seasonal_naive"
+
+
+def calendar_rows(dates, freq=DEFAULT_FREQ):
+    # preprocess'in ürettiği takvim kolonları (döngüsel özelliklerin kaynağı).
+    dates = pd.DatetimeIndex(dates)
+    rows = pd.DataFrame({
+        "event_date": dates,
+        "yil": dates.year,
+        "ay": dates.month,
+        "hafta_gunu": dates.weekday,
+    })
+    if freq_config(freq)["periods_per_day"] > 1:
+        rows["saat"] = dates.hour
+    return rows
+
+
+def session_forecast(history, keys, horizon, freq=DEFAULT_FREQ, group_col=None):
+    # Oturum sayısı, tüm seriler için tek geçişte (seri × ufuk; satırlar keys sırasında).
+    if group_col is None:
+        sessions = [history[SESSIONS].to_numpy(dtype=np.float64)]
+    else:
+        groups = history[group_col].astype(str)
+        sessions = [history.loc[groups == k, SESSIONS].to_numpy(dtype=np.float64) for k in keys]
+    return baseline_forecast(stack_series(sessions), horizon, AUX_METHOD, freq)
+
+
+def recursive_forecast(history, predict, horizon, features, freq=DEFAULT_FREQ, group_col=None, target=TARGET):
+    # history: temiz tablo (hedefler + takvim kolonları); her seri ardışık.
+    # predict(satırlar) -> yhat: seri başına bir satırlık özellik tablosunu
+    # alır (tüm seriler birlikte). Her adımda tahmin duruma itilir ve yalnızca
+    # etkilenen lag/rolling değerleri güncellenir; maliyet ufukta doğrusal,
+    # geçmiş uzunluğundan bağımsızdır. Dönüş: (seri, event_date, yhat) tablosu.
+    state = IncrementalFeatureState(freq=freq, group_col=group_col).fit(history)
+    keys = list(state.keys)
+    aux = session_forecast(history, keys, horizon, freq, group_col)
+    step = pd.Timedelta(1, unit=freq_config(freq)["pandas_freq"])
+
+    out = []
+    for k in range(horizon):
+        rows = calendar_rows(pd.DatetimeIndex(state.last_date) + step, freq)
+        if group_col is not None:
+            rows.insert(0, group_col, keys)
+        rows[SESSIONS] = aux[:, k]
+        rows[TOTAL] = np.nan
+        rows[target] = np.nan
+
+        feats = state.peek(rows, features)
+        yhat = np.asarray(predict(feats), dtype=np.float64)
+        pushed = feats[rows.columns].copy()
+        pushed[target] = yhat
+        pushed[TOTAL] = yhat * pushed[SESSIONS].to_numpy()
+        state.update(pushed, features=[])
+
+        step_out = pd.DataFrame({"event_date": pushed["event_date"].to_numpy(), "yhat": yhat})
+        if group_col is not None:
+            step_out.insert(0, group_col, pushed[group_col].to_numpy())
+        out.append(step_out)
+
+    sort_cols = [group_col, "event_date"] if group_col else ["event_date"]
+    return pd.concat(out, ignore_index=True).sort_values(sort_cols).reset_index(drop=True)
+
+
+def prophet_predictor(model, scaler, regressors):
+    # recursive_forecast için: özellik satırlarını eğitimdeki ölçekleyiciyle
+    # dönüştürüp aralıksız Prophet tahmini yapar.
+    def predict(rows):
+        X = rows[["event_date"] + list(regressors)].rename(columns={"event_date": "ds"})
+        X[regressors] = scaler.transform(X[regressors])
+        return predict_with_intervals(model, X, "none")["yhat"].to_numpy()
+    return predict
+
+
+def fit_prophet_recursive(history, holidays_df, regressors=None, freq=DEFAULT_FREQ, params=None, target=TARGET):
+    # Regresörler geçmişten hesaplanır; ilk periyotların eksik lag'leri atılır.
+    regressors = REGRESSORS[normalize_freq(freq)] if regressors is None else list(regressors)
+    train = engineer_features(history, freq=freq, features=regressors)
+    train = train.rename(columns={"event_date": "ds", target: "y"})[["ds", "y"] + regressors].dropna()
+    scaler = StandardScaler()
+    train[regressors] = scaler.fit_transform(train[regressors])
+    model = fit_prophet(train, holidays_df, regressors, freq, params=params)
+    return model, scaler, regressors
+
+
+def sarimax_predictor(state):
+    # recursive_forecast için, tek seri: SarimaxState'in tek adım tahmini.
+    # Tahmin gözlem gibi filtreden geçirilir (parametreler sabit), böylece
+    # sonraki adımın ARMA durumu onu içerir; state yerinde ilerler.
+    def predict(rows):
+        if len(rows) != 1:
+            raise ValueError("SARIMAX tahmincisi tek seri içindir")
+        exog = rows.set_index(pd.DatetimeIndex(rows["event_date"], name="ds"))
+        exog["holiday_dummy"] = get_calendar().dummy(exog.index)
+        yhat = np.asarray(state.forecast(exog).predicted_mean, dtype=np.float64)
+        state.update(pd.Series(yhat, index=exog.index), exog)
+        return yhat
+    return predict
+
+
+def fit_sarimax_recursive(history, regressors=None, freq=DEFAULT_FREQ, order=None, target=TARGET, **search_kwargs):
+    # sarimax_frame ile aynı girdiler, yalnızca geçmişten; order yoksa derece
+    # aranır (search_kwargs search_order'a gider).
+    regressors = sarimax_regressors(freq) if regressors is None else list(regressors)
+    train = engineer_features(history, freq=freq, features=regressors)
+    train = train.rename(columns={"event_date": "ds", target: "y"})[["ds", "y"] + regressors].dropna()
+    train["holiday_dummy"] = get_calendar().dummy(train["ds"])
+    train = train.set_index("ds")
+    state = SarimaxState(regressors + ["holiday_dummy"], freq=freq, order=order).fit(train["y"], train, **search_kwargs)
+    return state, regressors
+
+
+def run_recursive_prophet(df, holidays_df, test_gun_sayisi=40, regressors=None, target=TARGET, freq=DEFAULT_FREQ,
+                          params=None):
+    # run_prophet_model'in gerçek tahmin karşılığı: test döneminin regresörleri
+    # gerçek değerlerden değil, modelin kendi tahminlerinden üretilir.
+    # df: temiz (preprocess edilmiş) tablo; metrikler run_prophet_model ile aynı.
+    if len(df) <= test_gun_sayisi:
+        raise ValueError(f"Test gün sayısı ({test_gun_sayisi}) veri uzunluğundan ({len(df)}) küçük olmalı")
+    df = df.sort_values("event_date").reset_index(drop=True)
+    history, test = df.iloc[:-test_gun_sayisi], df.iloc[-test_gun_sayisi:]
+    model, scaler, regressors = fit_prophet_recursive(history, holidays_df, regressors, freq, params, target)
+    forecast = recursive_forecast(
+        history, prophet_predictor(model, scaler, regressors), test_gun_sayisi, regressors, freq, target=target
+    )
+
+    y_true = test[target].to_numpy(dtype=np.float64)
+    metrics = forecast_metrics(y_true, forecast["yhat"], df[target])
+    return forecast.assign(y=y_true), metrics
+
+
+def run_recursive_sarimax(df, test_gun_sayisi=40, regressors=None, target=TARGET, freq=DEFAULT_FREQ, order=None,
+                          **search_kwargs):
+    # sarimax_model.py'nin gerçek tahmin karşılığı; df ve metrikler
+    # run_recursive_prophet ile aynı.
+    if len(df) <= test_gun_sayisi:
+        raise ValueError(f"Test gün sayısı ({test_gun_sayisi}) veri uzunluğundan ({len(df)}) küçük olmalı")
+    df = df.sort_values("event_date").reset_index(drop=True)
+    history, test = df.iloc[:-test_gun_sayisi], df.iloc[-test_gun_sayisi:]
+    state, regressors = fit_sarimax_recursive(history, regressors, freq, order, target, **search_kwargs)
+    forecast = recursive_forecast(history, sarimax_predictor(state), test_gun_sayisi, regressors, freq, target=target)
+
+    y_true = test[target].to_numpy(dtype=np.float64)
+    metrics = forecast_metrics(y_true, forecast["yhat"], df[target])
+    return forecast.assign(y=y_true), metrics
+
+
+if __name__ == "__main__":
+    clean = read_frame(dataset_name(CLEAN, DEFAULT_FREQ))
+    holidays_df = holidays_for(clean["event_date"])
+    test_gun_sayisi = 40 * freq_config(DEFAULT_FREQ)['periods_per_day']
+    results = {
+        "Prophet": run_recursive_prophet(clean, holidays_df, test_gun_sayisi, freq=DEFAULT_FREQ),
+        "SARIMAX": run_recursive_sarimax(clean, test_gun_sayisi, freq=DEFAULT_FREQ, stepwise=True),
+    }
+
+    for name, (forecast, metrics) in results.items():
+        print(f"- ÖZYİNELEMELİ TAHMİN SONUÇLARI ({name}) -")
+        print(f'-Ortalama Mutlak Hata (MAE): {metrics["mae"]:.2f} dakika')
+        print(f'-Ortalama Yüzdesel Hata: %{metrics["mape"]:.2f}')
+        print(f'-YAKLAŞIK DOĞRULUK ORANI: %{metrics["accuracy"]:.2f} ')
@@ -3,34 +3,29 @@ import numpy as np
 from sklearn.metrics import mean_absolute_error
 from sklearn.preprocessing import StandardScaler
 import matplotlib.pyplot as plt
+import os
 import warnings
 warnings.filterwarnings("ignore")
 
-from statsmodels.tsa.statespace.sarimax import SARIMAX
+from data_pipeline.granularity import freq_config, DEFAULT_FREQ
+from model_experiments.sarimax_search import search_order, MODEL_KWARGS
+from model_experiments.model_cache import fingerprint, resolve_cache
+from model_experiments.sarimax_state import sarimax_regressors, sarimax_frame
 
-df = pd.read_csv('data/daily_engagements_final.csv')
-holidays_df = pd.read_csv('data/prophet_holidays_tr.csv')
+freq = DEFAULT_FREQ
+# True: regresörler final tablo yerine temiz veriden istek üzerine hesaplanır
+compute_features = False
+# Derece araması: işçi süreç sayısı ve ızgara yerine stepwise (KPSS + komşu) arama
+search_workers = os.cpu_count() or 1
+stepwise_search = False
+periods_per_day = freq_config(freq)['periods_per_day']
 
-df['event_date'] = pd.to_datetime(df['event_date'])
-holidays_df['ds'] = pd.to_datetime(holidays_df['ds'])
+regressors = sarimax_regressors(freq)
 
-regressors = [
-    'ortalama_sure_lag1','ortalama_sure_roll7_mean','toplam_izleme_suresi_dk_roll14_std',
-    'ortalama_sure_roll14_mean','month_sin','ortalama_sure_roll28_mean',
-    'toplam_izleme_suresi_dk_lag1','ortalama_sure_lag7'
-]
+# (ds, y, regresörler, holiday_dummy); tatil + hafta sonu günleri takvimden gelir.
+df_arima = sarimax_frame(freq, compute=compute_features)
 
-yeni_hedef_degisken = 'ortalama_sure'
-
-df_arima = df.rename(columns={'event_date': 'ds', yeni_hedef_degisken: 'y'})
-df_arima = df_arima[['ds', 'y'] + regressors].copy()
-
-holiday_set = set(holidays_df['ds'].dt.normalize())
-df_arima['holiday_dummy'] = df_arima['ds'].dt.normalize().isin(holiday_set).astype(int)
-
-df_arima.dropna(inplace=True)
-
-test_gun_sayisi = 40
+test_gun_sayisi = 40 * periods_per_day
 train_df = df_arima.iloc[:-test_gun_sayisi].copy()
 test_df  = df_arima.iloc[-test_gun_sayisi:].copy()
 
@@ -46,43 +41,24 @@ test_exog  = scaler.transform(test_df[exog_cols])
 train_exog = pd.DataFrame(train_exog, index=train_df.index, columns=exog_cols)
 test_exog  = pd.DataFrame(test_exog,  index=test_df.index,  columns=exog_cols)
 
-candidate_p = [0,1,2,3]
-candidate_d = [0,1]
-candidate_q = [0,1,2,3]
-
-best_order = None
-best_aic = np.inf
 y_train = train_df['y']
 
-for p in candidate_p:
-    for d in candidate_d:
-        for q in candidate_q:
-            try:
-                model_tmp = SARIMAX(
-                    y_train,
-                    order=(p,d,q),
-                    seasonal_order=(0,0,0,0),
-                    exog=train_exog,
-                    enforce_stationarity=False,
-                    enforce_invertibility=False
-                )
-                res_tmp = model_tmp.fit(disp=False)
-                if res_tmp.aic < best_aic:
-                    best_aic = res_tmp.aic
-                    best_order = (p,d,q)
-            except Exception:
-                continue
-
-
-model = SARIMAX(
-    y_train,
-    order=best_order,
-    seasonal_order=(0,0,0,0),
-    exog=train_exog,
-    enforce_stationarity=False,
-    enforce_invertibility=False
-)
-model_fit = model.fit(disp=False)
+# Aday (p,d,q) dereceleri süreç havuzunda denenir; kazanan tekrar fit edilmez.
+# Aynı eğitim verisi ve arama ayarlarıyla daha önce fit edildiyse önbellekten gelir.
+model_cache = resolve_cache()
+cache_key = fingerprint(y_train, train_exog, model='sarimax', stepwise=stepwise_search, **MODEL_KWARGS)
+model_fit = model_cache.get('sarimax', cache_key) if model_cache else None
+if model_fit is None:
+    best_order, model_fit, search_table = search_order(
+        y_train, train_exog, workers=search_workers, stepwise=stepwise_search
+    )
+    if model_cache:
+        model_cache.put('sarimax', cache_key, model_fit)
+    print(search_table['durum'].value_counts().to_string())
+else:
+    best_order = model_fit.model.order
+    print("Model önbellekten yüklendi.")
+print(f"En iyi derece: {best_order} | AIC: {model_fit.aic:.2f}")
 
 
 fitted_in_sample = model_fit.fittedvalues
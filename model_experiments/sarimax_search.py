@@ -0,0 +1,241 @@
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+
+CANDIDATE_P = (0, 1, 2, 3)
+CANDIDATE_D = (0, 1)
+CANDIDATE_Q = (0, 1, 2, 3)
+MODEL_KWARGS = {
+    "seasonal_order": (0, 0, 0, 0),
+    "enforce_stationarity": False,
+    "enforce_invertibility": False,
+}
+BLAS_THREADS = 1
+BLAS_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                 "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+# İşçi süreçteki veri; her görevde tekrar gönderilmesin diye initializer ile bir kez yüklenir.
+_worker = {}
+
+
+def limit_blas_threads(n=BLAS_THREADS):
+    # N işçi × M BLAS thread'i çekirdek sayısını aşmasın. Ortam değişkenleri
+    # sonradan başlayan kütüphaneler için; threadpoolctl varsa yüklü olanlar da sınırlanır.
+    for var in BLAS_ENV_VARS:
+        os.environ[var] = str(n)
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return None
+    return threadpool_limits(limits=n)
+
+
+def _init_worker(y, exog, model_kwargs, fit_kwargs, blas_threads):
+    _worker["limits"] = limit_blas_threads(blas_threads)
+    _worker.update(y=y, exog=exog, model_kwargs=model_kwargs, fit_kwargs=fit_kwargs)
+
+
+def _fit(y, exog, order, model_kwargs, fit_kwargs):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = SARIMAX(y, order=order, exog=exog, **model_kwargs)
+        return model.fit(disp=False, **fit_kwargs)
+
+
+def _sample(y, exog, order, model_kwargs):
+    # Log-olabilirliğin toplandığı gözlemler: (atlanan ilk gözlem, etkin gözlem
+    # sayısı). Başlangıç yanığı dereceye göre değişir; model kurmak fit gerektirmez.
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = SARIMAX(y, order=order, exog=exog, **model_kwargs)
+    return model.loglikelihood_burn, model.nobs - model.loglikelihood_burn
+
+
+def _bound(res):
+    # Budama için (llf, örneklem); yalnızca yakınsamış fit'lerde.
+    if not (res.mle_retvals or {}).get("converged", False):
+        return None
+    return res.llf, (res.loglikelihood_burn, res.nobs_effective)
+
+
+def _fit_remote(order):
+    # Sonuç nesnesi yerine yalnızca parametreler döner; kazanan ana süreçte
+    # smooth(params) ile yeniden optimizasyon yapılmadan kurulur.
+    try:
+        res = _fit(_worker["y"], _worker["exog"], order, _worker["model_kwargs"], _worker["fit_kwargs"])
+    except Exception as e:
+        return order, None, None, None, repr(e)
+    return order, res.aic, np.asarray(res.params), _bound(res), None
+
+
+def n_params(order, exog):
+    # AR + MA + exog katsayıları + sigma2 (fark alma parametre eklemez).
+    p, _, q = order
+    k_exog = 0 if exog is None else (exog.shape[1] if np.ndim(exog) > 1 else 1)
+    return p + q + k_exog + 1
+
+
+def _prunable(order, fitted, best_aic, exog, sample):
+    # Aynı d ile iç içe modellerde küçük modelin en yüksek log-olabilirliği
+    # büyüğününkünü geçemez: AIC_küçük >= 2k_küçük - 2 llf_büyük. Bu alt sınır
+    # en iyi AIC'den kötüyse aday kazanamaz. Sınır yalnızca büyük modelin
+    # llf'i global en yüksekse (fitted yalnızca yakınsamış fit'leri tutar) ve
+    # iki llf aynı gözlemler üzerinden toplanıyorsa (aynı `sample`) geçerli.
+    p, d, q = order
+    penalty = 2 * n_params(order, exog)
+    for (bp, bd, bq), (llf, big_sample) in fitted.items():
+        if (bd == d and bp >= p and bq >= q and (bp, bq) != (p, q) and big_sample == sample
+                and penalty - 2 * llf >= best_aic):
+            return True
+    return False
+
+
+class _Search:
+    def __init__(self, y, exog, model_kwargs, fit_kwargs, workers, blas_threads, prune):
+        self.y = y
+        self.exog = exog
+        self.model_kwargs = model_kwargs
+        self.fit_kwargs = fit_kwargs
+        self.prune = prune
+        self.rows = {}
+        self.llf = {}
+        self.params = {}
+        self.best_order = None
+        self.best_aic = np.inf
+        self.best_result = None
+        self.pool = None
+        self.workers = workers or 1
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                initargs=(y, exog, model_kwargs, fit_kwargs, blas_threads),
+            )
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    def _record(self, order, aic, params=None, result=None, bound=None, error=None):
+        if error is not None:
+            self.rows[order] = {"aic": np.nan, "durum": "hata"}
+            return
+        self.rows[order] = {"aic": aic, "durum": "fit"}
+        if bound is not None:
+            self.llf[order] = bound
+        if aic < self.best_aic:
+            self.best_aic = aic
+            self.best_order = order
+            self.params[order] = params
+            self.best_result = result
+
+    def _skip(self, order):
+        if self.prune and self.llf and _prunable(
+            order, self.llf, self.best_aic, self.exog, _sample(self.y, self.exog, order, self.model_kwargs)
+        ):
+            self.rows[order] = {"aic": np.nan, "durum": "budandı"}
+            return True
+        return False
+
+    def run(self, orders):
+        # Adaylar büyükten küçüğe denenir; böylece iç içe sınır küçük modelleri erken eler.
+        orders = sorted((o for o in orders if o not in self.rows), key=lambda o: (-(o[0] + o[2]), o))
+        if self.pool is None:
+            for order in orders:
+                if self._skip(order):
+                    continue
+                try:
+                    res = _fit(self.y, self.exog, order, self.model_kwargs, self.fit_kwargs)
+                except Exception as e:
+                    self._record(order, None, error=repr(e))
+                    continue
+                self._record(order, res.aic, result=res, bound=_bound(res))
+            return
+
+        pending = {}
+        queue = list(orders)
+        while queue or pending:
+            while queue and len(pending) < self.workers:
+                order = queue.pop(0)
+                if not self._skip(order):
+                    pending[self.pool.submit(_fit_remote, order)] = order
+            if not pending:
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                pending.pop(fut)
+                order, aic, params, bound, error = fut.result()
+                self._record(order, aic, params=params, bound=bound, error=error)
+
+    def result(self):
+        if self.best_order is None:
+            raise ValueError("Hiçbir SARIMAX adayı fit edilemedi")
+        if self.best_result is None:
+            # Paralel modda kazanan, işçide bulunan parametrelerle kurulur.
+            model = SARIMAX(self.y, order=self.best_order, exog=self.exog, **self.model_kwargs)
+            self.best_result = model.smooth(self.params[self.best_order])
+        return self.best_result
+
+    def table(self):
+        table = pd.DataFrame(
+            [{"order": o, **row} for o, row in self.rows.items()],
+            columns=["order", "aic", "durum"],
+        )
+        return table.sort_values("aic", na_position="last").reset_index(drop=True)
+
+
+def choose_d(y, d_values=CANDIDATE_D, alpha=0.05):
+    # KPSS testine göre durağanlaşana kadar fark alınır (auto.arima'daki ndiffs gibi).
+    from statsmodels.tsa.stattools import kpss
+
+    x = np.asarray(y, dtype=np.float64)
+    for d in sorted(d_values):
+        z = np.diff(x, n=d) if d else x
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            p_value = kpss(z, regression="c", nlags="auto")[1]
+        if p_value > alpha:
+            return d
+    return max(d_values)
+
+
+def _stepwise(search, d, p_values, q_values):
+    # Hyndman-Khandakar: (2,d,2), (0,d,0), (1,d,0), (0,d,1) ile başlanır;
+    # en iyi modelin p/q komşuları denenir, AIC düşmeyince durulur.
+    def _valid(p, q):
+        return p in p_values and q in q_values
+
+    start = [(p, d, q) for p, q in ((2, 2), (0, 0), (1, 0), (0, 1)) if _valid(p, q)]
+    search.run(start)
+    while search.best_order is not None:
+        current = search.best_order
+        p, _, q = current
+        moves = [(p + dp, q + dq) for dp in (-1, 0, 1) for dq in (-1, 0, 1) if dp or dq]
+        neighbours = [(a, d, b) for a, b in moves if _valid(a, b)]
+        search.run(neighbours)
+        if search.best_order == current:
+            break
+
+
+def search_order(y, exog=None, p_values=CANDIDATE_P, d_values=CANDIDATE_D, q_values=CANDIDATE_Q,
+                 workers=1, blas_threads=BLAS_THREADS, stepwise=False, prune=True,
+                 model_kwargs=None, fit_kwargs=None):
+    # En düşük AIC'li (p, d, q) derecesini arar. Dönüş: (order, sonuç nesnesi,
+    # aday tablosu); sonuç nesnesi kazanan için tekrar fit gerektirmez.
+    # workers > 1 adayları süreç havuzunda fit eder (işçi başına blas_threads);
+    # stepwise=True ızgara yerine KPSS ile d seçip komşu araması yapar.
+    model_kwargs = dict(MODEL_KWARGS if model_kwargs is None else model_kwargs)
+    fit_kwargs = dict(fit_kwargs or {})
+    search = _Search(y, exog, model_kwargs, fit_kwargs, workers, blas_threads, prune)
+    try:
+        if stepwise:
+            _stepwise(search, choose_d(y, d_values), tuple(p_values), tuple(q_values))
+        else:
+            search.run([(p, d, q) for p in p_values for d in d_values for q in q_values])
+        return search.best_order, search.result(), search.table()
+    finally:
+        search.close()
@@ -0,0 +1,265 @@
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+from statsmodels.tsa.statespace.initialization import Initialization
+
+from data_pipeline.storage import read_frame, FINAL, CLEAN, DATA_DIR
+from data_pipeline.granularity import freq_config, normalize_freq, dataset_name, DEFAULT_FREQ
+from feature_engineering.feature_engineering_pipeline import engineer_features
+from feature_engineering.holiday_calendar import get_calendar
+from model_experiments.prophet_prediction import REGRESSORS as PROPHET_REGRESSORS
+from model_experiments.sarimax_search import search_order, MODEL_KWARGS
+
+
+TARGET = "ortalama_sure"
+# Prophet ile aynı regresörler; saatlik modda gün içi mevsimsellik, mevsimsel
+# ARIMA yerine exog sin/cos ile verilir.
+REGRESSORS = {
+    "D": list(PROPHET_REGRESSORS["D"]),
+    "h": list(PROPHET_REGRESSORS["h"]) + ['hour_sin', 'hour_cos'],
+}
+STATE_NAME = "sarimax_state"
+# Tam yeniden tahmin takvimi ve drift ölçüsü (gün cinsinden; saatlikte periyoda çevrilir).
+REFIT_EVERY_DAYS = 30
+DRIFT_WINDOW_DAYS = 14
+# Son penceredeki standartlaştırılmış tek adım hatalarının kare ortalaması;
+# model doğruysa ~1, bu eşiği aşarsa parametreler yeniden tahmin edilir.
+DRIFT_THRESHOLD = 2.0
+
+
+def sarimax_regressors(freq=DEFAULT_FREQ):
+    return list(REGRESSORS[normalize_freq(freq)])
+
+
+def sarimax_frame(freq=DEFAULT_FREQ, compute=False, since=None):
+    # (ds, y, regresörler, holiday_dummy) tablosu; since verilirse yalnızca
+    # o tarihten sonraki satırlar okunur.
+    regressors = sarimax_regressors(freq)
+    filters = [("event_date", ">", pd.Timestamp(since))] if since is not None else None
+    if compute:
+        df = engineer_features(read_frame(dataset_name(CLEAN, freq)), freq=freq, features=regressors)
+        if since is not None:
+            df = df[df["event_date"] > pd.Timestamp(since)]
+        df = df[["event_date", TARGET] + regressors]
+    else:
+        df = read_frame(dataset_name(FINAL, freq), columns=["event_date", TARGET] + regressors, filters=filters)
+
+    df = df.rename(columns={"event_date": "ds", TARGET: "y"})[["ds", "y"] + regressors].copy()
+    # Tatil + hafta sonu günleri; takvim her tarih aralığını kapsar.
+    df["holiday_dummy"] = get_calendar().dummy(df["ds"])
+    return df.dropna().sort_values("ds").reset_index(drop=True)
+
+
+def state_path(freq=DEFAULT_FREQ, data_dir=None):
+    return os.path.join(data_dir or DATA_DIR, dataset_name(STATE_NAME, freq) + ".npz")
+
+
+class SarimaxState:
+    # Fit edilmiş SARIMAX'ın parametrelerini ve Kalman filtresinin son
+    # durumunu tutar. Yeni gözlemler parametre tahmini yapılmadan yalnızca
+    # filtreden geçirilir (statsmodels extend ile aynı: bilinen başlangıç
+    # durumu + yeni satırlar). Tam yeniden tahmin takvime göre ya da tek
+    # adım hataları drift eşiğini aşınca yapılır.
+
+    def __init__(self, exog_cols, freq=DEFAULT_FREQ, order=None, model_kwargs=None,
+                 refit_every=None, drift_window=None, drift_threshold=DRIFT_THRESHOLD):
+        cfg = freq_config(freq)
+        self.freq = normalize_freq(freq)
+        self.step = pd.Timedelta(1, unit=cfg["pandas_freq"])
+        self.exog_cols = list(exog_cols)
+        self.order = tuple(order) if order is not None else None
+        self.model_kwargs = dict(MODEL_KWARGS if model_kwargs is None else model_kwargs)
+        self.refit_every = refit_every or REFIT_EVERY_DAYS * cfg["periods_per_day"]
+        self.drift_window = drift_window or DRIFT_WINDOW_DAYS * cfg["periods_per_day"]
+        self.drift_threshold = drift_threshold
+
+        self.params = None
+        self.mean = None
+        self.scale = None
+        self.results = None
+        self.last_date = None
+        self.refit_date = None
+        self.since_refit = 0
+        self.errors = np.zeros(0)
+
+    # -- tahmin ---------------------------------------------------------
+
+    def _scale(self, exog):
+        # Eğitimde kullanılan StandardScaler ile aynı dönüşüm.
+        return (np.asarray(exog[self.exog_cols], dtype=np.float64) - self.mean) / self.scale
+
+    def _model(self, y, exog):
+        return SARIMAX(np.asarray(y, dtype=np.float64), exog=exog, order=self.order, **self.model_kwargs)
+
+    def _filter(self, y, exog, state, state_cov):
+        # Bilinen başlangıç durumundan yalnızca verilen satırları filtreler.
+        model = self._model(y, exog)
+        model.ssm.initialization = Initialization(model.k_states, "known", constant=state, stationary_cov=state_cov)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return model.filter(self.params)
+
+    def _push_errors(self, results):
+        z = np.asarray(results.standardized_forecasts_error[0], dtype=np.float64)
+        self.errors = np.r_[self.errors, z][-self.drift_window:]
+
+    def fit(self, y, exog, search=None, **search_kwargs):
+        # Tam tahmin: ölçekleyici + parametreler (order yoksa ya da search=True
+        # ise derece de aranır); y ve exog tarih indeksli olmalı. Mevcut
+        # parametreler başlangıç noktası olur.
+        x = exog[self.exog_cols].to_numpy(dtype=np.float64)
+        self.mean = x.mean(axis=0)
+        scale = x.std(axis=0)
+        self.scale = np.where(scale > 0, scale, 1.0)
+        exog_scaled = self._scale(exog)
+
+        if search or (search is None and self.order is None):
+            self.order, self.results, _ = search_order(
+                np.asarray(y, dtype=np.float64), exog_scaled, model_kwargs=self.model_kwargs, **search_kwargs
+            )
+        else:
+            fit_kwargs = {}
+            if self.params is not None and len(self.params) == self._model(y, exog_scaled).k_params:
+                fit_kwargs["start_params"] = self.params
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                self.results = self._model(y, exog_scaled).fit(disp=False, **fit_kwargs)
+        self.params = np.asarray(self.results.params, dtype=np.float64)
+
+        self.last_date = pd.Timestamp(y.index[-1])
+        self.refit_date = self.last_date
+        self.since_refit = 0
+        self.errors = np.zeros(0)
+        self._push_errors(self.results)
+        return self
+
+    def update(self, y, exog):
+        # Yeni periyotlar son tarihten itibaren ardışık olmalı; parametreler
+        # sabit kalır, yalnızca durum ilerler.
+        if self.results is None:
+            raise ValueError("Önce fit() ya da load() çağrılmalı")
+        if len(y) == 0:
+            return self.results
+        dates = pd.DatetimeIndex(y.index)
+        expected = pd.date_range(self.last_date + self.step, periods=len(dates), freq=self.step)
+        if not dates.equals(expected):
+            raise ValueError("Yeni satırlar son tarihten itibaren ardışık olmalı")
+
+        self.results = self._filter(
+            y, self._scale(exog),
+            self.results.predicted_state[:, -1], self.results.predicted_state_cov[:, :, -1],
+        )
+        self.last_date = dates[-1]
+        self.since_refit += len(dates)
+        self._push_errors(self.results)
+        return self.results
+
+    def drift(self):
+        z = self.errors[np.isfinite(self.errors)]
+        return float(np.mean(z ** 2)) if len(z) else 0.0
+
+    def refit_due(self):
+        # Yeniden tahmin gerekçesi: "takvim", "drift" ya da None.
+        if self.since_refit >= self.refit_every:
+            return "takvim"
+        if len(self.errors) >= self.drift_window and self.drift() > self.drift_threshold:
+            return "drift"
+        return None
+
+    def forecast(self, exog):
+        # exog: gelecek periyotların ham (ölçeklenmemiş) regresörleri.
+        return self.results.get_forecast(steps=len(exog), exog=self._scale(exog))
+
+    # -- serileştirme ---------------------------------------------------
+
+    def save(self, path):
+        # Son gözlem ve ondan önceki filtre durumu saklanır; load() bu tek
+        # satırı yeniden filtreleyerek aynı sonuç nesnesini kurar.
+        res = self.results
+        meta = {
+            "freq": self.freq,
+            "exog_cols": self.exog_cols,
+            "order": list(self.order),
+            "model_kwargs": {k: list(v) if isinstance(v, tuple) else v for k, v in self.model_kwargs.items()},
+            "refit_every": self.refit_every,
+            "drift_window": self.drift_window,
+            "drift_threshold": self.drift_threshold,
+            "last_date": self.last_date.isoformat(),
+            "refit_date": self.refit_date.isoformat(),
+            "since_refit": self.since_refit,
+        }
+        arrays = {
+            "params": self.params,
+            "mean": self.mean,
+            "scale": self.scale,
+            "errors": self.errors,
+            "tail_y": np.asarray(res.model.endog[-1:, 0], dtype=np.float64),
+            "tail_exog": np.asarray(res.model.exog[-1:], dtype=np.float64),
+            "tail_state": res.predicted_state[:, -2],
+            "tail_state_cov": res.predicted_state_cov[:, :, -2],
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta, ensure_ascii=False)), **arrays)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            model_kwargs = {k: tuple(v) if isinstance(v, list) else v for k, v in meta["model_kwargs"].items()}
+            state = cls(
+                meta["exog_cols"], freq=meta["freq"], order=meta["order"], model_kwargs=model_kwargs,
+                refit_every=meta["refit_every"], drift_window=meta["drift_window"],
+                drift_threshold=meta["drift_threshold"],
+            )
+            state.params = data["params"]
+            state.mean = data["mean"]
+            state.scale = data["scale"]
+            state.errors = data["errors"]
+            state.last_date = pd.Timestamp(meta["last_date"])
+            state.refit_date = pd.Timestamp(meta["refit_date"])
+            state.since_refit = meta["since_refit"]
+            state.results = state._filter(data["tail_y"], data["tail_exog"], data["tail_state"], data["tail_state_cov"])
+        return state
+
+
+def run_update(freq=DEFAULT_FREQ, path=None, compute=False, data_dir=None, **search_kwargs):
+    # Günlük iş: durum yoksa tam fit; varsa yalnızca son tarihten sonraki
+    # satırlar filtrelenir ve gerekiyorsa tüm geçmişle yeniden tahmin yapılır.
+    path = path or state_path(freq, data_dir)
+    exog_cols = sarimax_regressors(freq) + ["holiday_dummy"]
+    t0 = time.perf_counter()
+
+    if not os.path.exists(path):
+        df = sarimax_frame(freq, compute=compute).set_index("ds")
+        state = SarimaxState(exog_cols, freq=freq).fit(df["y"], df, **search_kwargs)
+        state.save(path)
+        return state, {"islem": "ilk_fit", "yeni_satir": len(df), "sure_sn": time.perf_counter() - t0}
+
+    state = SarimaxState.load(path)
+    new = sarimax_frame(freq, compute=compute, since=state.last_date).set_index("ds")
+    state.update(new["y"], new)
+    info = {"islem": "guncelleme", "yeni_satir": len(new), "sure_sn": time.perf_counter() - t0}
+
+    reason = state.refit_due()
+    if reason is not None:
+        t1 = time.perf_counter()
+        df = sarimax_frame(freq, compute=compute).set_index("ds")
+        state.fit(df["y"], df, search=reason == "drift", **search_kwargs)
+        info.update(islem=f"yeniden_fit ({reason})", refit_sn=time.perf_counter() - t1)
+    state.save(path)
+    return state, info
+
+
+if __name__ == "__main__":
+    state, info = run_update(freq=DEFAULT_FREQ)
+    print(f"SARIMAX durumu: {info['islem']} | yeni satır: {info['yeni_satir']} | "
+          f"süre: {info['sure_sn'] * 1000:.1f} ms | drift: {state.drift():.2f} | son tarih: {state.last_date.date()}")
@@ -7,7 +7,9 @@ from pathlib import Path
 import sys, os
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(ROOT)
-from model_experiments.prophet.prophet_prediction import run_prophet_model
+from model_experiments.prophet_prediction import run_prophet_model, regressors
+from data_pipeline.storage import read_frame, read_file, FINAL
+from feature_engineering.holiday_calendar import holidays_for
 
 st.set_page_config(
     page_title="Zaman Serisi Kullanıcı Etkileşimleri Tahmin Servisi",
@@ -211,12 +213,21 @@ st.sidebar.header("Ayarlar")
 
 test_gun_sayisi = st.sidebar.slider("Test gün sayısı", 7, 60, 30, 1)
 
-use_uploads = st.sidebar.checkbox("CSV'leri yükleyerek kullan", value=False)
+use_uploads = st.sidebar.checkbox("Dosyaları yükleyerek kullan", value=False)
 
 st.sidebar.subheader("Görselleştirme")
 
 show_ci = st.sidebar.checkbox("Güven bandını göster", value=True)
 
+INTERVAL_LABELS = {
+    "Prophet (Monte Carlo)": "prophet",
+    "Hızlı simülasyon (NumPy)": "numpy",
+    "Analitik yaklaşım": "analytic",
+}
+ci_method = st.sidebar.selectbox("Güven bandı yöntemi", list(INTERVAL_LABELS), index=0, disabled=not show_ci)
+# Bant gösterilmiyorsa aralık hiç hesaplanmaz.
+interval_mode = INTERVAL_LABELS[ci_method] if show_ci else "none"
+
 show_legend = st.sidebar.checkbox("Lejandı göster", value=True)
 
 ma_window = st.sidebar.slider("Yumuşatma (MA pencere, gün)", 1, 14, 1, 1)
@@ -231,32 +242,43 @@ else:
     plotly_template = "plotly_white"
 
 
+@st.cache_data
+def load_local_data():
+    df = read_frame(FINAL, columns=["event_date", "ortalama_sure"] + regressors)
+    holidays_df = holidays_for(df["event_date"])
+    return df, holidays_df
+
+
 if use_uploads:
-    df_file = st.sidebar.file_uploader("daily_engagements_final.csv", type=["csv"])
-    holidays_file = st.sidebar.file_uploader("prophet_holidays_tr.csv", type=["csv"])
+    upload_types = ["csv", "parquet", "arrow"]
+    df_file = st.sidebar.file_uploader("daily_engagements_final", type=upload_types)
+    holidays_file = st.sidebar.file_uploader("prophet_holidays_tr (isteğe bağlı)", type=upload_types)
 
-  
-        st.info("Lütfen her iki CSV’yi de yükleyin veya yükleme seçeneğini kapatın.")
+    if df_file is None:
+        st.info("Lütfen veri dosyasını yükleyin veya yükleme seçeneğini kapatın.")
         st.stop()
 
-    df = pd.read_csv(df_file)
-    holidays_df = pd.read_csv(holidays_file)
+    df = read_file(df_file)
+    df["event_date"] = pd.to_datetime(df["event_date"])
+    if holidays_file is None:
+        # Tatil dosyası yüklenmezse takvimden üretilir.
+        holidays_df = holidays_for(df["event_date"])
+    else:
+        holidays_df = read_file(holidays_file)
+        holidays_df["ds"] = pd.to_datetime(holidays_df["ds"])
 else:
     try:
-        df = pd.read_csv("data/daily_engagements_final.csv")
-        holidays_df = pd.read_csv("data/prophet_holidays_tr.csv")
+        df, holidays_df = load_local_data()
     except FileNotFoundError:
-        st.error("Lokal veri dosyaları bulunamadı. Lütfen 'CSV'leri yükleyerek kullan' seçeneğini aktif hale getirin.")
+        st.error("Lokal veri dosyaları bulunamadı. Lütfen 'Dosyaları yükleyerek kullan' seçeneğini aktif hale getirin.")
         st.stop()
 
-df["event_date"] = pd.to_datetime(df["event_date"])
-holidays_df["ds"] = pd.to_datetime(holidays_df["ds"])
-
 try:
     forecast, metrics, train_df, test_df, df_prophet = run_prophet_model(
         df=df,
         holidays_df=holidays_df,
-        test_gun_sayisi=test_gun_sayisi
+        test_gun_sayisi=test_gun_sayisi,
+        interval_mode=interval_mode
         )
 except ValueError as e:
     st.error(str(e))